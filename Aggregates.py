@@ -0,0 +1,193 @@
+import math
+import numpy as np
+import pandas as pd
+from Flight_Schema import emissions_kg
+
+# Streaming, mergeable aggregates for the dashboard.
+# Each day partition is folded into a RangeAggregator and then dropped, so memory
+# stays flat no matter how long the selected date range is. Aggregators built on
+# different partitions (or processes) can be merged together.
+
+
+# CO2 emission reduction based on SAF percentage, per flight
+def calculate_saf_reduction(df, saf_percentage):
+    reduction_factor = saf_percentage / 100
+    df['CO2 Emission (kg)'] = emissions_kg(df)  # Only coerces legacy untyped partitions
+    df['Reduced CO2 Emission (metric tons)'] = df['CO2 Emission (kg)'] * reduction_factor / 1000
+    df['CO2 Emission (metric tons)'] = df['CO2 Emission (kg)'] / 1000
+    return df
+
+
+# Mergeable t-digest quantile sketch (merging variant with the k1 scale function)
+class TDigest:
+    def __init__(self, compression=100, buffer_size=5000):
+        self.compression = compression
+        self.buffer_size = buffer_size
+        self.means = np.empty(0)
+        self.weights = np.empty(0)
+        self.count = 0.0
+        self.min = math.inf
+        self.max = -math.inf
+        self._buffer = []
+        self._buffered = 0
+
+    def update(self, values):
+        values = np.asarray(values, dtype=float)
+        values = values[~np.isnan(values)]
+        if not values.size:
+            return
+        self._buffer.append((values, np.ones(values.size)))
+        self._buffered += values.size
+        self.count += values.size
+        self.min = min(self.min, values.min())
+        self.max = max(self.max, values.max())
+        if self._buffered >= self.buffer_size:
+            self._compress()
+
+    def merge(self, other):
+        other._compress()
+        if not other.count:
+            return self
+        self._buffer.append((other.means, other.weights))
+        self._buffered += other.means.size
+        self.count += other.count
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+        self._compress()
+        return self
+
+    def _k(self, q):
+        return self.compression / (2 * math.pi) * math.asin(2 * q - 1)
+
+    def _k_inverse(self, k):
+        return (math.sin(min(k * 2 * math.pi / self.compression, math.pi / 2)) + 1) / 2
+
+    def _compress(self):
+        if not self._buffer:
+            return
+        means = np.concatenate([self.means] + [m for m, _ in self._buffer])
+        weights = np.concatenate([self.weights] + [w for _, w in self._buffer])
+        self._buffer = []
+        self._buffered = 0
+
+        order = np.argsort(means, kind='mergesort')
+        means = means[order].tolist()
+        weights = weights[order].tolist()
+        total = sum(weights)
+
+        new_means, new_weights = [], []
+        weight_so_far = 0.0
+        q_limit = self._k_inverse(self._k(0.0) + 1)
+        cur_mean, cur_weight = means[0], weights[0]
+        for mean, weight in zip(means[1:], weights[1:]):
+            if (weight_so_far + cur_weight + weight) / total <= q_limit:
+                cur_weight += weight
+                cur_mean += (mean - cur_mean) * weight / cur_weight
+            else:
+                new_means.append(cur_mean)
+                new_weights.append(cur_weight)
+                weight_so_far += cur_weight
+                q_limit = self._k_inverse(self._k(weight_so_far / total) + 1)
+                cur_mean, cur_weight = mean, weight
+        new_means.append(cur_mean)
+        new_weights.append(cur_weight)
+
+        self.means = np.array(new_means)
+        self.weights = np.array(new_weights)
+
+    def quantile(self, q):
+        self._compress()
+        if not self.count:
+            return math.nan
+        # Interpolate between centroid centres; exact while centroids are singletons
+        centers = np.cumsum(self.weights) - self.weights / 2
+        target = q * self.count
+        if target <= centers[0]:
+            return self.means[0] if self.weights[0] == 1 else self.min
+        if target >= centers[-1]:
+            return self.means[-1] if self.weights[-1] == 1 else self.max
+        return float(np.interp(target, centers, self.means))
+
+    def __getstate__(self):
+        self._compress()
+        return self.__dict__
+
+
+# Mergeable top-K counter; exact while the number of distinct keys stays under capacity
+class TopKCounter:
+    def __init__(self, capacity=1000):
+        self.capacity = capacity
+        self.counts = {}
+        self.error = 0
+
+    def update(self, values):
+        counts = pd.Series(values).value_counts()
+        # Categorical columns also report unused categories with a zero count
+        for key, count in counts[counts > 0].items():
+            self.counts[key] = self.counts.get(key, 0) + int(count)
+        self._prune()
+
+    def merge(self, other):
+        for key, count in other.counts.items():
+            self.counts[key] = self.counts.get(key, 0) + count
+        self.error += other.error
+        self._prune()
+        return self
+
+    def _prune(self):
+        if len(self.counts) > self.capacity:
+            ranked = sorted(self.counts.items(), key=lambda item: item[1], reverse=True)
+            self.error = max(self.error, ranked[self.capacity][1])
+            self.counts = dict(ranked[:self.capacity])
+
+    def most_common(self, n):
+        return sorted(self.counts.items(), key=lambda item: item[1], reverse=True)[:n]
+
+
+# Running aggregates for a date range, fed one day partition at a time
+class RangeAggregator:
+    def __init__(self, compression=100, capacity=1000):
+        self.partitions = 0
+        self.rows = 0
+        self.co2_count = 0
+        self.co2_sum_kg = 0.0
+        self.co2_digest = TDigest(compression=compression)
+        self.origins = TopKCounter(capacity)
+        self.destinations = TopKCounter(capacity)
+        self.airlines = TopKCounter(capacity)
+
+    def update(self, df):
+        co2 = emissions_kg(df).to_numpy(dtype=float, na_value=np.nan)
+        valid = co2[~np.isnan(co2)]
+        self.partitions += 1
+        self.rows += len(df)
+        self.co2_count += valid.size
+        self.co2_sum_kg += float(valid.sum())
+        self.co2_digest.update(valid)
+        for column, counter in (('Origin', self.origins), ('Destination', self.destinations), ('Airline', self.airlines)):
+            if column in df:
+                counter.update(df[column])
+        return self
+
+    def merge(self, other):
+        self.partitions += other.partitions
+        self.rows += other.rows
+        self.co2_count += other.co2_count
+        self.co2_sum_kg += other.co2_sum_kg
+        self.co2_digest.merge(other.co2_digest)
+        self.origins.merge(other.origins)
+        self.destinations.merge(other.destinations)
+        self.airlines.merge(other.airlines)
+        return self
+
+    # Dashboard figures; the SAF percentage is applied here so it never forces a reload
+    def summary(self, saf_percentage):
+        total_co2_emission = self.co2_sum_kg / 1000
+        return {
+            'total_co2_emission': total_co2_emission,
+            'total_saf_reduction': total_co2_emission * saf_percentage / 100,
+            'median_co2': self.co2_digest.quantile(0.5) / 1000,
+            'top_origins': [key for key, _ in self.origins.most_common(3)],
+            'top_destinations': [key for key, _ in self.destinations.most_common(3)],
+            'top_airlines': self.airlines.most_common(5),
+        }
@@ -0,0 +1,83 @@
+import argparse
+import hashlib
+from tornado.ioloop import IOLoop
+from tornado.web import HTTPError, RequestHandler
+from Airports import AIRPORTS, DEFAULT_AIRPORT
+from Daily_Aggregates import data_version, get_aggregates
+
+# Read-only JSON API over the precomputed daily aggregates (Daily_Aggregates.py):
+#   GET /api/totals?start=2023-01-01&end=2023-12-31
+#   GET /api/series?freq=day|week|month&start=...&end=...
+#   GET /api/top?by=airline|route&metric=co2_kg|flights&n=10&start=...&end=...
+# Every endpoint takes ?airport=<IATA> (default ANC). Responses carry an ETag derived
+# from the data version and the query, so a poller sending If-None-Match gets a 304
+# without any aggregation, and Cache-Control lets proxies reuse them for a while.
+# Versioning and (re)building the aggregates touch the disk and DuckDB, so they run in
+# the IOLoop's executor rather than blocking the dashboard sharing the loop.
+# Served next to the dashboard with
+#     panel serve Panel.py --plugins Aggregates_Api
+# or on its own with `python Aggregates_Api.py --port 5007`.
+
+# Seconds clients and proxies may reuse a response without revalidating
+MAX_AGE_SECONDS = 300
+
+
+class AggregatesHandler(RequestHandler):
+    def initialize(self, endpoint):
+        self.endpoint = endpoint
+
+    # The ETag is set from the data version before any work, not hashed from the body
+    def compute_etag(self):
+        return None
+
+    def write_error(self, status_code, **kwargs):
+        self.finish({'error': self._reason})
+
+    async def get(self):
+        airport = self.get_argument('airport', DEFAULT_AIRPORT).upper()
+        if airport not in AIRPORTS:
+            raise HTTPError(400, reason=f"Unknown airport {airport!r}")
+        version = await IOLoop.current().run_in_executor(None, data_version, airport)
+        query = '&'.join(f"{name}={','.join(self.get_arguments(name))}" for name in sorted(self.request.arguments))
+        etag = hashlib.sha1(f"{version}|{self.endpoint}|{query}".encode()).hexdigest()[:20]
+        self.set_header('ETag', f'"{etag}"')
+        self.set_header('Cache-Control', f"public, max-age={MAX_AGE_SECONDS}")
+        if self.check_etag_header():
+            self.set_status(304)
+            return
+
+        start, end = self.get_argument('start', None), self.get_argument('end', None)
+        try:
+            n = int(self.get_argument('n', '10'))
+        except ValueError:
+            raise HTTPError(400, reason="n must be a whole number")
+        aggregates = await IOLoop.current().run_in_executor(None, get_aggregates, airport)
+        try:
+            if self.endpoint == 'totals':
+                result = aggregates.totals(start, end)
+            elif self.endpoint == 'series':
+                result = {'series': aggregates.series(start, end, self.get_argument('freq', 'day'))}
+            else:
+                result = {'top': aggregates.top(start, end, self.get_argument('by', 'airline'),
+                                                self.get_argument('metric', 'co2_kg'), n)}
+        except ValueError as e:
+            raise HTTPError(400, reason=str(e))
+        result.update({'airport': airport, 'data_version': aggregates.version})
+        self.write(result)
+
+
+# Picked up by `panel serve --plugins Aggregates_Api`
+ROUTES = [(rf"/api/{endpoint}", AggregatesHandler, {'endpoint': endpoint}) for endpoint in ('totals', 'series', 'top')]
+
+
+if __name__ == "__main__":
+    from tornado.web import Application
+
+    parser = argparse.ArgumentParser(description="Serve the aggregates API without the dashboard")
+    parser.add_argument('--port', type=int, default=5007)
+    parser.add_argument('--address', default='127.0.0.1')
+    args = parser.parse_args()
+
+    Application(ROUTES).listen(args.port, address=args.address)
+    print(f"Aggregates API on http://{args.address}:{args.port}/api/totals")
+    IOLoop.current().start()
@@ -0,0 +1,40 @@
+import os
+
+# Airports the pipeline can track, keyed by IATA code.
+# Anchorage keeps the original layout (data/<date>/); every other airport gets its own
+# tree under data/airports/<IATA>/<date>/, so existing data and links stay where they are.
+
+DEFAULT_AIRPORT = 'ANC'
+
+AIRPORTS = {
+    'ANC': {'icao': 'PANC', 'city': 'Anchorage', 'name': 'Ted Stevens Anchorage International Airport', 'timezone': 'America/Anchorage'},
+    'FAI': {'icao': 'PAFA', 'city': 'Fairbanks', 'name': 'Fairbanks International Airport', 'timezone': 'America/Anchorage'},
+    'JNU': {'icao': 'PAJN', 'city': 'Juneau', 'name': 'Juneau International Airport', 'timezone': 'America/Juneau'},
+}
+
+
+def get_airport(iata):
+    try:
+        return AIRPORTS[iata.upper()]
+    except KeyError:
+        raise ValueError(f"Unknown airport {iata!r}; configured airports: {', '.join(AIRPORTS)}") from None
+
+
+# IANA time zone of the board times, which flightera gives in the airport's local time
+def airport_timezone(iata):
+    return get_airport(iata)['timezone']
+
+
+# Root of an airport's day partitions
+def airport_directory(iata, root='data'):
+    iata = iata.upper()
+    get_airport(iata)
+    if iata == DEFAULT_AIRPORT:
+        return root
+    return os.path.join(root, 'airports', iata)
+
+
+# flightera board for one direction ('arrival' or 'departure') of a day
+def flightera_url(iata, flight_type, date):
+    airport = get_airport(iata)
+    return f"https://www.flightera.net/en/airport/{airport['city']}/{airport['icao']}/{flight_type}/{date}"
@@ -0,0 +1,287 @@
+import argparse
+import os
+import subprocess
+import sys
+import time
+import tracemalloc
+import pandas as pd
+from Aggregates import RangeAggregator, calculate_saf_reduction
+from Flight_Store import AGGREGATE_COLUMNS, iter_days
+from Synthetic_Data import generate
+from Warm_Start import DEFAULT_ROWS
+
+# Benchmarks for the data paths behind the dashboard.
+# `scale` generates synthetic datasets of several sizes (years x traffic multiplier)
+# and reports latency and peak traced memory for loading, the SAF calculation, the
+# streaming aggregates and rendering the first table page.
+# `dask` compares the sequential streaming aggregates with the parallel Dask path and the
+# shared process pool the dashboard uses for long ranges.
+# `emissions` compares the throughput of the distance-aware emission model with the flat one.
+# `parse` times flight row extraction from board pages with each installed parser backend.
+# `imports` times module imports and CLI start-up in fresh interpreters, so heavy
+# dependencies creeping back into the light entry points show up as a regression.
+# tests/test_benchmarks.py runs the same paths under pytest-benchmark at a small size;
+# this script is for the multi-year scaling reports.
+
+bench_directory = 'bench_data'
+
+
+# Time fn untraced, then run it again under tracemalloc (which slows allocation-heavy
+# code) for the peak memory. Returns the result, seconds and peak MB.
+def measure(fn, *args, **kwargs):
+    start_time = time.perf_counter()
+    result = fn(*args, **kwargs)
+    elapsed = time.perf_counter() - start_time
+    del result
+    tracemalloc.start()
+    try:
+        result = fn(*args, **kwargs)
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return result, elapsed, peak / 1024 ** 2
+
+
+# '10x1' -> (10 years, 1x traffic)
+def parse_size(size):
+    years, scale = size.lower().split('x')
+    return int(years), float(scale)
+
+
+# Synthetic data for a size, generated once and reused across runs
+def dataset(years, scale, start_date='2014-01-01', seed=0):
+    directory = os.path.join(bench_directory, f"{years}y_{scale:g}x")
+    end_date = (pd.Timestamp(start_date) + pd.DateOffset(years=years) - pd.Timedelta(days=1)).strftime("%Y-%m-%d")
+    date_range_list = pd.date_range(start_date, end_date).strftime("%Y-%m-%d").tolist()
+    marker = os.path.join(directory, 'complete')
+    if not os.path.exists(marker):
+        generate(start_date, end_date, directory, scale=scale, seed=seed)
+        open(marker, 'w').close()
+    return directory, date_range_list
+
+
+# Every day of the range materialised as one frame, as the pre-streaming loader did
+def load_range(date_range_list, directory):
+    frames = [df for _, df in iter_days(date_range_list, directory=directory)]
+    return pd.concat(frames, ignore_index=True)
+
+
+def aggregate_range(date_range_list, directory, saf_percentage=20):
+    aggregator = RangeAggregator()
+    for _, df in iter_days(date_range_list, columns=AGGREGATE_COLUMNS, directory=directory):
+        aggregator.update(df)
+    return aggregator.summary(saf_percentage)
+
+
+def render_page(df, rows=DEFAULT_ROWS):
+    import panel as pn
+    pane = pn.pane.DataFrame(df.iloc[:rows], index=False)
+    return pane.get_root()
+
+
+def bench_scale(sizes, saf_percentage=20):
+    results = []
+    for size in sizes:
+        years, scale = parse_size(size)
+        directory, date_range_list = dataset(years, scale)
+        df, load_seconds, load_mb = measure(load_range, date_range_list, directory)
+        if not results:
+            render_page(df)  # The one-off panel import stays out of the render timing
+        _, saf_seconds, saf_mb = measure(calculate_saf_reduction, df, saf_percentage)
+        _, aggregate_seconds, aggregate_mb = measure(aggregate_range, date_range_list, directory, saf_percentage)
+        _, render_seconds, render_mb = measure(render_page, df)
+        results.append({
+            'size': size, 'rows': len(df),
+            'load_s': load_seconds, 'load_mb': load_mb,
+            'saf_s': saf_seconds, 'saf_mb': saf_mb,
+            'aggregate_s': aggregate_seconds, 'aggregate_mb': aggregate_mb,
+            'render_s': render_seconds, 'render_mb': render_mb,
+        })
+        del df
+    report = pd.DataFrame(results).set_index('size')
+    print(report.round(2).to_string())
+    return report
+
+
+def bench_dask(sizes, scheduler=None, saf_percentage=20):
+    import Dask_Analytics
+    results = []
+    for size in sizes:
+        years, scale = parse_size(size)
+        directory, date_range_list = dataset(years, scale)
+        _, sequential_seconds, sequential_mb = measure(aggregate_range, date_range_list, directory, saf_percentage)
+        aggregator, dask_seconds, dask_mb = measure(Dask_Analytics.aggregate_range, date_range_list, directory=directory, scheduler=scheduler)
+        # The dashboard's path; the pool is started by the first size and reused after
+        _, pool_seconds, _ = measure(Dask_Analytics.aggregate_range_streaming, date_range_list, directory=directory)
+        results.append({
+            'size': size, 'rows': aggregator.rows,
+            'sequential_s': sequential_seconds, 'sequential_mb': sequential_mb,
+            'dask_s': dask_seconds, 'dask_mb': dask_mb, 'pool_s': pool_seconds,
+            'speedup': sequential_seconds / dask_seconds, 'pool_speedup': sequential_seconds / pool_seconds,
+        })
+    report = pd.DataFrame(results).set_index('size')
+    print(f"{os.cpu_count()} cores, scheduler {scheduler or Dask_Analytics.default_scheduler()}")
+    print(report.round(2).to_string())
+    return report
+
+
+def best_of(repeats, fn, *args, **kwargs):
+    timings = []
+    for _ in range(repeats):
+        start_time = time.perf_counter()
+        result = fn(*args, **kwargs)
+        timings.append(time.perf_counter() - start_time)
+    return result, min(timings)
+
+
+# Best time of each call, running them in turn every round (and the order reversed every
+# other round), so warm-up and drift during the run do not favour whichever came first
+def best_of_alternating(repeats, *calls):
+    results, timings = [None] * len(calls), [[] for _ in calls]
+    for round_number in range(repeats):
+        order = range(len(calls)) if round_number % 2 == 0 else reversed(range(len(calls)))
+        for i in order:
+            start_time = time.perf_counter()
+            results[i] = calls[i]()
+            timings[i].append(time.perf_counter() - start_time)
+    return [(result, min(times)) for result, times in zip(results, timings)]
+
+
+# Whole compute_emissions calls (route and factor resolution included) and the model
+# arithmetic alone, for the flat and the distance model over the same flights. The
+# arithmetic is a fixed cost per row, so the end-to-end slowdown depends on how fast the
+# host resolves routes; extra_ms is the absolute cost of the distance model.
+def bench_emissions(sizes, repeats=5):
+    from Emission_Factors import get_resolver
+    from Emissions import compute_emissions, get_distance_model, model_emissions, route_distances
+    resolver = get_resolver()
+    get_distance_model(resolver)  # Tables are built once per process, outside the timings
+    results = []
+    for size in sizes:
+        years, scale = parse_size(size)
+        directory, date_range_list = dataset(years, scale)
+        df = load_range(date_range_list, directory)[['Origin', 'Destination', 'Aircraft Info']]
+        distances = route_distances(df).to_numpy()
+        factors = resolver.factors_for(df['Aircraft Info']).to_numpy()
+        (flat, flat_seconds), (distance, distance_seconds) = best_of_alternating(
+            repeats, lambda: compute_emissions(df, resolver=resolver, model='flat'),
+            lambda: compute_emissions(df, resolver=resolver, model='distance'))
+        (_, flat_array_seconds), (_, distance_array_seconds) = best_of_alternating(
+            repeats, lambda: model_emissions(distances, factors, 'flat', resolver),
+            lambda: model_emissions(distances, factors, 'distance', resolver))
+        results.append({
+            'size': size, 'rows': len(df),
+            'flat_s': flat_seconds, 'distance_s': distance_seconds, 'extra_ms': (distance_seconds - flat_seconds) * 1000,
+            'flat_array_ms': flat_array_seconds * 1000, 'distance_array_ms': distance_array_seconds * 1000,
+            'distance_mrows_s': len(df) / distance_array_seconds / 1e6,
+            'slowdown': distance_seconds / flat_seconds,
+            'co2_change_pct': (distance.sum() / flat.sum() - 1) * 100,
+        })
+        del df
+    resolver.reset_stats()
+    report = pd.DataFrame(results).set_index('size')
+    print(report.round(3).to_string())
+    return report
+
+
+# Saved page sources, or board pages rendered from the stored rows of the first days
+# when there are none (one page per two-hour window, as the scraper fetches them)
+def board_pages(pages_directory=None, days=7):
+    from Flight_Parser import page_files, read_page
+    from Flight_Store import data_directory
+    from Synthetic_Data import board_page
+    paths = page_files(pages_directory) if pages_directory else []
+    if paths:
+        return [read_page(path) for path in paths], f"{len(paths)} saved pages"
+    pages = []
+    for day in sorted(os.listdir(data_directory))[:days]:
+        for flight_type, kind, location in (('arrival', 'arrivals', 'Origin'), ('departure', 'departures', 'Destination')):
+            path = os.path.join(data_directory, day, f"{day}_{kind}.pkl")
+            if not os.path.exists(path):
+                continue
+            df = pd.read_pickle(path)
+            columns = ['Date & Status', 'Primary Flight Number', 'Flight Number', 'Airline', location, 'Status']
+            window = df['Date & Status'].astype(str).str.split().str[2].str[:2].astype(int) // 2
+            for _, rows in df[columns].groupby(window):
+                pages.append(board_page(rows.astype(object).fillna('').values.tolist(), flight_type))
+    return pages, f"{len(pages)} pages rendered from {days} stored days"
+
+
+# Rows per second of each installed backend over the same pages, checked against bs4
+def bench_parse(pages_directory=None, days=7, repeats=3):
+    from Flight_Parser import BACKENDS, available_backends, parse_rows
+    pages, source = board_pages(pages_directory, days)
+    reference = [parse_rows(page, 'bs4') for page in pages]
+    rows = sum(len(flights) for flights in reference)
+    backends = available_backends()
+    results = []
+    for backend in backends:
+        parsed, seconds = best_of(repeats, lambda: [parse_rows(page, backend) for page in pages])
+        results.append({'backend': backend, 'seconds': seconds, 'pages_s': len(pages) / seconds,
+                        'rows_s': rows / seconds, 'same_rows': parsed == reference})
+    report = pd.DataFrame(results).set_index('backend')
+    report['speedup'] = report.loc['bs4', 'seconds'] / report['seconds']
+    print(f"{source}, {rows} rows; not installed: {', '.join(b for b in BACKENDS if b not in backends) or 'none'}")
+    print(report.round(3).to_string())
+    return report
+
+
+# Modules that must stay cheap to import, and CLI commands that must start quickly
+IMPORT_TARGETS = ['Arrivals', 'Departures', 'Pipeline', 'Emissions', 'Scraper', 'Aggregates']
+COMMAND_TARGETS = [['Pipeline.py', 'status', '2023-06-01'], ['Pipeline.py', '--help']]
+
+
+def time_command(args, repeats=5):
+    timings = []
+    for _ in range(repeats):
+        start_time = time.perf_counter()
+        subprocess.run([sys.executable] + args, capture_output=True, check=True)
+        timings.append(time.perf_counter() - start_time)
+    return min(timings)
+
+
+def bench_imports(budget=1.0, repeats=5):
+    baseline = time_command(['-c', 'pass'], repeats)
+    rows = [{'target': 'python (baseline)', 'seconds': baseline}]
+    for module in IMPORT_TARGETS:
+        rows.append({'target': f"import {module}", 'seconds': time_command(['-c', f"import {module}"], repeats)})
+    for command in COMMAND_TARGETS:
+        rows.append({'target': ' '.join(command), 'seconds': time_command(command, repeats)})
+    report = pd.DataFrame(rows).set_index('target')
+    report['over_budget'] = report['seconds'] > budget
+    print(report.round(3).to_string())
+    return report
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark the dashboard data paths")
+    subparsers = parser.add_subparsers(dest='command', required=True)
+    scale_parser = subparsers.add_parser('scale', help="Latency and peak memory over synthetic datasets of several sizes")
+    scale_parser.add_argument('--sizes', default='1x1,3x1,1x10,10x1', help="Comma-separated <years>x<traffic scale> sizes")
+    scale_parser.add_argument('--saf', type=int, default=20, help="SAF percentage")
+    dask_parser = subparsers.add_parser('dask', help="Sequential streaming aggregates against the parallel Dask path")
+    dask_parser.add_argument('--sizes', default='1x1,3x1,10x1', help="Comma-separated <years>x<traffic scale> sizes")
+    dask_parser.add_argument('--scheduler', choices=('processes', 'threads', 'synchronous'))
+    emissions_parser = subparsers.add_parser('emissions', help="Distance-aware emission model against the flat model")
+    emissions_parser.add_argument('--sizes', default='1x1,3x1,1x10', help="Comma-separated <years>x<traffic scale> sizes")
+    emissions_parser.add_argument('--repeats', type=int, default=5)
+    parse_parser = subparsers.add_parser('parse', help="Flight row extraction per parser backend over board pages")
+    parse_parser.add_argument('--pages', help="Directory of saved page sources (default: render pages from stored days)")
+    parse_parser.add_argument('--days', type=int, default=7, help="Stored days to render pages from")
+    parse_parser.add_argument('--repeats', type=int, default=3)
+    imports_parser = subparsers.add_parser('imports', help="Import and CLI start-up time in fresh interpreters")
+    imports_parser.add_argument('--budget', type=float, default=1.0, help="Seconds each target must stay under")
+    imports_parser.add_argument('--repeats', type=int, default=5)
+    args = parser.parse_args()
+
+    if args.command == 'scale':
+        bench_scale(args.sizes.split(','), args.saf)
+    elif args.command == 'dask':
+        bench_dask(args.sizes.split(','), args.scheduler)
+    elif args.command == 'emissions':
+        bench_emissions(args.sizes.split(','), args.repeats)
+    elif args.command == 'parse':
+        bench_parse(args.pages, args.days, args.repeats)
+    elif args.command == 'imports':
+        if bench_imports(args.budget, args.repeats)['over_budget'].any():
+            sys.exit(1)
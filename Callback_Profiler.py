@@ -0,0 +1,146 @@
+import os
+import threading
+import time
+import tracemalloc
+from collections import deque
+from contextlib import contextmanager, nullcontext
+from tornado.web import RequestHandler
+
+# Opt-in profiling of Panel callbacks (set PANEL_PROFILE=1).
+# Each callback run records wall time and peak traced memory per stage (file loading,
+# Dask aggregation, SAF reduction, aggregation, rendering). Results are kept in this
+# module, which is shared by every session in the server process, and exposed at
+# /metrics when the server is started with:
+#     panel serve Panel.py --plugins Callback_Profiler
+# tracemalloc has one peak for the whole process, so while profiling is on, stages of
+# concurrent callbacks run one at a time; otherwise one session would reset another's
+# peak. Stages must not contain an await.
+
+PROFILING = os.environ.get('PANEL_PROFILE', '0') == '1'
+
+# How many recent callback runs to keep for the diagnostics panel
+HISTORY_SIZE = 200
+
+# Held for the duration of a stage (re-entrant, so stages can nest within a thread)
+_stage_lock = threading.RLock()
+# Absolute traced peaks of the stages open in this thread, innermost last
+_open_stages = threading.local()
+
+
+class CallbackProfile:
+    def __init__(self, profiler, callback):
+        self.profiler = profiler
+        self.callback = callback
+        self.started = time.perf_counter()
+        self.stages = {}
+
+    # Stages may be entered several times per callback; wall time adds up, peak memory is the max
+    @contextmanager
+    def stage(self, name):
+        with _stage_lock:
+            stack = _open_stages.__dict__.setdefault('peaks', [])
+            # Resetting the peak would lose what an enclosing stage has seen so far
+            if stack:
+                stack[-1] = max(stack[-1], tracemalloc.get_traced_memory()[1])
+            tracemalloc.reset_peak()
+            baseline = tracemalloc.get_traced_memory()[0]
+            stack.append(0)
+            start = time.perf_counter()
+            try:
+                yield
+            finally:
+                seconds = time.perf_counter() - start
+                absolute_peak = max(stack.pop(), tracemalloc.get_traced_memory()[1])
+                if stack:
+                    stack[-1] = max(stack[-1], absolute_peak)
+                self._record_stage(name, seconds, max(absolute_peak - baseline, 0))
+
+    def _record_stage(self, name, seconds, peak):
+        entry = self.stages.setdefault(name, {'seconds': 0.0, 'peak_bytes': 0, 'calls': 0})
+        entry['seconds'] += seconds
+        entry['peak_bytes'] = max(entry['peak_bytes'], peak)
+        entry['calls'] += 1
+
+    def finish(self):
+        self.profiler.record(self.callback, time.perf_counter() - self.started, self.stages)
+
+
+class NullProfile:
+    def stage(self, name):
+        return nullcontext()
+
+    def finish(self):
+        pass
+
+
+class CallbackProfiler:
+    def __init__(self, enabled=PROFILING):
+        self.enabled = enabled
+        self.lock = threading.Lock()
+        self.history = deque(maxlen=HISTORY_SIZE)
+        self.totals = {}
+        if enabled and not tracemalloc.is_tracing():
+            tracemalloc.start()
+
+    def start(self, callback):
+        return CallbackProfile(self, callback) if self.enabled else NullProfile()
+
+    def record(self, callback, seconds, stages):
+        with self.lock:
+            self.history.append({'callback': callback, 'time': time.time(), 'seconds': seconds, 'stages': stages})
+            for name, entry in [('total', {'seconds': seconds, 'peak_bytes': 0})] + list(stages.items()):
+                totals = self.totals.setdefault((callback, name), {'count': 0, 'sum': 0.0, 'max': 0.0, 'peak_bytes': 0})
+                totals['count'] += 1
+                totals['sum'] += entry['seconds']
+                totals['max'] = max(totals['max'], entry['seconds'])
+                totals['peak_bytes'] = max(totals['peak_bytes'], entry['peak_bytes'])
+
+    def last_run(self):
+        with self.lock:
+            return self.history[-1] if self.history else None
+
+    # Prometheus text exposition of the per-stage totals
+    def prometheus_text(self):
+        with self.lock:
+            totals = dict(self.totals)
+        lines = [
+            '# HELP panel_callback_stage_seconds Wall time per Panel callback stage.',
+            '# TYPE panel_callback_stage_seconds summary',
+        ]
+        for (callback, stage), entry in totals.items():
+            labels = f'callback="{callback}",stage="{stage}"'
+            lines.append(f"panel_callback_stage_seconds_sum{{{labels}}} {entry['sum']:.6f}")
+            lines.append(f"panel_callback_stage_seconds_count{{{labels}}} {entry['count']}")
+        lines += ['# HELP panel_callback_stage_seconds_max Slowest run of each stage.', '# TYPE panel_callback_stage_seconds_max gauge']
+        for (callback, stage), entry in totals.items():
+            lines.append(f"panel_callback_stage_seconds_max{{callback=\"{callback}\",stage=\"{stage}\"}} {entry['max']:.6f}")
+        lines += ['# HELP panel_callback_stage_peak_memory_bytes Highest traced memory growth within each stage.', '# TYPE panel_callback_stage_peak_memory_bytes gauge']
+        for (callback, stage), entry in totals.items():
+            if stage != 'total':
+                lines.append(f"panel_callback_stage_peak_memory_bytes{{callback=\"{callback}\",stage=\"{stage}\"}} {entry['peak_bytes']}")
+        return '\n'.join(lines) + '\n'
+
+
+profiler = CallbackProfiler()
+
+
+# Markdown table of the latest callback run, for the diagnostics panel
+def diagnostics_markdown():
+    run = profiler.last_run()
+    if run is None:
+        return "No callbacks profiled yet."
+    rows = [f"**{run['callback']}**: {run['seconds']:.3f} s total", "",
+            "| Stage | Wall time (s) | Peak memory (MB) | Calls |", "|---|---|---|---|"]
+    for name, entry in sorted(run['stages'].items(), key=lambda item: -item[1]['seconds']):
+        rows.append(f"| {name} | {entry['seconds']:.3f} | {entry['peak_bytes'] / 1e6:.1f} | {entry['calls']} |")
+    return '\n'.join(rows)
+
+
+class MetricsHandler(RequestHandler):
+    def get(self):
+        self.set_header('Content-Type', 'text/plain; version=0.0.4')
+        self.write(profiler.prometheus_text())
+
+
+# Picked up by `panel serve --plugins Callback_Profiler`
+ROUTES = [(r"/metrics", MetricsHandler, {})]
@@ -0,0 +1,189 @@
+import argparse
+import hashlib
+import json
+import os
+import threading
+import time
+import pandas as pd
+from Airports import AIRPORTS, DEFAULT_AIRPORT, airport_directory
+from File_Lock import file_lock
+from Flight_Sql import connect, unconverted_pickles, view_files
+
+# Precomputed per-day aggregates for the API (Aggregates_Api.py).
+# Three small tables per airport, built with one DuckDB pass over the day files
+# (Flight_Sql.py) and stored under aggregates/<IATA>/:
+#   daily     date, flights, co2_flights, co2_kg
+#   airlines  date, airline, flights, co2_kg
+#   routes    date, route ('ANC-SEA'), flights, co2_kg
+# Range totals, series and top lists are answered from these in memory. They are keyed
+# on the data version, a hash of the day files' names, sizes and modification times,
+# and rebuilt only when that changes. Pickles of days left out of the views count too,
+# so a skipped day showing up or changing still changes the version (and the API ETags).
+
+aggregates_directory = 'aggregates'
+
+# How long a computed data version is trusted before the day files are stat'ed again
+VERSION_TTL_SECONDS = 10
+
+TABLES = {
+    'daily': "SELECT date, count(*) AS flights, count(co2_kg) AS co2_flights, coalesce(sum(co2_kg), 0) AS co2_kg "
+             "FROM flights GROUP BY date ORDER BY date",
+    'airlines': "SELECT date, airline, count(*) AS flights, coalesce(sum(co2_kg), 0) AS co2_kg "
+                "FROM flights WHERE airline IS NOT NULL GROUP BY date, airline ORDER BY date, airline",
+    'routes': "SELECT date, origin_iata || '-' || destination_iata AS route, count(*) AS flights, coalesce(sum(co2_kg), 0) AS co2_kg "
+              "FROM flights GROUP BY date, route ORDER BY date, route",
+}
+
+# Series frequencies -> pandas periods
+FREQUENCIES = {'day': 'D', 'week': 'W', 'month': 'M'}
+TOP_BY = {'airline': 'airlines', 'route': 'routes'}
+METRICS = ('flights', 'co2_kg')
+
+# Most rows a top query returns
+MAX_TOP_N = 100
+
+_versions = {}
+_aggregates = {}
+_lock = threading.Lock()
+
+
+def airport_aggregates_directory(airport):
+    return os.path.join(aggregates_directory, airport.upper())
+
+
+def compute_data_version(airport):
+    directory = airport_directory(airport)
+    digest = hashlib.sha1()
+    for files in (*view_files(directory, airport), unconverted_pickles(directory)):
+        for path in files:
+            stat = os.stat(path)
+            digest.update(f"{os.path.basename(path)}:{stat.st_size}:{stat.st_mtime_ns}\n".encode())
+    return digest.hexdigest()[:16]
+
+
+def data_version(airport=DEFAULT_AIRPORT):
+    cached = _versions.get(airport)
+    if cached is None or time.time() - cached[1] > VERSION_TTL_SECONDS:
+        cached = _versions[airport] = (compute_data_version(airport), time.time())
+    return cached[0]
+
+
+def _parse_date(value, name):
+    try:
+        timestamp = pd.Timestamp(value)
+    except ValueError:
+        timestamp = pd.NaT
+    if pd.isna(timestamp):  # An empty value parses as NaT
+        raise ValueError(f"{name} must be a date (YYYY-MM-DD), not {value!r}")
+    return timestamp.normalize()
+
+
+class DailyAggregates:
+    def __init__(self, airport, version, tables):
+        self.airport = airport
+        self.version = version
+        self.tables = tables
+
+    def _range(self, table, start=None, end=None):
+        df = self.tables[table]
+        if start is not None:
+            df = df[df['date'] >= _parse_date(start, 'start')]
+        if end is not None:
+            df = df[df['date'] <= _parse_date(end, 'end')]
+        return df
+
+    def totals(self, start=None, end=None):
+        df = self._range('daily', start, end)
+        return {
+            'days': len(df),
+            'first_date': df['date'].min().strftime('%Y-%m-%d') if len(df) else None,
+            'last_date': df['date'].max().strftime('%Y-%m-%d') if len(df) else None,
+            'flights': int(df['flights'].sum()),
+            'co2_flights': int(df['co2_flights'].sum()),
+            'co2_kg': float(df['co2_kg'].sum()),
+        }
+
+    def series(self, start=None, end=None, freq='day'):
+        if freq not in FREQUENCIES:
+            raise ValueError(f"freq must be one of {', '.join(FREQUENCIES)}, not {freq!r}")
+        df = self._range('daily', start, end)
+        periods = df['date'].dt.to_period(FREQUENCIES[freq]).dt.start_time.dt.strftime('%Y-%m-%d')
+        grouped = df.groupby(periods)[['flights', 'co2_kg']].sum()
+        return [{'period': period, 'flights': int(row.flights), 'co2_kg': float(row.co2_kg)} for period, row in grouped.iterrows()]
+
+    def top(self, start=None, end=None, by='airline', metric='co2_kg', n=10):
+        if by not in TOP_BY:
+            raise ValueError(f"by must be one of {', '.join(TOP_BY)}, not {by!r}")
+        if metric not in METRICS:
+            raise ValueError(f"metric must be one of {', '.join(METRICS)}, not {metric!r}")
+        if not 1 <= n <= MAX_TOP_N:
+            raise ValueError(f"n must be between 1 and {MAX_TOP_N}, not {n}")
+        key = by if by == 'route' else 'airline'
+        df = self._range(TOP_BY[by], start, end)
+        grouped = df.groupby(key)[['flights', 'co2_kg']].sum().sort_values(metric, ascending=False).head(n)
+        return [{key: name, 'flights': int(row.flights), 'co2_kg': float(row.co2_kg)} for name, row in grouped.iterrows()]
+
+
+def _read(directory, version):
+    version_file = os.path.join(directory, 'version.json')
+    if not os.path.exists(version_file):
+        return None
+    with open(version_file, 'r', encoding='utf-8') as f:
+        if json.load(f).get('version') != version:
+            return None
+    return {table: pd.read_parquet(os.path.join(directory, f"{table}.parquet")) for table in TABLES}
+
+
+# Build the tables for the current data version, unless another process already has
+def build(airport=DEFAULT_AIRPORT, version=None):
+    version = version or compute_data_version(airport)
+    directory = airport_aggregates_directory(airport)
+    os.makedirs(directory, exist_ok=True)
+    with file_lock(os.path.join(directory, 'build.lock')):
+        tables = _read(directory, version)
+        if tables is not None:
+            return DailyAggregates(airport, version, tables)
+        start_time = time.time()
+        connection = connect(airport)
+        tables = {}
+        for table, sql in TABLES.items():
+            df = connection.sql(sql).df()
+            df['date'] = pd.to_datetime(df['date'])
+            tables[table] = df
+            temp_path = os.path.join(directory, f"{table}.parquet.{os.getpid()}.tmp")
+            df.to_parquet(temp_path, index=False)
+            os.replace(temp_path, os.path.join(directory, f"{table}.parquet"))
+        # The version is written last, so readers never pair it with older tables
+        temp_path = os.path.join(directory, f"version.json.{os.getpid()}.tmp")
+        with open(temp_path, 'w', encoding='utf-8') as f:
+            json.dump({'version': version, 'built_at': time.time(), 'seconds': time.time() - start_time}, f)
+        os.replace(temp_path, os.path.join(directory, 'version.json'))
+    return DailyAggregates(airport, version, tables)
+
+
+# Aggregates for the current data version: from memory, from disk, or rebuilt
+def get_aggregates(airport=DEFAULT_AIRPORT):
+    airport = airport.upper()
+    version = data_version(airport)
+    aggregates = _aggregates.get(airport)
+    if aggregates is not None and aggregates.version == version:
+        return aggregates
+    with _lock:
+        aggregates = _aggregates.get(airport)
+        if aggregates is None or aggregates.version != version:
+            tables = _read(airport_aggregates_directory(airport), version)
+            aggregates = DailyAggregates(airport, version, tables) if tables is not None else build(airport, version)
+            _aggregates[airport] = aggregates
+    return aggregates
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Build the precomputed daily aggregates behind the API")
+    parser.add_argument('command', choices=('build',))
+    parser.add_argument('--airport', action='append', choices=sorted(AIRPORTS), help="IATA code (repeatable; default all with data)")
+    args = parser.parse_args()
+
+    for airport in args.airport or [iata for iata in AIRPORTS if os.path.isdir(airport_directory(iata))]:
+        start_time = time.time()
+        aggregates = build(airport)
+        print(f"{airport}: version {aggregates.version}, {len(aggregates.tables['daily'])} days --- {time.time() - start_time:.1f} seconds ---")
@@ -0,0 +1,207 @@
+import argparse
+import contextlib
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+import pandas as pd
+from Aggregates import RangeAggregator
+from Data_Sync import get_manifest
+from Flight_Schema import apply_schema, emissions_kg
+from Flight_Store import AGGREGATE_COLUMNS, day_file, read_day
+
+# Out-of-core analytics over the day partitions with Dask.
+# Nothing is loaded up front: every chunk of days becomes a task that reads its own
+# partitions (Parquet with column and predicate pushdown when present) and reduces them
+# to a small result (a RangeAggregator or per-day totals), and only those results travel
+# back to be merged. Memory is bounded by the chunks in flight, not by the range, and
+# the chunks run in parallel across cores, or on a LocalCluster / remote scheduler.
+#
+#   python Dask_Analytics.py summary 2014-01-01 2023-12-31 --directory bench_data/10y_1x
+#   python Dask_Analytics.py daily 2022-01-01 2022-12-31 --cluster --workers 4
+
+# Days read by one task; one task per day would spend more on scheduling than on reading
+DAYS_PER_TASK = 31
+
+# Shorter ranges are faster through the sequential streaming path than through a pool.
+# Measured with Benchmark.py dask: on 2 cores the 2023 range (365 days) took 1.2 s in
+# the sequential loop and 2.0 s on Dask's process scheduler; on 1 core the shared pool
+# stays within 15% of the loop from 31 to 1096 days, so it only pays off once a range
+# is long enough to keep several workers busy. Re-measure before lowering this.
+MIN_PARALLEL_DAYS = 730
+
+
+# Days of the range the manifest lists, instead of probing the file system for every day.
+# The manifest only tracks combined partitions; other kinds are still probed.
+def existing_days(date_range_list, kind='combined', directory=None):
+    if kind == 'combined':
+        manifest = get_manifest(directory)
+        return [date for date in date_range_list if manifest.is_available(date)]
+    return [date for date in date_range_list
+            if os.path.exists(day_file(date, kind, 'parquet', directory)) or os.path.exists(day_file(date, kind, 'pkl', directory))]
+
+
+def chunks(items, size=DAYS_PER_TASK):
+    return [items[i:i + size] for i in range(0, len(items), size)]
+
+
+# Threads cannot overlap the pandas work of several partitions, so the default is one
+# process per core; a single core gains nothing from a pool
+def default_scheduler():
+    return 'processes' if (os.cpu_count() or 1) > 1 else 'synchronous'
+
+
+# A LocalCluster and a client for it; dask.compute uses the client while it is open.
+# Needs the optional distributed package (pip install "dask[distributed]").
+@contextlib.contextmanager
+def local_cluster(workers=None, address=None):
+    try:
+        from dask.distributed import Client, LocalCluster
+    except ImportError:
+        raise ImportError("A Dask cluster needs the distributed package: pip install \"dask[distributed]\"") from None
+    if address:
+        with Client(address) as client:
+            yield client
+        return
+    with LocalCluster(n_workers=workers, threads_per_worker=1) as cluster, Client(cluster) as client:
+        yield client
+
+
+def _compute(tasks, scheduler=None):
+    import dask
+    try:
+        from dask.distributed import default_client
+        default_client()
+    except (ImportError, ValueError):
+        return dask.compute(*tasks, scheduler=scheduler or default_scheduler())
+    return dask.compute(*tasks)  # An open client schedules everything
+
+
+def _aggregate_days(dates, filters, kind, directory):
+    aggregator = RangeAggregator()
+    for date in dates:
+        df = read_day(date, columns=AGGREGATE_COLUMNS, filters=filters, kind=kind, directory=directory)
+        if df is not None:
+            aggregator.update(df)
+    return aggregator
+
+
+def _merge(*aggregators):
+    merged = aggregators[0]
+    for aggregator in aggregators[1:]:
+        merged.merge(aggregator)
+    return merged
+
+
+def _daily_totals(dates, filters, kind, directory):
+    rows = []
+    for date in dates:
+        df = read_day(date, columns=['CO2 Emission (kg)'], filters=filters, kind=kind, directory=directory)
+        if df is not None:
+            co2 = emissions_kg(df)
+            rows.append({'date': date, 'flights': len(df), 'co2_kg': float(co2.sum()), 'co2_flights': int(co2.notna().sum())})
+    return pd.DataFrame(rows, columns=['date', 'flights', 'co2_kg', 'co2_flights'])
+
+
+# RangeAggregator over the range, built chunk by chunk in parallel and merged as a tree
+def aggregate_range(date_range_list, filters=None, kind='combined', directory=None, scheduler=None, fan_in=8):
+    import dask
+    days = existing_days(date_range_list, kind, directory)
+    tasks = [dask.delayed(_aggregate_days)(dates, filters, kind, directory) for dates in chunks(days)]
+    if not tasks:
+        return RangeAggregator()
+    while len(tasks) > 1:
+        tasks = [dask.delayed(_merge)(*group) for group in chunks(tasks, fan_in)]
+    return _compute(tasks, scheduler)[0]
+
+
+_pool = None
+
+
+# One process pool for the life of the process (the dashboard), so a refresh does not
+# pay for starting workers again
+def get_pool(workers=None):
+    global _pool
+    if _pool is None:
+        _pool = ProcessPoolExecutor(max_workers=workers or os.cpu_count())
+    return _pool
+
+
+# The same RangeAggregator through the shared pool, for the dashboard: every chunk is
+# submitted once and merged as it finishes, and on_progress gets the running aggregator
+# after each one
+def aggregate_range_streaming(date_range_list, on_progress=None, filters=None, kind='combined', directory=None, pool=None):
+    days = existing_days(date_range_list, kind, directory)
+    pool = pool or get_pool()
+    futures = [pool.submit(_aggregate_days, dates, filters, kind, directory) for dates in chunks(days)]
+    aggregator = RangeAggregator()
+    for future in as_completed(futures):
+        aggregator.merge(future.result())
+        if on_progress is not None:
+            on_progress(aggregator)
+    return aggregator
+
+
+# Flights and CO2 per day, indexed by date
+def daily_totals(date_range_list, filters=None, kind='combined', directory=None, scheduler=None):
+    import dask
+    days = existing_days(date_range_list, kind, directory)
+    tasks = [dask.delayed(_daily_totals)(dates, filters, kind, directory) for dates in chunks(days)]
+    frames = [df for df in _compute(tasks, scheduler) if not df.empty] if tasks else []
+    if not frames:
+        return pd.DataFrame(columns=['flights', 'co2_kg', 'co2_flights'], index=pd.Index([], name='date'))
+    return pd.concat(frames, ignore_index=True).set_index('date')
+
+
+def _read_partition(date, columns, filters, kind, directory):
+    return apply_schema(read_day(date, columns=columns, filters=filters, kind=kind, directory=directory), date)
+
+
+# The range as a lazy Dask DataFrame, one partition per day, for ad-hoc queries.
+# Straight from the Parquet files when every day has a copy; otherwise each day is a
+# delayed read_day, so legacy pickle partitions still work.
+def flights_frame(date_range_list, columns=None, filters=None, kind='combined', directory=None):
+    import dask
+    import dask.dataframe as dd
+    days = existing_days(date_range_list, kind, directory)
+    if not days:
+        return None
+    parquet_files = [day_file(date, kind, 'parquet', directory) for date in days]
+    if all(os.path.exists(path) for path in parquet_files):
+        return dd.read_parquet(parquet_files, columns=columns, filters=filters or None)
+    # Categories differ per day, so the metadata leaves them unknown
+    meta = dd.utils.clear_known_categories(_read_partition(days[0], columns, filters, kind, directory).iloc[:0])
+    return dd.from_delayed([dask.delayed(_read_partition)(date, columns, filters, kind, directory) for date in days],
+                           meta=meta, verify_meta=False)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Out-of-core range analytics over the day partitions")
+    subparsers = parser.add_subparsers(dest='command', required=True)
+    summary_parser = subparsers.add_parser('summary', help="Dashboard summary for a date range")
+    daily_parser = subparsers.add_parser('daily', help="Flights and CO2 per day")
+    for command_parser in (summary_parser, daily_parser):
+        command_parser.add_argument('start_date')
+        command_parser.add_argument('end_date')
+        command_parser.add_argument('--directory', help="Data directory (default data)")
+        command_parser.add_argument('--scheduler', choices=('processes', 'threads', 'synchronous'), help="Local scheduler (default one process per core)")
+        command_parser.add_argument('--cluster', action='store_true', help="Run on a LocalCluster (needs dask[distributed])")
+        command_parser.add_argument('--address', help="Scheduler address of an existing Dask cluster")
+        command_parser.add_argument('--workers', type=int, help="LocalCluster workers (default one per core)")
+    summary_parser.add_argument('--saf', type=int, default=20, help="SAF percentage")
+    daily_parser.add_argument('--output', help="Write the daily totals to this CSV")
+    args = parser.parse_args()
+
+    date_range_list = pd.date_range(args.start_date, args.end_date).strftime("%Y-%m-%d").tolist()
+    start_time = time.time()
+    with local_cluster(args.workers, args.address) if args.cluster or args.address else contextlib.nullcontext():
+        if args.command == 'summary':
+            aggregator = aggregate_range(date_range_list, directory=args.directory, scheduler=args.scheduler)
+            print(f"{aggregator.partitions} days, {aggregator.rows} flights")
+            for key, value in aggregator.summary(args.saf).items():
+                print(f"{key}: {value}")
+        else:
+            totals = daily_totals(date_range_list, directory=args.directory, scheduler=args.scheduler)
+            if args.output:
+                totals.to_csv(args.output)
+            print(totals)
+    print("Process finished --- %s seconds ---" % (time.time() - start_time))
@@ -0,0 +1,184 @@
+import argparse
+import json
+import logging
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+import pandas as pd
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from Flight_Store import data_directory, day_file
+
+# Manifest of which day partitions exist locally, with a negative cache for known gaps,
+# plus a bulk sync that fetches missing days from GitHub concurrently over one pooled
+# HTTP session. Readers consult the manifest instead of probing the file system (and the
+# network) for every day on every refresh.
+
+logger = logging.getLogger(__name__)
+
+REPO = "LChelkowski/CO2-Emissions-Tracker-Ted-Stevens-Anchorage-International-Airport"
+RAW_BASE_URL = f"https://raw.githubusercontent.com/{REPO}/master"
+
+# How long a day that was not found upstream is trusted to stay missing
+GAP_TTL_SECONDS = 24 * 60 * 60
+
+
+class DataManifest:
+    def __init__(self, directory=None):
+        self.directory = directory or data_directory
+        self.path = os.path.join(self.directory, 'manifest.json')
+        self.lock = threading.Lock()
+        self.available = set()
+        self.missing = {}
+        self.load()
+
+    def load(self):
+        if os.path.exists(self.path):
+            with open(self.path, 'r', encoding='utf-8') as f:
+                manifest = json.load(f)
+            self.available = set(manifest.get('available', []))
+            self.missing = manifest.get('missing', {})
+        else:
+            self.rebuild()
+
+    def save(self):
+        with self.lock:
+            manifest = {'available': sorted(self.available), 'missing': dict(sorted(self.missing.items()))}
+        os.makedirs(self.directory, exist_ok=True)
+        temp_path = f"{self.path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(temp_path, 'w', encoding='utf-8') as f:
+            json.dump(manifest, f, indent=0)
+        os.replace(temp_path, self.path)
+
+    # Scan the data directory once
+    def rebuild(self):
+        available = set()
+        if os.path.isdir(self.directory):
+            for day in os.listdir(self.directory):
+                if os.path.exists(day_file(day, 'combined', 'pkl', self.directory)) or os.path.exists(day_file(day, 'combined', 'parquet', self.directory)):
+                    available.add(day)
+        with self.lock:
+            self.available = available
+            self.missing = {day: checked for day, checked in self.missing.items() if day not in available}
+        self.save()
+
+    def is_available(self, date):
+        return date in self.available
+
+    def is_known_gap(self, date, ttl=GAP_TTL_SECONDS):
+        checked = self.missing.get(date)
+        return checked is not None and time.time() - checked < ttl
+
+    def mark_available(self, date):
+        with self.lock:
+            self.available.add(date)
+            self.missing.pop(date, None)
+
+    def mark_missing(self, date):
+        with self.lock:
+            self.available.discard(date)
+            self.missing[date] = time.time()
+
+    # Days of a range that are neither present locally nor a known gap
+    def unknown_days(self, date_range_list, ttl=GAP_TTL_SECONDS):
+        return [date for date in date_range_list if not self.is_available(date) and not self.is_known_gap(date, ttl)]
+
+
+_manifests = {}
+
+
+def get_manifest(directory=None):
+    directory = directory or data_directory
+    if directory not in _manifests:
+        _manifests[directory] = DataManifest(directory)
+    return _manifests[directory]
+
+
+def create_session(pool_size):
+    session = requests.Session()
+    retry = Retry(total=3, backoff_factor=0.5, status_forcelist=[429, 500, 502, 503, 504])
+    adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size, max_retries=retry)
+    session.mount('http://', adapter)
+    session.mount('https://', adapter)
+    return session
+
+
+# Fetch one day's combined pickle; returns 'downloaded', 'missing' or 'error'
+def fetch_day(session, date, base_url, directory, timeout=30):
+    url = f"{base_url}/data/{date}/{date}_combined.pkl"
+    try:
+        response = session.get(url, timeout=timeout)
+    except requests.exceptions.RequestException as e:
+        logger.warning(f"Failed to fetch {url}: {e}")
+        return 'error'
+    if response.status_code == 404:
+        return 'missing'
+    if response.status_code != 200:
+        logger.warning(f"Failed to fetch {url}: {response.status_code}")
+        return 'error'
+    # A pickle starts with the PROTO opcode; anything else (e.g. an HTML error page) is rejected
+    if not response.content.startswith(b'\x80'):
+        logger.warning(f"Unexpected content for {url}, not a pickle")
+        return 'error'
+    target = day_file(date, 'combined', 'pkl', directory)
+    os.makedirs(os.path.dirname(target), exist_ok=True)
+    temp_path = f"{target}.{threading.get_ident()}.tmp"
+    with open(temp_path, 'wb') as f:
+        f.write(response.content)
+    os.replace(temp_path, target)
+    return 'downloaded'
+
+
+# Fetch every unknown day of a range concurrently and record the outcome in the manifest
+def sync_missing(date_range_list, base_url=RAW_BASE_URL, directory=None, workers=8, ttl=GAP_TTL_SECONDS):
+    manifest = get_manifest(directory)
+    unknown = manifest.unknown_days(date_range_list, ttl)
+    results = {'downloaded': 0, 'missing': 0, 'error': 0}
+    if not unknown:
+        return results
+
+    # Days written locally since the manifest was built only need recording
+    remaining = []
+    for date in unknown:
+        if os.path.exists(day_file(date, 'combined', 'pkl', manifest.directory)):
+            manifest.mark_available(date)
+        else:
+            remaining.append(date)
+
+    if remaining:
+        with create_session(workers) as session, ThreadPoolExecutor(max_workers=workers) as executor:
+            futures = {executor.submit(fetch_day, session, date, base_url, manifest.directory): date for date in remaining}
+            for future in as_completed(futures):
+                date = futures[future]
+                outcome = future.result()
+                results[outcome] += 1
+                if outcome == 'downloaded':
+                    manifest.mark_available(date)
+                elif outcome == 'missing':
+                    manifest.mark_missing(date)
+    manifest.save()
+    logger.info(f"Synced {len(remaining)} days: {results}")
+    return results
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    parser = argparse.ArgumentParser(description="Maintain the data manifest and fetch missing day partitions")
+    subparsers = parser.add_subparsers(dest='command', required=True)
+    subparsers.add_parser('rebuild', help="Rescan the data directory into the manifest")
+    sync_parser = subparsers.add_parser('sync', help="Fetch missing days of a range concurrently")
+    sync_parser.add_argument('start_date')
+    sync_parser.add_argument('end_date')
+    sync_parser.add_argument('--base-url', default=RAW_BASE_URL, help="Server to fetch from (e.g. a local http.server for testing)")
+    sync_parser.add_argument('--workers', type=int, default=8)
+    sync_parser.add_argument('--directory', default=None)
+    args = parser.parse_args()
+
+    if args.command == 'rebuild':
+        get_manifest().rebuild()
+        print(f"Manifest lists {len(get_manifest().available)} available days")
+    else:
+        dates = pd.date_range(args.start_date, args.end_date).strftime("%Y-%m-%d").tolist()
+        print(sync_missing(dates, base_url=args.base_url, directory=args.directory, workers=args.workers))
@@ -0,0 +1,216 @@
+import argparse
+import logging
+import os
+import signal
+import socket
+import subprocess
+import sys
+import threading
+import time
+import pandas as pd
+from Airports import AIRPORTS, DEFAULT_AIRPORT, airport_directory
+from Pipeline import DIRECTIONS
+from Scrape_Checkpoints import clear_checkpoints
+
+# Collection spread over several workers through a shared work queue (Work_Queue.py),
+# one named queue per airport. The coordinator enqueues one job per (date, direction),
+# requeues jobs whose lease expired and combines every day whose directions are all done. Workers, on this or
+# other machines, lease jobs, keep the lease alive with a heartbeat thread while the
+# direction is scraped and computed, and hand the frame back through the queue.
+#
+#   python Distributed_Collect.py coordinate 2019-01-01 2021-12-31 --queue redis://queue-host:6379/0
+#   python Distributed_Collect.py work --queue redis://queue-host:6379/0 --airport FAI
+#   python Distributed_Collect.py local 2023-01-10 2023-01-20 --workers 4   (everything on one box)
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_QUEUE = 'sqlite:///queue/collect_queue.db'
+
+# How long local workers get to exit once the coordinator is done (or has failed), and
+# how long a worker that was terminated gets before it is killed
+WORKER_EXIT_SECONDS = 60
+WORKER_TERMINATE_SECONDS = 10
+
+
+def queue_name(airport):
+    return f"collect_{airport}"
+
+
+def default_worker_id():
+    return f"{socket.gethostname()}-{os.getpid()}"
+
+
+# One job: a direction of an airport day, returned as a frame (no per-direction files written)
+def collect_job(job, airport):
+    from Pipeline import run_direction
+    date_directory = os.path.join(airport_directory(airport), job['date'])
+    os.makedirs(date_directory, exist_ok=True)
+    df = run_direction(job['date'], date_directory, job['direction'], write=False, airport=airport)
+    # The day may be combined on another machine, so the checkpoints here would otherwise
+    # be reused by a later run of the day
+    clear_checkpoints(date_directory, job['date'], job['direction'])
+    return df
+
+
+def heartbeat(queue_url, airport, job, worker_id, interval, stop):
+    from Work_Queue import open_queue
+    queue = open_queue(queue_url, name=queue_name(airport))  # Own connection; SQLite connections are per thread
+    while not stop.wait(interval):
+        if not queue.heartbeat(job, worker_id):
+            logger.warning(f"Lost the lease on {job['id']}; its result will be discarded")
+            return
+
+
+def work(queue_url, airport=DEFAULT_AIRPORT, worker_id=None, lease_seconds=600, poll_seconds=5, exit_when_drained=False, job_fn=collect_job):
+    from Work_Queue import open_queue
+    worker_id = worker_id or default_worker_id()
+    queue = open_queue(queue_url, name=queue_name(airport), lease_seconds=lease_seconds)
+    completed = 0
+    while True:
+        job = queue.lease(worker_id)
+        if job is None:
+            if exit_when_drained and queue.drained():
+                break
+            time.sleep(poll_seconds)
+            continue
+
+        logger.info(f"{worker_id} leased {job['id']} (attempt {job['attempts']})")
+        stop = threading.Event()
+        beat = threading.Thread(target=heartbeat, args=(queue_url, airport, job, worker_id, lease_seconds / 3, stop), daemon=True)
+        beat.start()
+        try:
+            result = job_fn(job, airport)
+        except Exception as e:
+            logger.error(f"{worker_id} failed {job['id']}: {e}")
+            queue.fail(job, worker_id, e)
+            continue
+        finally:
+            stop.set()
+            beat.join()
+        if queue.complete(job, worker_id, result):
+            completed += 1
+        else:
+            logger.warning(f"{worker_id} finished {job['id']} after its lease expired; result dropped")
+    logger.info(f"{worker_id} done after {completed} jobs")
+    return completed
+
+
+def coordinate(queue_url, start_date, end_date, airport=DEFAULT_AIRPORT, lease_seconds=600, poll_seconds=10, formats=None,
+               max_combine_attempts=3):
+    from Pipeline import combine_day
+    from Pipeline_Metrics import PipelineMetrics
+    from Work_Queue import open_queue
+
+    start_time = time.time()
+    queue = open_queue(queue_url, name=queue_name(airport), lease_seconds=lease_seconds)
+    metrics = PipelineMetrics('coordinator', labels={'start_date': start_date, 'end_date': end_date, 'airport': airport})
+    directory = airport_directory(airport)
+    dates = pd.date_range(start_date, end_date).strftime('%Y-%m-%d').tolist()
+    metrics.incr('jobs_enqueued', queue.enqueue(dates, DIRECTIONS))
+
+    # A day whose combine fails keeps its results in the queue and is retried on later
+    # polls; after max_combine_attempts this run leaves it for the next coordinator run
+    combine_failures = {}
+    while True:
+        metrics.incr('jobs_requeued', queue.requeue_expired())
+        ready = [date for date in queue.ready_days() if combine_failures.get(date, 0) < max_combine_attempts]
+        for date in ready:
+            try:
+                combine_day(date, os.path.join(directory, date), metrics, frames=queue.results(date), formats=formats,
+                            airport=airport)
+            except Exception as e:
+                metrics.incr('combine_failures')
+                combine_failures[date] = combine_failures.get(date, 0) + 1
+                logger.error(f"Combining {date} failed (attempt {combine_failures[date]}): {e}")
+                continue
+            queue.mark_combined(date)
+        if not ready and queue.drained():
+            break
+        time.sleep(poll_seconds)
+
+    uncombined = sorted(date for date, failures in combine_failures.items() if failures >= max_combine_attempts)
+    if uncombined:
+        logger.error(f"Left uncombined, results kept in the queue for a rerun: {', '.join(uncombined)}")
+    metrics.incr('days_uncombined', len(uncombined))
+
+    counts = queue.counts()
+    metrics.incr('jobs_failed', counts.get('failed', 0))
+    metrics.finish()
+    print(metrics.report())
+    print(f"Queue: {counts}")
+    print("Process finished --- %s seconds ---" % (time.time() - start_time))
+    return counts
+
+
+# Wait for worker processes up to a shared deadline, then terminate the ones still
+# running and kill those that ignore it
+def stop_workers(processes, timeout=WORKER_EXIT_SECONDS, terminate_timeout=WORKER_TERMINATE_SECONDS):
+    deadline = time.monotonic() + timeout
+    running = []
+    for process in processes:
+        try:
+            process.wait(max(deadline - time.monotonic(), 0))
+        except subprocess.TimeoutExpired:
+            running.append(process)
+    for process in running:
+        logger.warning(f"Worker {process.pid} still running after {timeout:.0f}s; terminating it")
+        process.terminate()
+    for process in running:
+        try:
+            process.wait(terminate_timeout)
+        except subprocess.TimeoutExpired:
+            process.kill()
+            process.wait()
+
+
+# Coordinator plus several worker processes on this machine, sharing a SQLite queue
+def run_local(start_date, end_date, workers=2, queue_url=DEFAULT_QUEUE, airport=DEFAULT_AIRPORT, lease_seconds=600):
+    from Work_Queue import open_queue
+    # Enqueue before the workers start, or they would find the queue drained and exit
+    dates = pd.date_range(start_date, end_date).strftime('%Y-%m-%d').tolist()
+    open_queue(queue_url, name=queue_name(airport)).enqueue(dates, DIRECTIONS)
+    worker_processes = [
+        subprocess.Popen([sys.executable, os.path.abspath(__file__), 'work', '--queue', queue_url, '--airport', airport,
+                          '--lease-seconds', str(lease_seconds), '--exit-when-drained', '--worker-id', f"local-{i}"])
+        for i in range(workers)
+    ]
+    try:
+        return coordinate(queue_url, start_date, end_date, airport, lease_seconds, poll_seconds=2)
+    except BaseException:
+        # Nothing would combine what the workers collect now, so they are stopped right away
+        for process in worker_processes:
+            process.terminate()
+        raise
+    finally:
+        stop_workers(worker_processes)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Distributed flight collection through a shared work queue")
+    subparsers = parser.add_subparsers(dest='command', required=True)
+    coordinate_parser = subparsers.add_parser('coordinate', help="Enqueue a date range and combine finished days")
+    work_parser = subparsers.add_parser('work', help="Lease and run jobs until stopped")
+    local_parser = subparsers.add_parser('local', help="Coordinator and several workers on this machine")
+    for command_parser in (coordinate_parser, local_parser):
+        command_parser.add_argument('start_date')
+        command_parser.add_argument('end_date')
+    for command_parser in (coordinate_parser, work_parser, local_parser):
+        command_parser.add_argument('--queue', default=DEFAULT_QUEUE, help="sqlite:///<path> or redis://host:port/db")
+        command_parser.add_argument('--airport', default=DEFAULT_AIRPORT, choices=sorted(AIRPORTS), help="IATA code of the airport")
+        command_parser.add_argument('--lease-seconds', type=int, default=600)
+    coordinate_parser.add_argument('--formats', help="Comma-separated combined formats (default all)")
+    work_parser.add_argument('--worker-id')
+    work_parser.add_argument('--exit-when-drained', action='store_true')
+    local_parser.add_argument('--workers', type=int, default=2)
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    if args.command == 'coordinate':
+        coordinate(args.queue, args.start_date, args.end_date, args.airport, args.lease_seconds,
+                   formats=args.formats.split(',') if args.formats else None)
+    elif args.command == 'work':
+        # Exit through SystemExit on terminate, so the scraper's cleanup (quitting Chrome) runs
+        signal.signal(signal.SIGTERM, lambda signum, frame: sys.exit(128 + signum))
+        work(args.queue, args.airport, args.worker_id, args.lease_seconds, exit_when_drained=args.exit_when_drained)
+    else:
+        run_local(args.start_date, args.end_date, args.workers, args.queue, args.airport, args.lease_seconds)
@@ -0,0 +1,148 @@
+import json
+import logging
+import os
+import re
+from collections import Counter
+import pandas as pd
+
+# Aircraft-model normalisation and emission-factor (kg CO2 per km) resolution.
+# Factors live in the versioned emission_factors.json, next to the distance model tables
+# Emissions.py builds on them. Model strings arrive as a mix of ICAO type codes ('B738',
+# 'DH8D') and marketing names ('Boeing 737-823'), so lookups go:
+#   exact name -> normalised name -> ICAO alias -> aircraft series -> manufacturer family
+# Every resolved model string is memoized, so repeated models cost a single dict lookup.
+
+logger = logging.getLogger(__name__)
+
+factors_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'emission_factors.json')
+
+# Resolution kinds that mean the model has no factor of its own
+MISS_KINDS = ('series', 'family')
+
+
+def normalise_model(model):
+    return ' '.join(str(model).split()).lower()
+
+
+class EmissionFactorResolver:
+    def __init__(self, table):
+        self.version = table['version']
+        self.factors = table['factors']
+        self.families = table['families']
+        self.distance_model = table.get('distance_model')
+        self.normalised_factors = {normalise_model(k): v for k, v in self.factors.items()}
+        self.icao_aliases = {k.upper(): v for k, v in table.get('icao_aliases', {}).items()}
+        self.series_patterns = [(re.compile(pattern), template) for pattern, template in table.get('series_patterns', [])]
+        self.boeing_code = re.compile(r'B\d+')
+
+        # Average factor per aircraft series, built from the models we do know
+        series_values = {}
+        for model, factor in self.factors.items():
+            if model == 'Unknown':
+                continue
+            for key in self.series_keys(self.icao_aliases.get(model.upper(), model)):
+                series_values.setdefault(key, []).append(factor)
+        self.series_factors = {key: sum(values) / len(values) for key, values in series_values.items()}
+
+        self.cache = {}
+        self.stats = Counter()
+        self.missed_models = Counter()
+
+    # Series keys for a model, most specific first (e.g. 'boeing 737-800', 'boeing 737')
+    def series_keys(self, model):
+        name = normalise_model(model)
+        keys = []
+        for pattern, template in self.series_patterns:
+            match = pattern.search(name)
+            if match:
+                key = match.expand(template)
+                if key not in keys:
+                    keys.append(key)
+        return keys
+
+    def _resolve_uncached(self, model):
+        if model in self.factors:
+            return self.factors[model], 'exact'
+        normalised = normalise_model(model)
+        if normalised in self.normalised_factors:
+            return self.normalised_factors[normalised], 'normalised'
+        alias = self.icao_aliases.get(model.strip().upper())
+        if alias is not None and alias in self.factors:
+            return self.factors[alias], 'alias'
+        for key in self.series_keys(alias or model):
+            if key in self.series_factors:
+                return self.series_factors[key], 'series'
+        # Manufacturer family averages, as the scrapers have always done
+        if "Boeing" in model or self.boeing_code.match(model):
+            return self.families['Boeing'], 'family'
+        if "Airbus" in model:
+            return self.families['Airbus'], 'family'
+        return self.families['Other'], 'family'
+
+    # Memoized (kg CO2 per km, resolution kind) for a model string
+    def lookup(self, model):
+        resolved = self.cache.get(model)
+        if resolved is None:
+            if pd.isna(model) or not str(model).strip():
+                resolved = self.lookup('Unknown')
+            else:
+                resolved = self._resolve_uncached(str(model))
+            self.cache[model] = resolved
+        return resolved
+
+    # Same as lookup, but counted towards this run's miss-rate report
+    def resolve(self, model):
+        resolved = self.lookup(model)
+        self.stats[resolved[1]] += 1
+        if resolved[1] in MISS_KINDS:
+            self.missed_models[model] += 1
+        return resolved
+
+    def factor(self, model):
+        return self.resolve(model)[0]
+
+    # Factor per row for a whole column, resolving each distinct model once
+    def factors_for(self, models):
+        models = pd.Series(models)
+        codes, uniques = pd.factorize(models.astype(object).where(models.notna(), 'Unknown'))
+        values = [self.lookup(model) for model in uniques]
+        counts = pd.Series(codes).value_counts()
+        for code, count in counts.items():
+            kind = values[code][1]
+            self.stats[kind] += int(count)
+            if kind in MISS_KINDS:
+                self.missed_models[uniques[code]] += int(count)
+        return pd.Series([values[code][0] for code in codes], index=models.index, dtype='float64')
+
+    # Factor charged per distinct model, as recorded in each day's metadata (not counted in stats)
+    def factor_map(self, models):
+        return {str(model): self.lookup(model)[0] for model in pd.Series(models).dropna().unique()}
+
+    def reset_stats(self):
+        self.stats.clear()
+        self.missed_models.clear()
+
+    def report(self):
+        total = sum(self.stats.values())
+        if not total:
+            return f"Emission factors v{self.version}: no lookups"
+        misses = sum(self.stats[kind] for kind in MISS_KINDS)
+        breakdown = ', '.join(f"{kind} {count}" for kind, count in self.stats.most_common())
+        return (f"Emission factors v{self.version}: {total} lookups, miss rate {misses / total:.1%} "
+                f"({len(self.missed_models)} distinct models without a factor; {breakdown})")
+
+
+def load_resolver(path=factors_path):
+    with open(path, 'r', encoding='utf-8') as f:
+        return EmissionFactorResolver(json.load(f))
+
+
+_resolver = None
+
+
+# Shared resolver, loaded from the data file once per process
+def get_resolver():
+    global _resolver
+    if _resolver is None:
+        _resolver = load_resolver()
+    return _resolver
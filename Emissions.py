@@ -0,0 +1,205 @@
+import numpy as np
+import pandas as pd
+from Emission_Factors import get_resolver
+from Shared_Cache import SharedCache
+
+# Vectorized CO2 computation over a whole frame of flights.
+# Each airport and aircraft model is resolved once and the arithmetic runs as array ops.
+# Two models:
+#   flat      distance x the model's kg/km factor, as the scrapers originally computed it
+#   distance  a fixed LTO (landing and take-off cycle) term per aircraft class plus
+#             distance x factor x a cruise multiplier interpolated over distance bands
+#             (emission_factors.json 'distance_model'). The bands are expanded once into
+#             a dense table per class, so evaluating it is a few gathers per flight.
+# Stored days record the model they were computed with (EMISSION_MODEL_ID), so
+# Reprocess.py recomputes them when it changes.
+
+HOME_AIRPORT = 'ANC'
+EARTH_RADIUS_KM = 6371
+
+# Coordinates and route distances are cached across runs and airports (see Shared_Cache.py);
+# the distance cache name carries the formula version, so a formula change starts afresh
+DISTANCE_CACHE = 'route_distances_v1'
+
+EMISSION_MODELS = ('distance', 'flat')
+# The stored and synced history is flat, and the distance model moves totals by about
+# -4% against it, so new days stay flat until the switch ships together with
+# `Reprocess.py --force` over all days (and the Warm_Start and Daily_Aggregates rebuilds)
+EMISSION_MODEL = 'flat'
+# Bumped whenever stored emissions would come out differently (model, tables or distances)
+EMISSION_MODEL_VERSION = 1
+EMISSION_MODEL_ID = f"{EMISSION_MODEL}-v{EMISSION_MODEL_VERSION}"
+# Days written before the model was recorded were computed with the original flat model
+LEGACY_EMISSION_MODEL_ID = 'flat-v1'
+
+# Resolution of the precomputed multiplier tables
+TABLE_STEP_KM = 10
+
+_airports = None
+_coordinate_cache = None
+_distance_cache = None
+_distance_models = {}
+
+
+def get_airports():
+    global _airports
+    if _airports is None:
+        import airportsdata
+        _airports = airportsdata.load('IATA')
+    return _airports
+
+
+def get_coordinate_cache():
+    global _coordinate_cache
+    if _coordinate_cache is None:
+        _coordinate_cache = SharedCache('airport_coordinates')
+    return _coordinate_cache
+
+
+def get_distance_cache():
+    global _distance_cache
+    if _distance_cache is None:
+        _distance_cache = SharedCache(DISTANCE_CACHE)
+    return _distance_cache
+
+
+# Write new cache entries for the other processes and airports
+def flush_caches():
+    for cache in (_coordinate_cache, _distance_cache):
+        if cache is not None:
+            cache.flush()
+
+
+# 'Los Angeles (LAX / KLAX)' -> 'LAX'
+def extract_iata(locations):
+    return pd.Series(locations).astype(object).str.extract(r'\(([^/)]*?) /', expand=False)
+
+
+# (lat, lon) of one airport, or (nan, nan) when unknown; airportsdata is only loaded on a cache miss
+def coordinates_for(code):
+    cache = get_coordinate_cache()
+    if code not in cache:
+        airport = get_airports().get(code)
+        cache.set(code, [airport['lat'], airport['lon']] if airport else None)
+    coordinates = cache.get(code)
+    return tuple(coordinates) if coordinates else (np.nan, np.nan)
+
+
+def airport_coordinates(iata_codes):
+    codes, uniques = pd.factorize(pd.Series(iata_codes))
+    coordinates = [coordinates_for(code) for code in uniques] + [(np.nan, np.nan)]
+    lat = np.array([c[0] for c in coordinates])
+    lon = np.array([c[1] for c in coordinates])
+    # factorize marks missing codes with -1, which picks the trailing NaN
+    return lat[codes], lon[codes]
+
+
+# Same formula the scrapers have always used, including its longitude term, so that
+# recomputed history matches what was originally written. Correcting it changes every
+# stored distance, so it has to ship together with regenerating the history (Reprocess.py
+# over all days, then the Warm_Start and Daily_Aggregates artifacts).
+def haversine_km(lat1, lon1, lat2, lon2):
+    d_lat = np.radians(lat2 - lat1)
+    d_lon = np.radians(lat2 - lon1)
+    a = np.sin(d_lat / 2) ** 2 + np.cos(np.radians(lat1)) * np.cos(np.radians(lat2)) * np.sin(d_lon / 2) ** 2
+    return EARTH_RADIUS_KM * 2 * np.arctan2(np.sqrt(a), np.sqrt(1 - a))
+
+
+# Arrival rows carry an Origin, departure rows a Destination
+def flight_directions(df):
+    if 'Origin' not in df:
+        return pd.Series('departure', index=df.index)
+    return pd.Series(np.where(df['Origin'].notna(), 'arrival', 'departure'), index=df.index)
+
+
+# Distance of one route in km, NaN when either airport is unknown
+def route_distance(dep_iata, dest_iata):
+    cache = get_distance_cache()
+    key = f"{dep_iata}-{dest_iata}"
+    if key not in cache:
+        dep_lat, dep_lon = coordinates_for(dep_iata)
+        dest_lat, dest_lon = coordinates_for(dest_iata)
+        distance = float(haversine_km(dep_lat, dep_lon, dest_lat, dest_lon))
+        cache.set(key, None if np.isnan(distance) else distance)
+    distance = cache.get(key)
+    return np.nan if distance is None else distance
+
+
+def route_distances(df, flight_type=None, home_airport=HOME_AIRPORT):
+    directions = flight_directions(df) if flight_type is None else pd.Series(flight_type, index=df.index)
+    remote = pd.Series(pd.NA, index=df.index, dtype=object)
+    is_arrival = (directions == 'arrival').to_numpy()
+    if 'Origin' in df:
+        remote[is_arrival] = extract_iata(df['Origin'])[is_arrival]
+    if 'Destination' in df:
+        remote[~is_arrival] = extract_iata(df['Destination'])[~is_arrival]
+
+    # Each distinct route is resolved once
+    routes = pd.Series(np.where(is_arrival, remote + '>' + home_airport, home_airport + '>' + remote), index=df.index, dtype=object)
+    codes, uniques = pd.factorize(routes)
+    distances = np.array([route_distance(*route.split('>')) for route in uniques] + [np.nan])
+    return pd.Series(distances[codes], index=df.index)
+
+
+class DistanceModel:
+    def __init__(self, spec, step_km=TABLE_STEP_KM):
+        bands = np.asarray(spec['bands_km'], dtype='float64')
+        classes = spec['classes']
+        self.names = [c['name'] for c in classes]
+        # Upper factor bound of each class; the last one takes everything above
+        self.max_factors = np.array([c['max_factor'] if c['max_factor'] is not None else np.inf for c in classes])
+        self.lto_kg = np.array([c['lto_kg'] for c in classes], dtype='float64')
+        self.step_km = step_km
+        grid = np.arange(0, bands[-1] + step_km, step_km)
+        # One row per class: the cruise multiplier every step_km, flat beyond the last band.
+        # Kept flattened, so a flight's multipliers are two np.take calls away.
+        self.multipliers = np.vstack([np.interp(grid, bands, c['multipliers']) for c in classes])
+        self.flat_multipliers = self.multipliers.ravel()
+        self.row_length = len(grid)
+        self.last_index = len(grid) - 1
+
+    def classes_for(self, factors):
+        return np.searchsorted(self.max_factors, np.asarray(factors, dtype='float64'))
+
+    # kg CO2 per flight as floats, NaN where the distance is unknown
+    def emissions(self, distances, factors):
+        distances = np.asarray(distances, dtype='float64')
+        factors = np.asarray(factors, dtype='float64')
+        classes = self.classes_for(factors)
+        position = np.clip(np.nan_to_num(distances) / self.step_km, 0, self.last_index)
+        lower = np.minimum(position.astype(np.intp), self.last_index - 1)
+        cells = classes * self.row_length + lower
+        below = self.flat_multipliers.take(cells)
+        multiplier = below + (self.flat_multipliers.take(cells + 1) - below) * (position - lower)
+        # A zero factor (no aircraft to charge) gets no LTO term either
+        lto = self.lto_kg.take(classes) * (factors > 0)
+        return lto + distances * factors * multiplier
+
+
+# Distance model of a factor table, built once per table version
+def get_distance_model(resolver=None):
+    resolver = resolver or get_resolver()
+    model = _distance_models.get(resolver.version)
+    if model is None:
+        if not resolver.distance_model:
+            raise ValueError(f"Emission factors v{resolver.version} have no distance model")
+        model = _distance_models[resolver.version] = DistanceModel(resolver.distance_model)
+    return model
+
+
+# kg CO2 per flight from distances and factors under one of EMISSION_MODELS
+def model_emissions(distances, factors, model=EMISSION_MODEL, resolver=None):
+    if model == 'flat':
+        return np.asarray(distances, dtype='float64') * np.asarray(factors, dtype='float64')
+    if model == 'distance':
+        return get_distance_model(resolver).emissions(distances, factors)
+    raise ValueError(f"Unknown emission model: {model}")
+
+
+# CO2 per flight in kg (nullable integers; NA where the route could not be resolved)
+def compute_emissions(df, flight_type=None, resolver=None, home_airport=HOME_AIRPORT, model=EMISSION_MODEL):
+    resolver = resolver or get_resolver()
+    distances = route_distances(df, flight_type, home_airport)
+    factors = resolver.factors_for(df['Aircraft Info'])
+    emissions = model_emissions(distances.to_numpy(), factors.to_numpy(), model, resolver)
+    return pd.Series(np.round(emissions), index=df.index).astype('Int64')
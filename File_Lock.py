@@ -0,0 +1,35 @@
+import os
+import time
+from contextlib import contextmanager
+
+# Cross-process lock based on an exclusively created lock file.
+# Works the same on Windows and Linux, which is where the collectors run.
+
+
+@contextmanager
+def file_lock(lock_path, timeout=30, stale_after=120, poll_interval=0.05):
+    deadline = time.time() + timeout
+    while True:
+        try:
+            fd = os.open(lock_path, os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+            os.write(fd, str(os.getpid()).encode())
+            os.close(fd)
+            break
+        except FileExistsError:
+            # Break locks left behind by a process that died while holding them
+            try:
+                if time.time() - os.path.getmtime(lock_path) > stale_after:
+                    os.remove(lock_path)
+                    continue
+            except FileNotFoundError:
+                continue
+            if time.time() > deadline:
+                raise TimeoutError(f"Could not acquire lock {lock_path} within {timeout} seconds")
+            time.sleep(poll_interval)
+    try:
+        yield
+    finally:
+        try:
+            os.remove(lock_path)
+        except FileNotFoundError:
+            pass
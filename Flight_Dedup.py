@@ -0,0 +1,124 @@
+import hashlib
+import pandas as pd
+from Airports import DEFAULT_AIRPORT
+
+# Stable flight identity and codeshare collapsing for one day's scrape.
+# A flight is identified by (airport, direction, primary flight number, scheduled local
+# time); its key is a 64-bit hash of those, so status text that changes between two
+# scrapes does not make it a different flight. The board windows at either end of a day
+# also list flights of the neighbouring days; those are dropped here, before enrichment,
+# since compute keeps only the day's own flights anyway (filter_by_date) and each day's
+# own scrape collects them. Within the day, overlapping windows repeat flights and the
+# last sighting (freshest status) is kept.
+
+# 'DD Mon HH:MM TZ' of each row with the year of the scrape date, moved to the previous or
+# next year where the board crosses New Year. Missing where the time cannot be read.
+def scheduled_local_times(date_status, date):
+    scrape_date = pd.Timestamp(date)
+    parts = date_status.astype(str).str.split()
+    parsed = pd.to_datetime(str(scrape_date.year) + ' ' + parts.str[:3].str.join(' '), format='%Y %d %b %H:%M', errors='coerce')
+    month_gap = parsed.dt.month - scrape_date.month
+    parsed = parsed.where(month_gap < 6, parsed - pd.DateOffset(years=1))
+    parsed = parsed.where(month_gap > -6, parsed + pd.DateOffset(years=1))
+    local_times = parsed.dt.strftime('%Y-%m-%d %H:%M') + ' ' + parts.str[3].fillna('')
+    return local_times.where(parsed.notna())
+
+
+def key_hash(text):
+    return int.from_bytes(hashlib.blake2b(text.encode(), digest_size=8).digest(), 'big', signed=True)
+
+
+# Keys (None where the scheduled time is unreadable) and scheduled days of a scraped frame
+def flight_identity(df, date, flight_type, airport=DEFAULT_AIRPORT):
+    local_times = scheduled_local_times(df['Date & Status'], date)
+    keys = [key_hash(f"{airport}|{flight_type}|{number}|{local_time}") if pd.notna(local_time) else None
+            for number, local_time in zip(df['Primary Flight Number'], local_times)]
+    days = local_times.str[:10]
+    return pd.Series(keys, index=df.index, dtype=object), days
+
+
+# Drop flights scheduled on another day and repeated sightings from one day's scrape
+def deduplicate(df, date, flight_type, metrics, airport=DEFAULT_AIRPORT):
+    if df.empty:
+        return df
+    keys, days = flight_identity(df, date, flight_type, airport)
+
+    # Rows whose time cannot be read are kept, as filter_by_date only looks at the date
+    other_day = days.notna() & (days != date)
+    # Overlapping windows: keep the last sighting of each key
+    repeated = keys.notna() & ~other_day & keys.duplicated(keep='last')
+
+    metrics.incr('other_day_rows', int(other_day.sum()))
+    metrics.incr('duplicates_within_day', int(repeated.sum()))
+    return df[~(other_day | repeated)]
+
+
+# Codeshares: one physical flight is listed once per marketing flight number. Rows share
+# a slot when they have the same scheduled time and the same origin or destination.
+# Rows with an operating callsign of their own ('Flight Number' differs from the primary
+# number) are physical flights. A row without one is linked to an operated flight of its
+# slot when that flight is clearly the same one: the same number, the row's number as
+# its callsign (CAO1017 listed under Air China's CA1017, operated as CAO1017), or the
+# same airline. Other pairings, a flight sold by another carrier or same-airline rows in
+# a slot without any operated flight, are only linked once both aircraft are known and
+# equal; an Unknown aircraft never proves anything. Known aircraft that differ keep
+# every pairing apart.
+# Runs twice: before the aircraft lookup with the models already cached (so clear
+# codeshares cost no lookup of their own), and after it with 'Aircraft Info', which
+# settles the remaining pairings. Linked rows are dropped and their numbers listed in
+# the operating row's 'Codeshares', so the emissions are charged once per physical flight.
+def collapse_codeshares(df, metrics, aircraft=None):
+    location = 'Origin' if 'Origin' in df else 'Destination'
+    if df.empty or 'Flight Number' not in df:
+        return df
+    numbers = df['Primary Flight Number'].astype(str)
+    callsigns = df['Flight Number'].fillna('').astype(str).str.strip()
+    operated = ~callsigns.isin(['', 'Unknown']) & (callsigns != numbers)
+    if 'Aircraft Info' in df:
+        models = df['Aircraft Info'].fillna('Unknown').astype(str)
+    else:
+        models = numbers.map(aircraft or {}).fillna('Unknown').astype(str)
+    airlines = df['Airline'].astype(str)
+    slots = df['Date & Status'].astype(str).str.split().str[:4].str.join(' ') + '|' + df[location].astype(str)
+    shared = slots.duplicated(keep=False) & (df[location].astype(str) != 'Unknown') & (df['Date & Status'].astype(str) != 'Unknown')
+
+    def known(row):
+        return models[row] != 'Unknown'
+
+    def proven_same(row, other):
+        return known(row) and known(other) and models[row] == models[other]
+
+    def proven_different(row, other):
+        return known(row) and known(other) and models[row] != models[other]
+
+    def clearly_linked(row, other):
+        return numbers[row] == numbers[other] or callsigns[other] == numbers[row] or airlines[row] == airlines[other]
+
+    codeshare_of = {}
+    for _, slot in df[shared].groupby(slots[shared], sort=False):
+        operating = slot.index[operated[slot.index]]
+        if operating.empty:
+            first_of_number = {}
+            for row in slot.index:
+                first = first_of_number.setdefault(numbers[row], row)
+                if first != row:
+                    codeshare_of[row] = first
+            for _, same_airline in slot.drop(index=list(codeshare_of), errors='ignore').groupby('Airline', sort=False):
+                first = same_airline.index[0]
+                codeshare_of.update({row: first for row in same_airline.index[1:] if proven_same(row, first)})
+            continue
+        for row in slot.index[~operated[slot.index]]:
+            candidates = [op for op in operating if clearly_linked(row, op) and not proven_different(row, op)]
+            if not candidates:
+                candidates = [op for op in operating if proven_same(row, op)]
+            if len(candidates) == 1:
+                codeshare_of[row] = candidates[0]
+
+    df = df.copy()
+    earlier = df['Codeshares'] if 'Codeshares' in df else pd.Series(pd.NA, index=df.index, dtype=object)
+    linked = {row: [earlier[row]] for row in df.index if pd.notna(earlier[row])}
+    for row, operating_row in codeshare_of.items():
+        linked.setdefault(operating_row, []).extend([numbers[row]] + linked.pop(row, []))
+    df['Codeshares'] = pd.Series({row: ', '.join(marketing) for row, marketing in linked.items()}, dtype=object).reindex(df.index)
+    metrics.incr('codeshares_collapsed', len(codeshare_of))
+    return df.drop(index=list(codeshare_of))
@@ -0,0 +1,199 @@
+import argparse
+import os
+import time
+import pandas as pd
+from tornado.ioloop import IOLoop
+from tornado.iostream import StreamClosedError
+from tornado.web import HTTPError, RequestHandler
+from Aggregates import calculate_saf_reduction
+from Airports import AIRPORTS, DEFAULT_AIRPORT, airport_directory, airport_timezone
+from Data_Sync import sync_missing
+from Flight_Schema import CATEGORY_COLUMNS, EMISSION_COLUMN, TIME_COLUMN, apply_schema
+from Flight_Store import iter_days
+
+# Streaming export of a date range to CSV or Parquet.
+# Days are read, converted and written one partition at a time, so memory stays at about
+# one day whatever the range. Parquet files always carry the same schema (export_schema),
+# so a range without stored days still gives a valid file with no rows. The same byte
+# stream is written to a file (dashboard export button, CLI) or sent as a chunked HTTP
+# download from /api/export; both fetch missing days of the default airport first:
+#     panel serve Panel.py --plugins Flight_Export
+#     GET /api/export?start=2023-01-01&end=2023-12-31&format=parquet&saf=20&airport=ANC
+#   python Flight_Export.py 2023-01-01 2023-12-31 exports/2023.parquet
+
+EXPORT_FORMATS = {'csv': 'text/csv; charset=utf-8', 'parquet': 'application/vnd.apache.parquet'}
+
+# Columns of an exported flight, in order; days written before a column existed get nulls
+EXPORT_COLUMNS = ['Date & Status', 'Scheduled Time', 'Primary Flight Number', 'Flight Number', 'Airline', 'Origin',
+                  'Destination', 'Status', 'Aircraft Info', 'CO2 Emission (kg)', 'Codeshares']
+
+# Added by calculate_saf_reduction when an export includes the SAF reduction
+SAF_COLUMNS = ['Reduced CO2 Emission (metric tons)', 'CO2 Emission (metric tons)']
+
+# Where the dashboard writes exports on the server; only a file name is taken from the user
+exports_directory = 'exports'
+
+
+# Arrow types of an export's columns, whatever days it holds
+def export_schema(saf_percentage=None, airport=DEFAULT_AIRPORT):
+    import pyarrow as pa
+    types = {column: pa.string() for column in EXPORT_COLUMNS}
+    types[TIME_COLUMN] = pa.timestamp('us', tz=airport_timezone(airport))
+    # calculate_saf_reduction turns the kg column into floats
+    types[EMISSION_COLUMN] = pa.int64() if saf_percentage is None else pa.float64()
+    if saf_percentage is not None:
+        types.update({column: pa.float64() for column in SAF_COLUMNS})
+    return pa.schema(list(types.items()))
+
+
+# Export-ready frames, one per stored day of the range
+def export_frames(date_range_list, directory=None, saf_percentage=None, airport=DEFAULT_AIRPORT):
+    for date, df in iter_days(date_range_list, directory=directory):
+        df = apply_schema(df, date, airport).reindex(columns=EXPORT_COLUMNS)
+        # Categories differ from day to day; plain strings keep one schema for the whole file
+        for column in CATEGORY_COLUMNS + ['Codeshares']:
+            df[column] = df[column].astype('string')
+        if saf_percentage is not None:
+            df = calculate_saf_reduction(df, saf_percentage)
+        yield date, df
+
+
+# File-like sink for the Parquet writer whose contents are handed out after each row group
+class _ChunkSink:
+    def __init__(self):
+        self.chunks = []
+        self.position = 0
+        self.closed = False
+
+    def write(self, data):
+        self.chunks.append(bytes(data))
+        self.position += len(data)
+        return len(data)
+
+    def tell(self):
+        return self.position
+
+    def flush(self):
+        pass
+
+    def close(self):
+        self.closed = True
+
+    def drain(self):
+        data = b''.join(self.chunks)
+        self.chunks = []
+        return data
+
+
+# The export as a sequence of byte chunks, one per day (plus the Parquet footer).
+# on_progress(days_done, days_total) is called after each day of the range.
+def iter_export_bytes(date_range_list, fmt='csv', directory=None, saf_percentage=None, on_progress=None, airport=DEFAULT_AIRPORT):
+    if fmt not in EXPORT_FORMATS:
+        raise ValueError(f"Unsupported export format: {fmt}")
+    positions = {date: i for i, date in enumerate(date_range_list)}
+    schema = export_schema(saf_percentage, airport)
+    writer = sink = None
+    header = True
+    if fmt == 'parquet':
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+        sink = _ChunkSink()
+        writer = pq.ParquetWriter(sink, schema)
+    for date, df in export_frames(date_range_list, directory, saf_percentage, airport):
+        if fmt == 'csv':
+            yield df.to_csv(index=False, header=header).encode('utf-8')
+            header = False
+        else:
+            writer.write_table(pa.Table.from_pandas(df, schema=schema, preserve_index=False))
+            yield sink.drain()
+        if on_progress is not None:
+            on_progress(positions[date] + 1, len(date_range_list))
+    if writer is not None:
+        writer.close()  # Without any day this still writes the schema, as a file with no rows
+        yield sink.drain()
+    elif header:
+        yield (','.join(schema.names) + '\n').encode('utf-8')  # Nothing stored in the range
+    if on_progress is not None:
+        on_progress(len(date_range_list), len(date_range_list))
+
+
+# Write an export to a file, atomically; the format follows the extension unless given
+def export_to_file(date_range_list, path, fmt=None, directory=None, saf_percentage=None, on_progress=None, airport=DEFAULT_AIRPORT):
+    fmt = fmt or os.path.splitext(path)[1].lstrip('.').lower()
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    temp_path = f"{path}.{os.getpid()}.tmp"
+    try:
+        with open(temp_path, 'wb') as f:
+            for chunk in iter_export_bytes(date_range_list, fmt, directory, saf_percentage, on_progress, airport):
+                f.write(chunk)
+    except BaseException:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+        raise
+    os.replace(temp_path, path)
+    return path
+
+
+# A user-supplied file name placed under exports/; directories in it are dropped
+def export_path(file_name, fmt):
+    name = os.path.basename(file_name.strip()) or 'flights'
+    if not name.lower().endswith(f".{fmt}"):
+        name = f"{name}.{fmt}"
+    return os.path.join(exports_directory, name)
+
+
+class ExportHandler(RequestHandler):
+    async def get(self):
+        airport = self.get_argument('airport', DEFAULT_AIRPORT).upper()
+        fmt = self.get_argument('format', 'csv')
+        if airport not in AIRPORTS or fmt not in EXPORT_FORMATS:
+            raise HTTPError(400, reason="Unknown airport or format")
+        try:
+            date_range_list = pd.date_range(self.get_argument('start'), self.get_argument('end')).strftime("%Y-%m-%d").tolist()
+            saf = self.get_argument('saf', None)
+            saf_percentage = int(saf) if saf is not None else None
+        except ValueError as e:
+            raise HTTPError(400, reason=str(e))
+
+        self.set_header('Content-Type', EXPORT_FORMATS[fmt])
+        self.set_header('Content-Disposition', f'attachment; filename="co2_flights_{airport}_{date_range_list[0]}_{date_range_list[-1]}.{fmt}"'
+                        if date_range_list else f'attachment; filename="co2_flights_{airport}.{fmt}"')
+        loop = IOLoop.current()
+        directory = airport_directory(airport)
+        # As the dashboard export does; only the default airport is published upstream
+        if airport == DEFAULT_AIRPORT:
+            await loop.run_in_executor(None, lambda: sync_missing(date_range_list, directory=directory))
+        chunks = iter_export_bytes(date_range_list, fmt, directory, saf_percentage, airport=airport)
+        while True:
+            # Reading and converting a day blocks, so it runs off the event loop
+            chunk = await loop.run_in_executor(None, next, chunks, None)
+            if chunk is None:
+                break
+            self.write(chunk)
+            try:
+                await self.flush()
+            except StreamClosedError:
+                chunks.close()  # Client went away
+                return
+
+
+# Picked up by `panel serve --plugins Flight_Export`
+ROUTES = [(r"/api/export", ExportHandler, {})]
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Export a date range of flights to CSV or Parquet, one day at a time")
+    parser.add_argument('start_date')
+    parser.add_argument('end_date')
+    parser.add_argument('output', help="Output file (.csv or .parquet)")
+    parser.add_argument('--airport', default=DEFAULT_AIRPORT, choices=sorted(AIRPORTS), help="IATA code of the airport")
+    parser.add_argument('--saf', type=int, help="Add SAF reduction columns for this percentage")
+    args = parser.parse_args()
+
+    start_time = time.time()
+    date_range_list = pd.date_range(args.start_date, args.end_date).strftime("%Y-%m-%d").tolist()
+    directory = airport_directory(args.airport)
+    if args.airport == DEFAULT_AIRPORT:
+        sync_missing(date_range_list, directory=directory)
+    export_to_file(date_range_list, args.output, directory=directory, saf_percentage=args.saf, airport=args.airport)
+    print(f"Exported to {args.output} --- {time.time() - start_time:.1f} seconds ---")
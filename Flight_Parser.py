@@ -0,0 +1,249 @@
+import argparse
+import bisect
+import glob
+import gzip
+import logging
+import os
+import time
+
+# Row extraction from a flightera board page, with interchangeable parser backends.
+# Every backend returns the rows the original BeautifulSoup loop in Scraper.py produced,
+# [date & status, primary flight number, flight number, airline, location, status],
+# including its quirks: the operating flight number is the first 'text-gray-700' span
+# anywhere after the flight number link (so it can come from a later row), and a row
+# without a flight number link fails the whole page.
+#   lxml        libxml2 parser and precompiled XPath; the default when installed
+#   selectolax  Modest parser and CSS selectors (selectolax < 1.0, which removed Modest)
+#   bs4         the original loop on html.parser, the reference the others are checked against
+# FLIGHT_PARSER=<backend> picks another default; when that backend is not installed the
+# fastest installed one is used instead, with a warning. Selected backends are imported lazily.
+#
+# With SCRAPE_PAGES_DIRECTORY=pages the scraper keeps every board page it parses, as
+# pages/<IATA>/<date>_<direction>_<interval>.html.gz, for checking and benchmarking the backends.
+#
+#   python Flight_Parser.py pages/ANC/2023-06-01_arrival_08_00.html.gz --backend selectolax
+
+BACKENDS = ('lxml', 'selectolax', 'bs4')
+
+TABLE_CLASS = 'min-w-full divide-y divide-gray-200 table-auto'
+STATUS_CLASS = 'inline-flex items-center'
+
+logger = logging.getLogger(__name__)
+
+# Written by the scraper when SCRAPE_PAGES_DIRECTORY is set; the parse benchmark reads them
+PAGE_PATTERNS = ('*.html', '*.html.gz')
+
+_xpaths = None
+
+
+def _has_class(name):
+    return f"contains(concat(' ', normalize-space(@class), ' '), ' {name} ')"
+
+
+def _compiled_xpaths():
+    global _xpaths
+    if _xpaths is None:
+        from lxml import etree
+        _xpaths = {
+            'table': etree.XPath(f"(//table[@class = '{TABLE_CLASS}'])[1]"),
+            'tbody': etree.XPath("(.//tbody)[1]"),
+            'rows': etree.XPath(".//tr"),
+            'cells': etree.XPath(".//td"),
+            'date_status': etree.XPath(f"(.//span[{_has_class('whitespace-nowrap')}])[1]"),
+            'status': etree.XPath(f"(.//span[contains(normalize-space(@class), '{STATUS_CLASS}')])[1]"),
+            'link': etree.XPath("(.//a)[1]"),
+            # find_next: the first match inside the link or anywhere after it, in document order
+            'callsign': etree.XPath(f"(descendant::span[{_has_class('text-gray-700')}] | following::span[{_has_class('text-gray-700')}])[1]"),
+        }
+    return _xpaths
+
+
+def _first(results):
+    return results[0] if results else None
+
+
+def _text(element, default="Unknown"):
+    return element.text_content().strip() if element is not None else default
+
+
+def parse_lxml(page_source):
+    import lxml.html
+    xpaths = _compiled_xpaths()
+    # Bytes with an explicit encoding, so a declaration in the page cannot trip the parser
+    parser = lxml.html.HTMLParser(encoding='utf-8')
+    document = lxml.html.document_fromstring(page_source.encode('utf-8'), parser=parser)
+    table = _first(xpaths['table'](document))
+    if table is None:
+        return []
+    tbody = _first(xpaths['tbody'](table))
+    if tbody is None:
+        raise ValueError("Flight table without a body")
+
+    flights = []
+    for row in xpaths['rows'](tbody):
+        cols = xpaths['cells'](row)
+        if len(cols) < 4:
+            continue
+        date_status_element = _first(xpaths['date_status'](cols[0]))
+        status_element = _first(xpaths['status'](cols[0]))
+        flight_number_element = _first(xpaths['link'](cols[1]))
+        if flight_number_element is None:
+            raise ValueError("Flight row without a flight number link")
+        second_flight_number_element = _first(xpaths['callsign'](flight_number_element))
+        location_element = _first(xpaths['link'](cols[2]))
+        airline_element = _first(xpaths['date_status'](cols[1]))
+
+        primary_flight_number = _text(flight_number_element)
+        flights.append([_text(date_status_element), primary_flight_number, _text(second_flight_number_element, primary_flight_number),
+                        _text(airline_element), _text(location_element), _text(status_element)])
+    return flights
+
+
+def parse_selectolax(page_source):
+    from selectolax.parser import HTMLParser
+    tree = HTMLParser(page_source)
+    table = tree.css_first(f'table[class="{TABLE_CLASS}"]')
+    if table is None:
+        return []
+    tbody = table.css_first('tbody')
+    if tbody is None:
+        raise ValueError("Flight table without a body")
+
+    # Document position of every element, so find_next becomes a bisect over the
+    # positions of the candidate spans
+    positions = {node.mem_id: i for i, node in enumerate(tree.root.traverse())}
+    callsign_spans = sorted((positions[span.mem_id], span) for span in tree.root.css('span.text-gray-700'))
+    callsign_positions = [position for position, _ in callsign_spans]
+
+    def text(node, default="Unknown"):
+        return node.text(deep=True).strip() if node is not None else default
+
+    flights = []
+    for row in tbody.css('tr'):
+        cols = row.css('td')
+        if len(cols) < 4:
+            continue
+        flight_number_element = cols[1].css_first('a')
+        if flight_number_element is None:
+            raise ValueError("Flight row without a flight number link")
+        following = bisect.bisect_right(callsign_positions, positions[flight_number_element.mem_id])
+        second_flight_number_element = callsign_spans[following][1] if following < len(callsign_spans) else None
+
+        primary_flight_number = text(flight_number_element)
+        flights.append([text(cols[0].css_first('span.whitespace-nowrap')), primary_flight_number,
+                        text(second_flight_number_element, primary_flight_number), text(cols[1].css_first('span.whitespace-nowrap')),
+                        text(cols[2].css_first('a')), text(cols[0].css_first(f'span[class*="{STATUS_CLASS}"]'))])
+    return flights
+
+
+def parse_bs4(page_source):
+    from bs4 import BeautifulSoup
+    soup = BeautifulSoup(page_source, 'html.parser')
+    table = soup.find('table', {'class': TABLE_CLASS})
+
+    flights = []
+    if table:
+        rows = table.find('tbody').find_all('tr')
+        for row in rows:
+            cols = row.find_all('td')
+            if len(cols) >= 4:  # Ensure there are enough columns
+                # Extract relevant elements
+                date_status_element = cols[0].find('span', {'class': 'whitespace-nowrap'})
+                status_element = cols[0].find('span', class_=lambda x: x and STATUS_CLASS in x)
+                flight_number_element = cols[1].find('a')
+                second_flight_number_element = flight_number_element.find_next('span', {'class': 'text-gray-700'})
+                location_element = cols[2].find('a')
+                airline_element = cols[1].find('span', {'class': 'whitespace-nowrap'})
+
+                # Extract text from elements
+                date_status = date_status_element.text.strip() if date_status_element else "Unknown"
+                primary_flight_number = flight_number_element.text.strip() if flight_number_element else "Unknown"
+                flight_number = second_flight_number_element.text.strip() if second_flight_number_element else primary_flight_number
+                location = location_element.text.strip() if location_element else "Unknown"
+                airline = airline_element.text.strip() if airline_element else "Unknown"
+                status = status_element.text.strip() if status_element else "Unknown"
+
+                flights.append([date_status, primary_flight_number, flight_number, airline, location, status])
+    return flights
+
+
+PARSERS = {'lxml': parse_lxml, 'selectolax': parse_selectolax, 'bs4': parse_bs4}
+BACKEND_MODULES = {'lxml': 'lxml.html', 'selectolax': 'selectolax.parser', 'bs4': 'bs4'}
+
+
+# Imported rather than looked up: selectolax 1.0 still ships selectolax.parser, but it
+# only raises ImportError now that the Modest engine is gone
+def backend_available(backend):
+    import importlib
+    try:
+        importlib.import_module(BACKEND_MODULES[backend])
+    except ImportError:
+        return False
+    return True
+
+
+def available_backends():
+    return [backend for backend in BACKENDS if backend_available(backend)]
+
+
+_default_backend = None
+
+
+# FLIGHT_PARSER if set and installed, otherwise the fastest backend that is installed
+def default_backend():
+    global _default_backend
+    if _default_backend is None:
+        requested = os.environ.get('FLIGHT_PARSER')
+        if requested and requested not in PARSERS:
+            raise ValueError(f"FLIGHT_PARSER must be one of {', '.join(BACKENDS)}, not {requested!r}")
+        if requested and backend_available(requested):
+            _default_backend = requested
+        else:
+            _default_backend = next(backend for backend in BACKENDS if backend_available(backend))
+            if requested:
+                logger.warning(f"FLIGHT_PARSER={requested} is not installed, parsing with {_default_backend}")
+    return _default_backend
+
+
+# Flight rows of one board page
+def parse_rows(page_source, backend=None):
+    return PARSERS[backend or default_backend()](page_source)
+
+
+def page_files(directory):
+    paths = []
+    for pattern in PAGE_PATTERNS:
+        paths.extend(glob.glob(os.path.join(directory, '**', pattern), recursive=True))
+    return sorted(paths)
+
+
+def read_page(path):
+    opener = gzip.open if path.endswith('.gz') else open
+    with opener(path, 'rt', encoding='utf-8') as f:
+        return f.read()
+
+
+# Keep a page source for the parse benchmark and for checking backends on real pages
+def save_page(directory, name, page_source):
+    os.makedirs(directory, exist_ok=True)
+    path = os.path.join(directory, f"{name}.html.gz")
+    temp_path = f"{path}.{os.getpid()}.tmp"
+    with gzip.open(temp_path, 'wt', encoding='utf-8') as f:
+        f.write(page_source)
+    os.replace(temp_path, path)
+    return path
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Extract the flight rows of saved flightera pages")
+    parser.add_argument('pages', nargs='+', help="Page files (.html or .html.gz) or directories of them")
+    parser.add_argument('--backend', choices=BACKENDS, help="Parser backend (default: FLIGHT_PARSER or the fastest installed)")
+    args = parser.parse_args()
+
+    for target in args.pages:
+        for path in page_files(target) if os.path.isdir(target) else [target]:
+            start_time = time.perf_counter()
+            rows = parse_rows(read_page(path), args.backend)
+            print(f"{path}: {len(rows)} rows --- {time.perf_counter() - start_time:.3f} seconds ---")
+            for row in rows:
+                print('  ' + ' | '.join(row))
@@ -0,0 +1,70 @@
+import functools
+from datetime import datetime, timedelta
+from zoneinfo import ZoneInfo
+import numpy as np
+import pandas as pd
+from Airports import DEFAULT_AIRPORT, airport_timezone
+
+# Canonical in-memory schema for flight records.
+# Low-cardinality text columns are categoricals, emissions are nullable integers and
+# the scheduled time is parsed once from 'Date & Status' at write time, so readers
+# never have to re-parse or coerce on every load. Board times are the airport's local
+# time (Airports.py 'timezone').
+
+CATEGORY_COLUMNS = ['Airline', 'Origin', 'Destination', 'Aircraft Info', 'Status']
+EMISSION_COLUMN = 'CO2 Emission (kg)'
+TIME_COLUMN = 'Scheduled Time'
+AIRPORT_TIMEZONE = airport_timezone(DEFAULT_AIRPORT)
+
+
+# Abbreviations the zone uses while on summer time ('AKDT', 'PDT', 'CEST', ...)
+@functools.lru_cache(maxsize=None)
+def dst_abbreviations(timezone):
+    zone = ZoneInfo(timezone)
+    start = datetime(2023, 1, 1, 12, tzinfo=zone)
+    return frozenset(day.tzname() for day in (start + timedelta(days=offset) for offset in range(365)) if day.dst())
+
+
+# Parse '01 Jun 00:06\nAKDT' into a timezone-aware timestamp for the given partition year
+def parse_scheduled_time(date_status, year, timezone=AIRPORT_TIMEZONE):
+    parts = date_status.astype(str).str.split()
+    local_time = pd.to_datetime(
+        str(year) + ' ' + parts.str[:3].str.join(' '),
+        format='%Y %d %b %H:%M',
+        errors='coerce'
+    )
+    # The zone suffix (AKST/AKDT, ...) resolves the repeated hour when clocks fall back
+    is_dst = parts.str[3].isin(dst_abbreviations(timezone)).to_numpy(dtype=bool)
+    scheduled = local_time.dt.tz_localize(timezone, ambiguous=is_dst, nonexistent='NaT')
+    # Times in the hour skipped when clocks spring forward move to its end. pandas'
+    # shift_forward lands an hour late in the Alaska zones, so the gap (a whole hour on
+    # the hour for every airport here) is skipped by hand.
+    gap = scheduled.isna() & local_time.notna()
+    if gap.any():
+        scheduled[gap] = (local_time[gap].dt.floor('h') + pd.Timedelta(hours=1)).dt.tz_localize(timezone)
+    return scheduled
+
+
+# Coerce a frame to the canonical schema; cheap when the frame is already typed
+def apply_schema(df, date, airport=DEFAULT_AIRPORT):
+    timezone = airport_timezone(airport)
+    df = df.copy()
+    if EMISSION_COLUMN in df and not pd.api.types.is_integer_dtype(df[EMISSION_COLUMN].dtype):
+        df[EMISSION_COLUMN] = np.round(pd.to_numeric(df[EMISSION_COLUMN], errors='coerce')).astype('Int64')
+    for column in CATEGORY_COLUMNS:
+        if column in df and not isinstance(df[column].dtype, pd.CategoricalDtype):
+            df[column] = df[column].astype('category')
+    if 'Date & Status' in df and TIME_COLUMN not in df:
+        df[TIME_COLUMN] = parse_scheduled_time(df['Date & Status'], pd.Timestamp(date).year, timezone)
+    elif TIME_COLUMN in df and not pd.api.types.is_datetime64_any_dtype(df[TIME_COLUMN].dtype):
+        # Round-tripped through CSV as text
+        df[TIME_COLUMN] = pd.to_datetime(df[TIME_COLUMN], utc=True).dt.tz_convert(timezone)
+    return df
+
+
+# Emissions as floats, without re-parsing when the column is already typed
+def emissions_kg(df):
+    column = df[EMISSION_COLUMN]
+    if not pd.api.types.is_numeric_dtype(column.dtype):
+        column = pd.to_numeric(column, errors='coerce')
+    return column.astype('float64')
@@ -0,0 +1,259 @@
+import argparse
+import logging
+import os
+import threading
+import time
+import duckdb
+import pandas as pd
+from Airports import AIRPORTS, DEFAULT_AIRPORT, airport_directory
+from Flight_Store import day_file, write_day
+
+# SQL over the whole flight history with an embedded DuckDB.
+# The stored day files are exposed as views, so queries scan them in parallel and only
+# read the columns they use; nothing is loaded into pandas first. Days with a Parquet
+# copy are read from it, older days from their combined CSV (Flight_Store.py to-parquet
+# makes those faster). DuckDB cannot read pickles, so days stored only as a pickle
+# (write_day with formats=('pkl',), Data_Sync downloads) get their Parquet copy when the
+# views are built; a day whose pickle cannot be converted is left out and logged.
+#
+#   flights   one row per flight: date, direction, flight_number, callsign, airline,
+#             origin, destination, origin_iata, destination_iata, remote_iata (the
+#             airport at the other end), status, aircraft, co2_kg, codeshares (marketing
+#             numbers collapsed into this flight; NULL for days collected before that)
+#   airports  iata, icao, name, city, country, region ('Asia', 'America', ...), lat, lon
+#
+#   python Flight_Sql.py query "SELECT airline, sum(co2_kg) / 1000 AS co2_t FROM flights GROUP BY ALL ORDER BY 2 DESC LIMIT 10"
+#   python Flight_Sql.py schema
+
+# Largest result the dashboard box shows
+MAX_DASHBOARD_ROWS = 10000
+
+# Limits for every connection, so one query cannot take all the memory or cores the
+# dashboard and the scraper share the host with
+MEMORY_LIMIT = '1GB'
+DEFAULT_THREADS = min(os.cpu_count() or 1, 4)
+
+# Read-only queries are interrupted after this long
+QUERY_TIMEOUT_SECONDS = 30
+
+EXAMPLE_QUERY = """-- kg CO2 per carrier per month on routes to and from Asia
+SELECT date_trunc('month', f.date) AS month, f.airline, round(sum(f.co2_kg)) AS co2_kg
+FROM flights AS f JOIN airports AS a ON a.iata = f.remote_iata
+WHERE a.region = 'Asia'
+GROUP BY ALL
+ORDER BY month, co2_kg DESC"""
+
+_connections = {}
+_connections_lock = threading.Lock()
+# Threads converting the same day would share its temporary file name
+_conversion_lock = threading.Lock()
+
+logger = logging.getLogger(__name__)
+
+
+def sql_list(paths):
+    return '[' + ', '.join("'" + path.replace("'", "''") + "'" for path in paths) + ']'
+
+
+# Parquet copy of a day stored only as a pickle, or None when the pickle cannot be read
+def convert_pickle_day(day, directory, airport=DEFAULT_AIRPORT):
+    with _conversion_lock:
+        parquet_file = day_file(day, 'combined', 'parquet', directory)
+        if os.path.exists(parquet_file):
+            return parquet_file
+        try:
+            df = pd.read_pickle(day_file(day, 'combined', 'pkl', directory))
+            return write_day(df, day, formats=('parquet',), directory=directory, airport=airport)[0]
+        except Exception as e:
+            logger.warning(f"{day} is left out of the SQL views, its pickle could not be converted to Parquet: {e}")
+            return None
+
+
+# Combined day files to expose: Parquet where a copy exists, CSV otherwise, and a new
+# Parquet copy for days that only have a pickle
+def view_files(directory, airport=DEFAULT_AIRPORT):
+    parquet_files, csv_files = [], []
+    if not os.path.isdir(directory):
+        return parquet_files, csv_files
+    for day in sorted(os.listdir(directory)):
+        parquet_file = day_file(day, 'combined', 'parquet', directory)
+        csv_file = day_file(day, 'combined', 'csv', directory)
+        if os.path.exists(parquet_file):
+            parquet_files.append(parquet_file)
+        elif os.path.exists(csv_file):
+            csv_files.append(csv_file)
+        elif os.path.exists(day_file(day, 'combined', 'pkl', directory)):
+            parquet_file = convert_pickle_day(day, directory, airport)
+            if parquet_file is not None:
+                parquet_files.append(parquet_file)
+    return parquet_files, csv_files
+
+
+# Pickles of the days view_files had to leave out, because they have no copy DuckDB can read
+def unconverted_pickles(directory):
+    if not os.path.isdir(directory):
+        return []
+    return [day_file(day, 'combined', 'pkl', directory) for day in sorted(os.listdir(directory))
+            if os.path.exists(day_file(day, 'combined', 'pkl', directory))
+            and not any(os.path.exists(day_file(day, 'combined', ext, directory)) for ext in ('parquet', 'csv'))]
+
+
+# One normalised SELECT per file format; the day comes from the file name
+def _source_select(reader, home, columns=()):
+    codeshares = 'CAST("Codeshares" AS VARCHAR)' if 'Codeshares' in columns else 'CAST(NULL AS VARCHAR)'
+    iata = r"'\(([A-Z0-9]{3}) /'"
+    return f"""
+        SELECT CAST(regexp_extract(filename, '(\\d{{4}}-\\d{{2}}-\\d{{2}})_combined', 1) AS DATE) AS date,
+               CASE WHEN "Origin" IS NOT NULL THEN 'arrival' ELSE 'departure' END AS direction,
+               CAST("Primary Flight Number" AS VARCHAR) AS flight_number,
+               CAST("Flight Number" AS VARCHAR) AS callsign,
+               CAST("Airline" AS VARCHAR) AS airline,
+               CAST("Origin" AS VARCHAR) AS origin,
+               CAST("Destination" AS VARCHAR) AS destination,
+               coalesce(nullif(regexp_extract("Origin", {iata}, 1), ''), '{home}') AS origin_iata,
+               coalesce(nullif(regexp_extract("Destination", {iata}, 1), ''), '{home}') AS destination_iata,
+               nullif(regexp_extract(coalesce("Origin", "Destination"), {iata}, 1), '') AS remote_iata,
+               CAST("Status" AS VARCHAR) AS status,
+               CAST("Aircraft Info" AS VARCHAR) AS aircraft,
+               TRY_CAST("CO2 Emission (kg)" AS DOUBLE) AS co2_kg,
+               {codeshares} AS codeshares
+        FROM {reader}"""
+
+
+def _create_views(connection, parquet_files, csv_files, home):
+    selects = []
+    if parquet_files:
+        reader = f"read_parquet({sql_list(parquet_files)}, filename = true, union_by_name = true)"
+        columns = [row[0] for row in connection.execute(f"DESCRIBE SELECT * FROM {reader}").fetchall()]
+        selects.append(_source_select(reader, home, columns))
+    # union_by_name makes DuckDB sniff every CSV, so files are grouped by header line instead
+    csv_groups = {}
+    for csv_file in csv_files:
+        with open(csv_file, 'r', encoding='utf-8') as f:
+            csv_groups.setdefault(f.readline(), []).append(csv_file)
+    for header, group in csv_groups.items():
+        selects.append(_source_select(f"read_csv({sql_list(group)}, all_varchar = true, header = true, filename = true)", home,
+                                      header.rstrip('\n').split(',')))
+    if not selects:
+        # Same columns, no rows, so queries still bind on an empty store
+        selects.append(_source_select("(SELECT NULL AS filename, NULL AS \"Origin\", NULL AS \"Destination\", NULL AS \"Primary Flight Number\", "
+                                      "NULL AS \"Flight Number\", NULL AS \"Airline\", NULL AS \"Status\", NULL AS \"Aircraft Info\", "
+                                      "NULL AS \"CO2 Emission (kg)\" WHERE false)", home))
+    connection.execute("CREATE OR REPLACE VIEW flights AS " + " UNION ALL ".join(selects))
+
+
+def _create_airports(connection):
+    import airportsdata
+    rows = [(iata, airport['icao'], airport['name'], airport['city'], airport['country'], airport['tz'].split('/')[0],
+             airport['lat'], airport['lon'])
+            for iata, airport in airportsdata.load('IATA').items()]
+    connection.register('airports_frame', pd.DataFrame(rows, columns=['iata', 'icao', 'name', 'city', 'country', 'region', 'lat', 'lon']))
+    connection.execute("CREATE OR REPLACE TABLE airports AS SELECT * FROM airports_frame")
+    connection.unregister('airports_frame')
+
+
+# A new in-memory database with the views for an airport's data directory. Restricted
+# connections can only touch files under that directory, so a SELECT from the dashboard
+# cannot read or write anything else.
+def connect(airport=DEFAULT_AIRPORT, directory=None, threads=None, restricted=True, memory_limit=MEMORY_LIMIT):
+    directory = directory or airport_directory(airport)
+    connection = duckdb.connect(':memory:')
+    connection.execute(f"SET threads = {int(threads or DEFAULT_THREADS)}")
+    connection.execute("SET memory_limit = ?", [memory_limit])
+    _create_airports(connection)
+    _create_views(connection, *view_files(directory, airport), airport.upper())
+    if restricted:
+        connection.execute(f"SET allowed_directories = {sql_list([os.path.join(os.path.abspath(directory), '')])}")
+        connection.execute("SET enable_external_access = false")
+    return connection
+
+
+# Shared connection per data directory; the views are rebuilt when day files appear or
+# gain a Parquet copy. Every call gets its own cursor, so threads can query concurrently.
+def get_connection(airport=DEFAULT_AIRPORT, directory=None):
+    directory = directory or airport_directory(airport)
+    files = view_files(directory, airport)
+    with _connections_lock:
+        cached = _connections.get(directory)
+        if cached is None:
+            cached = _connections[directory] = {'connection': connect(airport, directory), 'files': files}
+        elif cached['files'] != files:
+            _create_views(cached['connection'], *files, airport.upper())
+            cached['files'] = files
+        return cached['connection'].cursor()
+
+
+# Only a single SELECT (or WITH ... SELECT) may run from the dashboard or the API
+def check_read_only(sql):
+    statements = duckdb.extract_statements(sql)
+    if len(statements) != 1 or statements[0].type != duckdb.StatementType.SELECT:
+        raise ValueError("Only a single SELECT statement can be run")
+
+
+# Runs sql and returns the result as a DataFrame. The cursor is interrupted once timeout
+# seconds have passed (by default only for read-only queries), raising TimeoutError.
+def query(sql, params=None, airport=DEFAULT_AIRPORT, directory=None, max_rows=None, read_only=True, timeout=None):
+    if read_only:
+        check_read_only(sql)
+        cursor = get_connection(airport, directory)
+        timeout = timeout or QUERY_TIMEOUT_SECONDS
+    else:
+        cursor = connect(airport, directory, restricted=False)
+    timer = threading.Timer(timeout, cursor.interrupt) if timeout else None
+    if timer is not None:
+        timer.daemon = True
+        timer.start()
+    try:
+        relation = cursor.sql(sql, params=params)
+        if relation is None:
+            return pd.DataFrame()  # A statement without a result, e.g. COPY
+        if max_rows is not None:
+            relation = relation.limit(max_rows)
+        return relation.df()
+    except duckdb.InterruptException:
+        raise TimeoutError(f"Query interrupted after {timeout} seconds") from None
+    finally:
+        if timer is not None:
+            timer.cancel()
+        cursor.close()
+
+
+def schema(airport=DEFAULT_AIRPORT, directory=None):
+    cursor = get_connection(airport, directory)
+    return {table: cursor.sql(f"DESCRIBE {table}").df()[['column_name', 'column_type']] for table in ('flights', 'airports')}
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="SQL over the stored flight history (DuckDB)")
+    subparsers = parser.add_subparsers(dest='command', required=True)
+    query_parser = subparsers.add_parser('query', help="Run a SQL query")
+    query_parser.add_argument('sql', help="SQL text, or @file.sql")
+    query_parser.add_argument('--output', help="Write the result to a .csv or .parquet file instead of printing it")
+    query_parser.add_argument('--allow-writes', action='store_true', help="Allow any statement and file access (e.g. COPY ... TO)")
+    query_parser.add_argument('--timeout', type=float, help=f"Interrupt the query after this many seconds (default {QUERY_TIMEOUT_SECONDS} for reads, none with --allow-writes)")
+    schema_parser = subparsers.add_parser('schema', help="Show the views and their columns")
+    for command_parser in (query_parser, schema_parser):
+        command_parser.add_argument('--airport', default=DEFAULT_AIRPORT, choices=sorted(AIRPORTS), help="IATA code of the airport")
+        command_parser.add_argument('--directory', help="Data directory (default the airport's)")
+    args = parser.parse_args()
+
+    if args.command == 'schema':
+        parquet_files, csv_files = view_files(args.directory or airport_directory(args.airport), args.airport)
+        print(f"{len(parquet_files)} days from Parquet, {len(csv_files)} from CSV")
+        for table, columns in schema(args.airport, args.directory).items():
+            print(f"\n{table}\n{columns.to_string(index=False)}")
+    else:
+        sql = args.sql
+        if sql.startswith('@'):
+            with open(sql[1:], 'r', encoding='utf-8') as f:
+                sql = f.read()
+        start_time = time.perf_counter()
+        df = query(sql, airport=args.airport, directory=args.directory, read_only=not args.allow_writes, timeout=args.timeout)
+        elapsed = time.perf_counter() - start_time
+        if args.output:
+            df.to_parquet(args.output, index=False) if args.output.endswith('.parquet') else df.to_csv(args.output, index=False)
+            print(f"Wrote {len(df)} rows to {args.output}")
+        else:
+            with pd.option_context('display.max_rows', 100, 'display.width', 200):
+                print(df)
+        print(f"{len(df)} rows --- {elapsed:.3f} seconds ---")
@@ -0,0 +1,174 @@
+import json
+import os
+import sys
+import pandas as pd
+from Airports import DEFAULT_AIRPORT
+from Flight_Schema import apply_schema
+
+# Day-partitioned flight storage: data/<date>/<date>_<kind>.<ext>
+# Pickles are the historical format. Parquet copies of the combined files let readers
+# push column projection and row predicates down to storage, so only the bytes that
+# are needed get read and decoded.
+
+data_directory = 'data'
+
+# Columns the dashboard aggregates need
+AGGREGATE_COLUMNS = ['CO2 Emission (kg)', 'Origin', 'Destination', 'Airline']
+
+# Formats a day partition can be written in; CSV is only kept for people browsing the data
+OUTPUT_FORMATS = ('csv', 'pkl', 'parquet')
+
+
+def day_file(date, kind='combined', ext='pkl', directory=None):
+    directory = directory or data_directory
+    return os.path.join(directory, f"{date}", f"{date}_{kind}.{ext}")
+
+
+# Build pyarrow-style predicates for the common dashboard filters
+def build_filters(airlines=None, origins=None, destinations=None):
+    filters = []
+    if airlines:
+        filters.append(('Airline', 'in', list(airlines)))
+    if origins:
+        filters.append(('Origin', 'in', list(origins)))
+    if destinations:
+        filters.append(('Destination', 'in', list(destinations)))
+    return filters or None
+
+
+# Evaluate the same predicates against an in-memory frame (used for pickle partitions)
+def apply_filters(df, filters):
+    if not filters:
+        return df
+    mask = pd.Series(True, index=df.index)
+    for column, op, value in filters:
+        series = df[column]
+        if op in ('=', '=='):
+            mask &= series == value
+        elif op == '!=':
+            mask &= series != value
+        elif op == 'in':
+            mask &= series.isin(value)
+        elif op == 'not in':
+            mask &= ~series.isin(value)
+        elif op == '<':
+            mask &= series < value
+        elif op == '<=':
+            mask &= series <= value
+        elif op == '>':
+            mask &= series > value
+        elif op == '>=':
+            mask &= series >= value
+        else:
+            raise ValueError(f"Unsupported filter operator: {op}")
+    return df[mask]
+
+
+# Read one day, preferring the Parquet copy so columns and filters are pushed down
+def read_day(date, columns=None, filters=None, kind='combined', directory=None):
+    # Filter columns have to be read even when they are not projected
+    read_columns = None
+    if columns is not None:
+        read_columns = list(columns) + [c for c, _, _ in (filters or []) if c not in columns]
+
+    parquet_file = day_file(date, kind, 'parquet', directory)
+    if os.path.exists(parquet_file):
+        df = pd.read_parquet(parquet_file, columns=read_columns, filters=filters or None)
+        return df if columns is None else df[list(columns)]
+
+    pickle_file = day_file(date, kind, 'pkl', directory)
+    if not os.path.exists(pickle_file):
+        return None
+    df = pd.read_pickle(pickle_file)
+    if read_columns is not None:
+        df = df[[c for c in read_columns if c in df.columns]]
+    df = apply_filters(df, filters)
+    return df if columns is None else df[[c for c in columns if c in df.columns]]
+
+
+# Yield the days of a range that exist; the date range itself prunes partitions
+def iter_days(date_range_list, columns=None, filters=None, kind='combined', directory=None):
+    for date in date_range_list:
+        df = read_day(date, columns=columns, filters=filters, kind=kind, directory=directory)
+        if df is not None:
+            yield date, df
+
+
+def _write_format(df, path, ext):
+    if ext == 'csv':
+        df.to_csv(path, index=False)
+    elif ext == 'pkl':
+        df.to_pickle(path, compression=None)
+    elif ext == 'parquet':
+        df.to_parquet(path, index=False)
+    else:
+        raise ValueError(f"Unsupported output format: {ext}")
+
+
+# Write a day partition once, in the canonical schema, in each of the given formats.
+# Every file goes to a temporary name first and all of them are renamed into place only
+# once they are complete, so a crash never leaves a half-written file for readers.
+def write_day(df, date, kind='combined', formats=OUTPUT_FORMATS, directory=None, airport=DEFAULT_AIRPORT):
+    df = apply_schema(df, date, airport)
+    os.makedirs(os.path.dirname(day_file(date, kind, 'pkl', directory)), exist_ok=True)
+    pending = []
+    try:
+        for ext in formats:
+            path = day_file(date, kind, ext, directory)
+            pending.append((f"{path}.{os.getpid()}.tmp", path))
+            _write_format(df, pending[-1][0], ext)
+    except BaseException:
+        for temp_path, _ in pending:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+        raise
+    for temp_path, path in pending:
+        os.replace(temp_path, path)
+    return [path for _, path in pending]
+
+
+# Write the Parquet copy of a day partition next to its pickle
+def write_parquet(df, date, kind='combined', directory=None):
+    return write_day(df, date, kind, ('parquet',), directory)[0]
+
+
+# Per-day metadata sidecar (data/<date>/<date>_meta.json), e.g. the emission factor
+# table version and the factor each aircraft model was charged when the day was written
+def read_meta(date, directory=None):
+    meta_file = day_file(date, 'meta', 'json', directory)
+    if not os.path.exists(meta_file):
+        return {}
+    with open(meta_file, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def write_meta(date, meta, directory=None):
+    meta_file = day_file(date, 'meta', 'json', directory)
+    temp_file = f"{meta_file}.{os.getpid()}.tmp"
+    with open(temp_file, 'w', encoding='utf-8') as f:
+        json.dump(meta, f, indent=2, sort_keys=True)
+    os.replace(temp_file, meta_file)
+
+
+# Convert existing pickle partitions to Parquet
+def convert_to_parquet(date_range_list=None, directory=None):
+    directory = directory or data_directory
+    if date_range_list is None:
+        date_range_list = sorted(os.listdir(directory))
+    converted = 0
+    for date in date_range_list:
+        pickle_file = day_file(date, 'combined', 'pkl', directory)
+        if os.path.exists(pickle_file):
+            write_parquet(pd.read_pickle(pickle_file), date, directory=directory)
+            converted += 1
+    print(f"Converted {converted} day partitions to Parquet")
+
+
+if __name__ == "__main__":
+    if len(sys.argv) not in (2, 4) or sys.argv[1] != 'to-parquet':
+        print("Usage: python Flight_Store.py to-parquet [<start date> <end date>]")
+        sys.exit(1)
+    if len(sys.argv) == 4:
+        convert_to_parquet(pd.date_range(sys.argv[2], sys.argv[3]).strftime("%Y-%m-%d").tolist())
+    else:
+        convert_to_parquet()
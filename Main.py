@@ -1,67 +1,52 @@
-import subprocess
 import pandas as pd
 import time
 import os
-from concurrent.futures import ThreadPoolExecutor, as_completed
-import sys
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from Airports import DEFAULT_AIRPORT, airport_directory
+from Flight_Store import OUTPUT_FORMATS
+from Pipeline import DIRECTIONS, combine_day, run_direction
+from Pipeline_Metrics import PipelineMetrics
 
 def generate_date_range(start_date, end_date):
     return pd.date_range(start_date, end_date)
 
-def run_script(script_name, date, date_directory):
-    try:
-        result = subprocess.run([sys.executable, script_name, date, date_directory], check=True, capture_output=True, text=True)
-        print(result.stdout)
-        return script_name, None
-    except subprocess.CalledProcessError as e:
-        print(f"Error running {script_name} for date {date}: {e}")
-        print(e.stdout)  # Print standard output
-        print(e.stderr)  # Print error output
-        return script_name, e
-
-def collect_data(start_date, end_date):
+# Arrivals and departures run in their own processes (each drives its own browser) and
+# hand their frames straight back, so the day is combined in memory and written once.
+# formats selects the combined outputs; direction_files=False skips the per-direction files
+def collect_data(start_date, end_date, formats=OUTPUT_FORMATS, direction_files=True, airport=DEFAULT_AIRPORT):
     dates = generate_date_range(start_date, end_date)
     start_time = time.time()
-
-    for date in dates:
-        date_str = date.strftime('%Y-%m-%d')
-        date_directory = f"./data/{date_str}"
-        
-        # Create the directory for the specified date if it doesn't exist
-        os.makedirs(date_directory, exist_ok=True)
-
-        # Run arrivals.py and departures.py concurrently
-        scripts = ["departures.py", "arrivals.py"]
-        with ThreadPoolExecutor() as executor:
-            futures = [executor.submit(run_script, script, date_str, date_directory) for script in scripts]
-            for future in as_completed(futures):
-                script_name, error = future.result()
-                if error:
-                    print(f"Script {script_name} failed with error: {error}")
-
-        # Read the resulting CSV files
-        try:
-            arrivals_df = pd.read_csv(os.path.join(date_directory, f"{date_str}_arrivals.csv"))
-            departures_df = pd.read_csv(os.path.join(date_directory, f"{date_str}_departures.csv"))
-
-            # Combine the dataframes
-            combined_df = pd.concat([arrivals_df, departures_df])
-
-            # Save the combined dataframe to a new CSV file
-            combined_output_file = os.path.join(date_directory, f"{date_str}_combined.csv")
-            combined_df.to_csv(combined_output_file, index=False)
-
-            print(f"Combined data saved to {combined_output_file}")
-            print(combined_df)
-
-            # Save the combined dataframe to a pickle file for easy loading later
-            combined_pickle_file = os.path.join(date_directory, f"{date_str}_combined.pkl")
-            combined_df.to_pickle(combined_pickle_file)
-            print(f"Combined data saved to {combined_pickle_file}")
-
-        except FileNotFoundError as e:
-            print(f"Error: {e}")
-
+    metrics = PipelineMetrics('collect', labels={'start_date': start_date, 'end_date': end_date, 'airport': airport})
+
+    with ProcessPoolExecutor(max_workers=len(DIRECTIONS)) as executor:
+        for date in dates:
+            date_str = date.strftime('%Y-%m-%d')
+            date_directory = os.path.join(airport_directory(airport), date_str)
+
+            # Create the directory for the specified date if it doesn't exist
+            os.makedirs(date_directory, exist_ok=True)
+
+            # Collect arrivals and departures concurrently
+            frames = {}
+            with metrics.stage('run_scripts', date=date_str):
+                futures = {executor.submit(run_direction, date_str, date_directory, flight_type, direction_files, airport): flight_type for flight_type in reversed(DIRECTIONS)}
+                for future in as_completed(futures):
+                    flight_type = futures[future]
+                    try:
+                        frames[flight_type] = future.result()
+                    except Exception as e:
+                        metrics.incr('script_failures')
+                        print(f"Collecting {flight_type}s for {date_str} failed with error: {e}")
+
+            # Combine both directions into the day's combined outputs
+            try:
+                combine_day(date_str, date_directory, metrics, frames=frames, formats=formats, airport=airport)
+            except FileNotFoundError as e:
+                metrics.incr('missing_outputs')
+                print(f"Error: {e}")
+
+    metrics.finish()
+    print(metrics.report())
     print("Process finished --- %s seconds ---" % (time.time() - start_time))
 
 if __name__ == "__main__":
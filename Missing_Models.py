@@ -0,0 +1,73 @@
+import os
+import pandas as pd
+from datetime import date as current_date
+from File_Lock import file_lock
+
+# Registry of aircraft models that have no emission factor yet.
+# Misses are collected in memory while a day is processed and flushed once at the end,
+# under a lock, because arrivals and departures run as separate processes.
+#
+# File format (tab separated): model, count, first seen, last seen.
+# Older one-model-per-line entries are still read and upgraded on the next flush.
+
+registry_path = 'missing_aircraft_models.txt'
+HEADER = "# model\tcount\tfirst_seen\tlast_seen\n"
+
+
+def read_registry(path=registry_path):
+    entries = {}
+    if not os.path.exists(path):
+        return entries
+    with open(path, 'r', encoding='utf-8') as f:
+        for line in f:
+            line = line.rstrip('\n')
+            if not line.strip() or line.startswith('#'):
+                continue
+            fields = line.split('\t')
+            model = fields[0].strip()
+            count = int(fields[1]) if len(fields) > 1 and fields[1] else 1
+            first_seen = fields[2] if len(fields) > 2 else ''
+            last_seen = fields[3] if len(fields) > 3 else ''
+            if model in entries:
+                entry = entries[model]
+                entry['count'] += count
+                entry['first_seen'] = min(filter(None, [entry['first_seen'], first_seen]), default='')
+                entry['last_seen'] = max(entry['last_seen'], last_seen)
+            else:
+                entries[model] = {'count': count, 'first_seen': first_seen, 'last_seen': last_seen}
+    return entries
+
+
+def write_registry(entries, path=registry_path):
+    temp_path = f"{path}.{os.getpid()}.tmp"
+    with open(temp_path, 'w', encoding='utf-8') as f:
+        f.write(HEADER)
+        for model, entry in entries.items():
+            f.write(f"{model}\t{entry['count']}\t{entry['first_seen']}\t{entry['last_seen']}\n")
+    os.replace(temp_path, path)
+
+
+class MissingModelRegistry:
+    def __init__(self, path=registry_path):
+        self.path = path
+        self.misses = {}
+
+    def record(self, aircraft_model, count=1):
+        if pd.isna(aircraft_model) or not str(aircraft_model).strip():
+            return
+        self.misses[aircraft_model] = self.misses.get(aircraft_model, 0) + count
+
+    # Merge this run's misses into the registry file; seen_date is the flight date processed
+    def flush(self, seen_date=None):
+        if not self.misses:
+            return
+        seen_date = seen_date or current_date.today().isoformat()
+        with file_lock(f"{self.path}.lock"):
+            entries = read_registry(self.path)
+            for model, count in self.misses.items():
+                entry = entries.setdefault(model, {'count': 0, 'first_seen': seen_date, 'last_seen': seen_date})
+                entry['count'] += count
+                entry['first_seen'] = min(filter(None, [entry['first_seen'], seen_date]))
+                entry['last_seen'] = max(entry['last_seen'], seen_date)
+            write_registry(entries, self.path)
+        self.misses.clear()
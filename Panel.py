@@ -1,31 +1,26 @@
 import panel as pn
 import pandas as pd
+import asyncio
 import pickle
 import os
-import requests 
-import dask.dataframe as dd
 from datetime import date
 import logging
+from Airports import DEFAULT_AIRPORT, airport_directory, get_airport
+from Aggregates import RangeAggregator, calculate_saf_reduction
+from Flight_Store import AGGREGATE_COLUMNS, read_day
+from Dask_Analytics import MIN_PARALLEL_DAYS, aggregate_range_streaming
+from Data_Sync import get_manifest, sync_missing
+from Flight_Export import EXPORT_FORMATS, export_path, iter_export_bytes
+from Flight_Sql import EXAMPLE_QUERY, MAX_DASHBOARD_ROWS, query as sql_query
+from Warm_Start import DEFAULT_START, DEFAULT_END, DEFAULT_ROWS, load_artifact
+from Callback_Profiler import PROFILING, NullProfile, diagnostics_markdown, profiler
 
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
 
 
-def download_file_from_github(repo, path, save_as):
-    url = f"https://github.com/LChelkowski/CO2-Emissions-Tracker-Ted-Stevens-Anchorage-International-Airport/tree/master/data"
-    response = requests.get(url)
-    if response.status_code == 200:
-        os.makedirs(os.path.dirname(save_as), exist_ok=True)
-        with open(save_as, 'wb') as f:
-            f.write(response.content)
-        print(f"Downloaded {save_as} from GitHub")
-    else:
-        print(f"Failed to download {path} from GitHub: {response.status_code}")
-
-
-
 # Initialize Panel extension
-pn.extension(sizing_mode="stretch_width", theme="dark")
+pn.extension(sizing_mode="stretch_width", theme="dark", nthreads=2)  # Threaded callbacks let partial results render while loading
 
 # Load custom CSS
 pn.config.raw_css.append("""
@@ -104,57 +99,96 @@ body {
 }
 """)
 
-# Directory where data is stored
-data_directory = 'data'
+# Airport shown by this dashboard (PANEL_AIRPORT=FAI panel serve Panel.py) and its data directory
+AIRPORT = os.environ.get('PANEL_AIRPORT', DEFAULT_AIRPORT).upper()
+data_directory = airport_directory(AIRPORT)
+
+
+# Load a single day partition. The manifest says whether the day exists, so known gaps
+# cost nothing; columns and filters are pushed down when a Parquet copy of the day exists.
+def load_day_partition(date, columns=None, filters=None):
+    if not get_manifest(data_directory).is_available(date):
+        return None
+    try:
+        return read_day(date, columns=columns, filters=filters, directory=data_directory)
+    except (pickle.UnpicklingError, EOFError) as e:
+        logger.warning(f"Could not read data for {date}: {e}")
+        return None
+
+
+# Yield day partitions one at a time so callers never hold the whole range in memory.
+# Days missing locally are fetched from GitHub concurrently before iterating; only the
+# default airport is published there.
+def iter_day_partitions(date_range_list, columns=None, filters=None):
+    if AIRPORT == DEFAULT_AIRPORT:
+        sync_missing(date_range_list, directory=data_directory)
+    for date in date_range_list:
+        df = load_day_partition(date, columns=columns, filters=filters)
+        if df is not None:
+            yield df
 
 
-# Load pickle files function with row limit and unique indexing
-def load_pickle_files_dask(date_range_list, row_limit=None):
+# Rows for the table: day partitions are read in order until the row limit is reached
+def load_display_rows(date_range_list, row_limit=None, columns=None, filters=None):
     df_list = []
     total_rows = 0
-    repo = "LChelkowski/CO2-Emissions-Tracker-Ted-Stevens-Anchorage-International-Airport"
-    for date in date_range_list:
-        combined_file = os.path.join(data_directory, f"{date}", f"{date}_combined.pkl")
-        if not os.path.exists(combined_file):
-            # Download the file from GitHub if it doesn't exist
-            download_file_from_github(repo, f"data/{date}/{date}_combined.pkl", combined_file)
-        if os.path.exists(combined_file):
-            with open(combined_file, 'rb') as f:
-                df = pickle.load(f)
-                if row_limit is not None and total_rows + len(df) > row_limit:
-                    remaining_rows = row_limit - total_rows
-                    df_list.append(df.iloc[:remaining_rows])
-                    break
-                else:
-                    df_list.append(df)
-                    total_rows += len(df)
+    for df in iter_day_partitions(date_range_list, columns=columns, filters=filters):
+        if row_limit is not None and total_rows + len(df) > row_limit:
+            remaining_rows = row_limit - total_rows
+            df_list.append(df.iloc[:remaining_rows])
+            break
+        else:
+            df_list.append(df)
+            total_rows += len(df)
     if df_list:
-        combined_df = pd.concat(df_list)
-        combined_df.reset_index(drop=True, inplace=True)  # Ensure unique indexing
-        combined_df = combined_df.sort_index()  # Sort by index to maintain order
-        return dd.from_pandas(combined_df, npartitions=4)  # Convert to Dask DataFrame
+        return pd.concat(df_list, ignore_index=True)  # Ensure unique indexing
     else:
         return None
 
 
-# CO2 emission reduction based on SAF percentage
-def calculate_saf_reduction(df, saf_percentage):
-    reduction_factor = saf_percentage / 100
-    df['CO2 Emission (kg)'] = pd.to_numeric(df['CO2 Emission (kg)'], errors='coerce')
-    df['Reduced CO2 Emission (metric tons)'] = df['CO2 Emission (kg)'] * reduction_factor / 1000
-    df['CO2 Emission (metric tons)'] = df['CO2 Emission (kg)'] / 1000
-    return df
+# Fold every day partition of the range into a RangeAggregator, reporting progress as it goes.
+# Long ranges on a multi-core host go through a shared process pool instead, which reports
+# progress as each chunk of days finishes.
+def aggregate_date_range(date_range_list, on_progress=None, progress_every=30, filters=None, profile=None):
+    profile = profile or NullProfile()
+    if len(date_range_list) >= MIN_PARALLEL_DAYS and (os.cpu_count() or 1) > 1:
+        if AIRPORT == DEFAULT_AIRPORT:
+            sync_missing(date_range_list, directory=data_directory)
+        with profile.stage('pool_aggregate'):
+            return aggregate_range_streaming(date_range_list, on_progress, filters=filters, directory=data_directory)
+    aggregator = RangeAggregator()
+    partitions = iter_day_partitions(date_range_list, columns=AGGREGATE_COLUMNS, filters=filters)
+    while True:
+        with profile.stage('load_files'):
+            df = next(partitions, None)
+        if df is None:
+            break
+        with profile.stage('aggregate'):
+            aggregator.update(df)
+        if on_progress is not None and aggregator.partitions % progress_every == 0:
+            with profile.stage('render'):
+                on_progress(aggregator)
+    return aggregator
+
 
 # Global variable to keep track of the current number of rows
-current_rows_display = 10000
-combined_df_all = None
+current_rows_display = DEFAULT_ROWS
+
+# Aggregates for the currently selected date range, reused when only the SAF percentage changes
+range_aggregator = None
+aggregated_range = None
 
 # Widgets
-start_date_picker = pn.widgets.DatePicker(name='Start date', value=date(2023, 1, 1), start=date(2018, 1, 1))
-end_date_picker = pn.widgets.DatePicker(name='End date', value=date(2023, 12, 31), start=date(2018, 1, 1))
+start_date_picker = pn.widgets.DatePicker(name='Start date', value=DEFAULT_START, start=date(2018, 1, 1))
+end_date_picker = pn.widgets.DatePicker(name='End date', value=DEFAULT_END, start=date(2018, 1, 1))
 saf_slider = pn.widgets.IntSlider(name='Select SAF percentage', start=0, end=100, value=20)
 saf_input = pn.widgets.IntInput(name='SAF percentage', value=20, start=0, end=100)
-file_path_input = pn.widgets.TextInput(name='File path', placeholder='Enter file path and name...')
+file_path_input = pn.widgets.TextInput(name='File name', placeholder='Enter file name (saved under exports/)...')
+export_format_select = pn.widgets.Select(name='Format', options=list(EXPORT_FORMATS), value='csv', width=100)
+export_button = pn.widgets.Button(name='Export range', button_type='success')
+export_progress = pn.indicators.Progress(name='Export', value=0, max=100, visible=False, sizing_mode='stretch_width')
+export_message = pn.pane.HTML("")
+download_link = pn.pane.HTML("")
 increase_rows_button = pn.widgets.Button(name='Increase by 5000 rows', button_type='success', css_classes=['full-width-btn'])
 
 # Sync the slider and input box
@@ -167,6 +201,50 @@ def sync_saf_input(event):
 saf_slider.param.watch(sync_saf_slider, 'value')
 saf_input.param.watch(sync_saf_input, 'value')
 
+# Browser download of the selected range, streamed day by day from /api/export (Flight_Export.py)
+def update_download_link(event=None):
+    query = (f"start={start_date_picker.value}&end={end_date_picker.value}&format={export_format_select.value}"
+             f"&saf={saf_slider.value}&airport={AIRPORT}")
+    download_link.object = f"<a href='/api/export?{query}' target='_blank' style='color: #4caf50;'>Download {export_format_select.value.upper()}</a>"
+
+for widget in (start_date_picker, end_date_picker, export_format_select, saf_slider):
+    widget.param.watch(update_download_link, 'value')
+update_download_link()
+
+# Export the selected range to a file on the server, one day partition at a time. The
+# chunks are produced off the event loop so the progress bar updates while it runs.
+async def export_range(event=None):
+    date_range_list = pd.date_range(start_date_picker.value, end_date_picker.value).strftime("%Y-%m-%d").tolist()
+    path = export_path(file_path_input.value or f"co2_flights_{date_range_list[0]}_{date_range_list[-1]}", export_format_select.value)
+    temp_path = f"{path}.{os.getpid()}.tmp"
+    export_button.disabled = True
+    export_progress.value, export_progress.visible = 0, True
+    export_message.object = f"Exporting to {path}..."
+
+    def on_progress(done, total):
+        export_progress.value = int(100 * done / max(total, 1))
+
+    loop = asyncio.get_running_loop()
+    if AIRPORT == DEFAULT_AIRPORT:
+        await loop.run_in_executor(None, lambda: sync_missing(date_range_list, directory=data_directory))
+    chunks = iter_export_bytes(date_range_list, export_format_select.value, data_directory, saf_slider.value, on_progress, AIRPORT)
+    try:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(temp_path, 'wb') as f:
+            while (chunk := await loop.run_in_executor(None, next, chunks, None)) is not None:
+                f.write(chunk)
+        os.replace(temp_path, path)
+        export_message.object = f"Exported {len(date_range_list)} days to {path}"
+    except Exception as e:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+        export_message.object = f"Export failed: {e}"
+    finally:
+        export_button.disabled = False
+        export_progress.visible = False
+
+export_button.on_click(export_range)
+
 # Function to increase the number of rows
 def increase_rows(event):
     global current_rows_display
@@ -177,74 +255,84 @@ def increase_rows(event):
 
 increase_rows_button.on_click(increase_rows)
 
+# Build the summary rows shown above the data table
+def summary_rows(summary, loading_message=None):
+    rows = [
+        pn.Row(
+            pn.pane.HTML(f"<div style='background-color: #3e3e3e; color: #e0e0e0; padding: 10px; border-radius: 5px; width: 100%;'>Total CO2 Emissions: {summary['total_co2_emission']:,.2f} metric tons</div>"),
+            pn.pane.HTML(f"<div style='background-color: #3e3e3e; color: #e0e0e0; padding: 10px; border-radius: 5px; width: 100%;'>Total SAF Reduction: {summary['total_saf_reduction']:,.2f} metric tons</div>")
+        ),
+        pn.Row(
+            pn.pane.HTML(
+                f"<div class='center'><div class='small-bubble'>Median CO2 Emissions: {summary['median_co2']:,.2f} metric tons</div></div>"
+            )
+        ),
+        pn.Row(
+            pn.pane.HTML(f"<div style='background-color: #3e3e3e; color: #e0e0e0; padding: 10px; border-radius: 5px;'>Top 3 Origins: {', '.join(summary['top_origins'])}</div>"),
+            pn.pane.HTML(f"<div style='background-color: #3e3e3e; color: #e0e0e0; padding: 10px; border-radius: 5px;'>Top 3 Destinations: {', '.join(summary['top_destinations'])}</div>")
+        ),
+        pn.Row(
+            pn.pane.HTML(
+                f"<div style='background-color: #3e3e3e; color: #e0e0e0; padding: 10px; border-radius: 5px; text-align: center;'>"
+                f"<strong style='font-size: 18px;'>Top 5 Airlines:</strong> "
+                + " ".join([f"<span style='font-size: 16px; text-decoration: underline;'>{airline}</span>: {count}" for airline, count in summary['top_airlines']])
+                + "</div>"
+            )
+        ),
+    ]
+    if loading_message:
+        rows.insert(0, pn.pane.HTML(f"<div style='background-color: #3e3e3e; color: #e0e0e0; padding: 10px; border-radius: 5px;'>{loading_message}</div>"))
+    return rows
+
 def update_data(event=None):
-    global combined_df_all, current_rows_display
-    start_date = start_date_picker.value
-    end_date = end_date_picker.value
-    saf_percentage = saf_slider.value
-    row_limit = current_rows_display
+    global range_aggregator, aggregated_range, current_rows_display
+    profile = profiler.start('update_data')
+    try:
+        start_date = start_date_picker.value
+        end_date = end_date_picker.value
+        saf_percentage = saf_slider.value
+        row_limit = current_rows_display
     
-    date_range_list = pd.date_range(start_date, end_date).strftime("%Y-%m-%d").tolist()
+        date_range_list = pd.date_range(start_date, end_date).strftime("%Y-%m-%d").tolist()
     
-    # Load and process all data within the date range for calculations
-    combined_df_all = load_pickle_files_dask(date_range_list)
+        # Stream every day partition in the range into running aggregates, rendering partial results as they arrive
+        if aggregated_range != (start_date, end_date):
+            def show_progress(aggregator):
+                update_panel.objects = summary_rows(
+                    aggregator.summary(saf_percentage),
+                    loading_message=f"Loading... {aggregator.partitions} of {len(date_range_list)} days loaded"
+                )
+            range_aggregator = aggregate_date_range(date_range_list, on_progress=show_progress, profile=profile)
+            aggregated_range = (start_date, end_date)
     
-    if combined_df_all is not None:
-        combined_df_all = combined_df_all.compute()
-        combined_df_all = calculate_saf_reduction(combined_df_all, saf_percentage)
-        
-        # Calculate totals for the entire dataset
-        total_co2_emission = combined_df_all['CO2 Emission (metric tons)'].sum()
-        total_saf_reduction = combined_df_all['Reduced CO2 Emission (metric tons)'].sum()
-        median_co2 = combined_df_all['CO2 Emission (metric tons)'].median()
-        
-        top_origins = combined_df_all['Origin'].value_counts().nlargest(3).index.tolist()
-        top_destinations = combined_df_all['Destination'].value_counts().nlargest(3).index.tolist()
-        top_airlines = combined_df_all['Airline'].value_counts().nlargest(5)
-        
-        # Load and process limited data for display
-        display_df = load_pickle_files_dask(date_range_list, row_limit=row_limit)
-        if display_df is not None:
-            display_df = display_df.compute()
-            display_df = calculate_saf_reduction(display_df, saf_percentage)
+        if range_aggregator.partitions:
+            # Load and process limited data for display
+            with profile.stage('load_files'):
+                display_df = load_display_rows(date_range_list, row_limit=row_limit)
+            if display_df is not None:
+                with profile.stage('saf_reduction'):
+                    display_df = calculate_saf_reduction(display_df, saf_percentage)
         
-        update_panel.objects = [
-            pn.Row(
-                pn.pane.HTML(f"<div style='background-color: #3e3e3e; color: #e0e0e0; padding: 10px; border-radius: 5px; width: 100%;'>Total CO2 Emissions: {total_co2_emission:,.2f} metric tons</div>"),
-                pn.pane.HTML(f"<div style='background-color: #3e3e3e; color: #e0e0e0; padding: 10px; border-radius: 5px; width: 100%;'>Total SAF Reduction: {total_saf_reduction:,.2f} metric tons</div>")
-            ),
-            pn.Row(
-                pn.pane.HTML(
-                    f"<div class='center'><div class='small-bubble'>Median CO2 Emissions: {median_co2:,.2f} metric tons</div></div>"
-                )
-            ),
-            pn.Row(
-                pn.pane.HTML(f"<div style='background-color: #3e3e3e; color: #e0e0e0; padding: 10px; border-radius: 5px;'>Top 3 Origins: {', '.join(top_origins)}</div>"),
-                pn.pane.HTML(f"<div style='background-color: #3e3e3e; color: #e0e0e0; padding: 10px; border-radius: 5px;'>Top 3 Destinations: {', '.join(top_destinations)}</div>")
-            ),
-            pn.Row(
-                pn.pane.HTML(
-                    f"<div style='background-color: #3e3e3e; color: #e0e0e0; padding: 10px; border-radius: 5px; text-align: center;'>"
-                    f"<strong style='font-size: 18px;'>Top 5 Airlines:</strong> "
-                    + " ".join([f"<span style='font-size: 16px; text-decoration: underline;'>{airline}</span>: {count}" for airline, count in top_airlines.items()])
-                    + "</div>"
-                )
-            ),
-            # Remove the following line
-            # pn.Row(export_csv_button, export_message, export_excel_button),
-            pn.pane.DataFrame(display_df, sizing_mode='stretch_both')
-        ]
-
-    else:
-        update_panel.objects = [
-            pn.pane.HTML("<div style='background-color: #3e3e3e; color: #e0e0e0; padding: 10px; border-radius: 5px;'>Data for the selected date range is not available.</div>")
-        ]
-
-    # Enable or disable the button based on the row limit
-    if current_rows_display >= 20000:
-        increase_rows_button.disabled = True
-    else:
-        increase_rows_button.disabled = False
+            with profile.stage('render'):
+                update_panel.objects = summary_rows(range_aggregator.summary(saf_percentage)) + [
+                    pn.pane.DataFrame(display_df, sizing_mode='stretch_both')
+                ]
+
+        else:
+            update_panel.objects = [
+                pn.pane.HTML("<div style='background-color: #3e3e3e; color: #e0e0e0; padding: 10px; border-radius: 5px;'>Data for the selected date range is not available.</div>")
+            ]
+
+        # Enable or disable the button based on the row limit
+        if current_rows_display >= 20000:
+            increase_rows_button.disabled = True
+        else:
+            increase_rows_button.disabled = False
+    finally:
+        # Failed runs are recorded too
+        profile.finish()
+        if PROFILING:
+            diagnostics_pane.object = diagnostics_markdown()
 
 
 # Watch changes on date pickers and SAF slider
@@ -254,11 +342,12 @@ saf_slider.param.watch(update_data, 'value')
 
 
 # Layout
-header = pn.pane.HTML("<h2 style='color: #4caf50; text-align: center;'>Anchorage Airport: Sustainable Aviation Fuel (SAF) CO2 Reduction Calculator</h2>")
+header = pn.pane.HTML(f"<h2 style='color: #4caf50; text-align: center;'>{get_airport(AIRPORT)['city']} Airport: Sustainable Aviation Fuel (SAF) CO2 Reduction Calculator</h2>")
 widgets = pn.WidgetBox(
     pn.Row(start_date_picker, end_date_picker),
     pn.Row(saf_slider, saf_input),
-    pn.Row(file_path_input),
+    pn.Row(file_path_input, export_format_select, export_button, download_link),
+    pn.Row(export_progress, export_message),
     pn.Row(increase_rows_button),
     sizing_mode='stretch_width'
 )
@@ -271,8 +360,52 @@ main = pn.Column(
     sizing_mode='stretch_both'
 )
 
-# Trigger initial data load
-update_data()
+# Diagnostics for the last callback, shown only when profiling is enabled (PANEL_PROFILE=1)
+diagnostics_pane = pn.pane.Markdown(diagnostics_markdown())
+if PROFILING:
+    main.insert(2, pn.Card(diagnostics_pane, title='Diagnostics', collapsed=True))
+
+# SQL over the whole history of this airport (see Flight_Sql.py); read-only, one SELECT
+sql_input = pn.widgets.TextAreaInput(name='SQL', value=EXAMPLE_QUERY, height=160, sizing_mode='stretch_width')
+sql_button = pn.widgets.Button(name='Run query', button_type='success')
+sql_result = pn.Column(sizing_mode='stretch_width')
+
+def run_sql(event=None):
+    sql_button.disabled = True
+    try:
+        df = sql_query(sql_input.value, airport=AIRPORT, directory=data_directory, max_rows=MAX_DASHBOARD_ROWS)
+        sql_result.objects = [
+            pn.pane.Markdown(f"{len(df):,} rows" + (f" (first {MAX_DASHBOARD_ROWS:,} shown)" if len(df) == MAX_DASHBOARD_ROWS else "")),
+            pn.pane.DataFrame(df, index=False, sizing_mode='stretch_width'),
+        ]
+    except Exception as e:
+        sql_result.objects = [pn.pane.Alert(str(e), alert_type='danger')]
+    finally:
+        sql_button.disabled = False
+
+sql_button.on_click(run_sql)
+main.append(pn.Card(sql_input, sql_button, sql_result, title='SQL', collapsed=True, sizing_mode='stretch_width'))
+
+# Render the first view from a prebuilt warm-start artifact (see Warm_Start.py) if one matches;
+# artifacts are built for the default airport only
+def warm_start():
+    global range_aggregator, aggregated_range
+    if AIRPORT != DEFAULT_AIRPORT:
+        return False
+    artifact = load_artifact(start_date_picker.value, end_date_picker.value, current_rows_display)
+    if artifact is None or artifact['display_df'] is None:
+        return False
+    range_aggregator = artifact['aggregator']
+    aggregated_range = (start_date_picker.value, end_date_picker.value)
+    display_df = calculate_saf_reduction(artifact['display_df'].copy(), saf_slider.value)
+    update_panel.objects = summary_rows(range_aggregator.summary(saf_slider.value)) + [
+        pn.pane.DataFrame(display_df, sizing_mode='stretch_both')
+    ]
+    return True
+
+# Trigger initial data load; without an artifact, defer it until the page has loaded
+if not warm_start():
+    pn.state.onload(update_data)
 
 # Serve the app
 main.servable()
@@ -0,0 +1,216 @@
+import argparse
+import logging
+import os
+import time
+from Airports import AIRPORTS, DEFAULT_AIRPORT, airport_directory
+
+# Collection pipeline for one airport day, split into stages that can also run on their own:
+#   scrape  -> <date>_<kind>_scraped.pkl   flightera board, checkpointed per interval
+#   enrich  -> <date>_<kind>_enriched.pkl  aircraft model per flight number, codeshares collapsed
+#   compute -> <date>_<kind>.csv / .pkl    emissions, date filter and typed schema
+#   combine -> <date>_combined.*           both directions, Parquet, metadata, manifest
+# `run` does scrape, enrich and compute in one process without the intermediate files.
+# Each stage imports its dependencies when it runs, so importing this module, `status`
+# and `compute` never load Selenium or the HTTP stack.
+
+DIRECTIONS = ('arrival', 'departure')
+KINDS = {'arrival': 'arrivals', 'departure': 'departures'}
+
+
+def default_date_directory(date, airport=DEFAULT_AIRPORT):
+    return os.path.join(airport_directory(airport), date)
+
+
+# data/<date> -> data, data/airports/FAI/<date> -> data/airports/FAI
+def data_root(date_directory):
+    return os.path.dirname(os.path.normpath(date_directory))
+
+
+def stage_file(date_directory, date, flight_type, stage):
+    return os.path.join(date_directory, f"{date}_{KINDS[flight_type]}_{stage}.pkl")
+
+
+def direction_metrics(date, flight_type, airport=DEFAULT_AIRPORT):
+    from Pipeline_Metrics import PipelineMetrics
+    return PipelineMetrics(KINDS[flight_type], labels={'date': date, 'direction': flight_type, 'airport': airport})
+
+
+def scrape(date, flight_type, date_directory, metrics, airport=DEFAULT_AIRPORT):
+    from Scraper import scrape_flights
+    with metrics.stage('scrape'):
+        df = scrape_flights(date, flight_type, date_directory, metrics, airport)
+    metrics.incr('rows', len(df))
+    return df
+
+
+# Aircraft per flight number, then the codeshare pairings only the aircraft can settle
+# (the clear ones were collapsed by the scraper before the lookup)
+def enrich(df, metrics):
+    from Flight_Dedup import collapse_codeshares
+    from Scraper import enrich_aircraft
+    return collapse_codeshares(enrich_aircraft(df, metrics), metrics)
+
+
+# Emissions for the whole frame at once, then the date filter and the typed schema
+def compute(df, date, flight_type, metrics, airport=DEFAULT_AIRPORT):
+    from Emission_Factors import get_resolver
+    from Emissions import compute_emissions, flush_caches
+    from Flight_Schema import apply_schema
+    from Missing_Models import MissingModelRegistry
+    from Scraper import filter_by_date
+
+    resolver = get_resolver()
+    resolver.reset_stats()
+    with metrics.stage('emissions'):
+        df = df.copy()
+        df['CO2 Emission (kg)'] = compute_emissions(df, flight_type=flight_type, resolver=resolver, home_airport=airport)
+        flush_caches()
+        # Models without a factor of their own fell back to a series or family average
+        missing_models = MissingModelRegistry()
+        for model, count in resolver.missed_models.items():
+            missing_models.record(model, count)
+        missing_models.flush(date)
+    metrics.incr('factor_cache_hits', sum(resolver.stats.values()) - len(resolver.cache))
+    print(resolver.report())
+
+    df = filter_by_date(df, date)
+    return apply_schema(df, date, airport)
+
+
+def write_direction(df, date, date_directory, flight_type, metrics, formats=('csv', 'pkl'), airport=DEFAULT_AIRPORT):
+    from Flight_Store import write_day
+    with metrics.stage('write'):
+        for output_file in write_day(df, date, KINDS[flight_type], formats, directory=data_root(date_directory), airport=airport):
+            print(f"Updated data with CO2 emissions saved to {output_file}")
+    metrics.incr('rows_written', len(df))
+
+
+# Scrape, enrich and compute one direction of a day. The frame is returned so a caller
+# can combine it in memory; write=False skips the per-direction files
+def run_direction(date, date_directory, flight_type, write=True, airport=DEFAULT_AIRPORT):
+    start_time = time.time()
+    metrics = direction_metrics(date, flight_type, airport)
+    df = scrape(date, flight_type, date_directory, metrics, airport)
+    df = enrich(df, metrics)
+    df = compute(df, date, flight_type, metrics, airport)
+    if write:
+        write_direction(df, date, date_directory, flight_type, metrics, airport=airport)
+    print(df)
+
+    metrics.finish()
+    print(metrics.report())
+    print("Process finished --- %s seconds ---" % (time.time() - start_time))
+    return df
+
+
+# Combine both directions of a day and write the combined files once, record the factors
+# the day was computed with and add it to the manifest. Directions missing from frames
+# are read from their stored files; FileNotFoundError when one was never written.
+def combine_day(date, date_directory, metrics, frames=None, formats=None, airport=DEFAULT_AIRPORT):
+    import pandas as pd
+    from Data_Sync import get_manifest
+    from Emission_Factors import get_resolver
+    from Emissions import EMISSION_MODEL_ID
+    from Flight_Schema import apply_schema
+    from Flight_Store import OUTPUT_FORMATS, read_day, write_day, write_meta
+    from Scrape_Checkpoints import clear_checkpoints
+
+    directory = data_root(date_directory)
+    frames = dict(frames or {})
+    combine_start = time.perf_counter()
+    for flight_type in DIRECTIONS:
+        if frames.get(flight_type) is None:
+            frames[flight_type] = read_day(date, kind=KINDS[flight_type], directory=directory)
+            if frames[flight_type] is None:
+                raise FileNotFoundError(f"No {KINDS[flight_type]} for {date} in {date_directory}")
+
+    # Arrivals first, as the combined files have always been ordered
+    combined_df = pd.concat([frames['arrival'], frames['departure']], ignore_index=True)
+    combined_df = apply_schema(combined_df, date, airport)
+    metrics.record_stage('combine', time.perf_counter() - combine_start, date=date)
+    write_start = time.perf_counter()
+
+    for output_file in write_day(combined_df, date, 'combined', formats or OUTPUT_FORMATS, directory=directory, airport=airport):
+        print(f"Combined data saved to {output_file}")
+    print(combined_df)
+
+    # Record the factor table and model the day was computed with, so Reprocess.py knows what changed
+    resolver = get_resolver()
+    write_meta(date, {'factor_version': resolver.version, 'factors': resolver.factor_map(combined_df['Aircraft Info']),
+                      'emission_model': EMISSION_MODEL_ID}, directory=directory)
+
+    # Record the day in the data manifest so the dashboard picks it up without probing
+    manifest = get_manifest(directory)
+    manifest.mark_available(date)
+    manifest.save()
+    # The day is complete; a later run of it must scrape fresh boards
+    clear_checkpoints(date_directory, date)
+    metrics.record_stage('write', time.perf_counter() - write_start, date=date)
+    metrics.incr('days')
+    metrics.incr('rows', len(combined_df))
+    return combined_df
+
+
+# What exists for a day, read from the file names only
+def status(date, date_directory):
+    checkpoints = os.path.join(date_directory, 'checkpoints')
+    checkpoint_names = os.listdir(checkpoints) if os.path.isdir(checkpoints) else []
+    lines = [f"{date} ({date_directory})"]
+    for flight_type in DIRECTIONS:
+        kind = KINDS[flight_type]
+        intervals = sum(1 for name in checkpoint_names if name.startswith(f"{date}_{flight_type}_"))
+        stages = [stage for stage in ('scraped', 'enriched') if os.path.exists(stage_file(date_directory, date, flight_type, stage))]
+        written = os.path.exists(os.path.join(date_directory, f"{date}_{kind}.pkl"))
+        lines.append(f"  {kind}: {intervals} interval checkpoints, stages [{', '.join(stages)}], output {'written' if written else 'missing'}")
+    formats = [ext for ext in ('csv', 'pkl', 'parquet') if os.path.exists(os.path.join(date_directory, f"{date}_combined.{ext}"))]
+    lines.append(f"  combined: [{', '.join(formats)}]")
+    return '\n'.join(lines)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Run the flight collection pipeline, or single stages of it, for one day")
+    subparsers = parser.add_subparsers(dest='command', required=True)
+    for command, help_text in (('run', "Scrape, enrich and compute one direction"),
+                               ('scrape', "Scrape the flightera board into the scraped stage file"),
+                               ('enrich', "Add aircraft models to the scraped stage file"),
+                               ('compute', "Compute emissions from the enriched stage file and write the direction"),
+                               ('combine', "Combine both directions into the day's combined files"),
+                               ('status', "Show which checkpoints, stage files and outputs exist")):
+        command_parser = subparsers.add_parser(command, help=help_text)
+        command_parser.add_argument('date', help="YYYY-MM-DD")
+        if command not in ('combine', 'status'):
+            command_parser.add_argument('direction', choices=DIRECTIONS)
+        command_parser.add_argument('--airport', default=DEFAULT_AIRPORT, choices=sorted(AIRPORTS), help="IATA code of the airport")
+        command_parser.add_argument('--directory', help="Day directory (default the airport's <data>/<date>)")
+        if command == 'combine':
+            command_parser.add_argument('--formats', default='csv,pkl,parquet', help="Comma-separated combined formats to write")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    date_directory = args.directory or default_date_directory(args.date, args.airport)
+    if args.command == 'status':
+        print(status(args.date, date_directory))
+    elif args.command == 'run':
+        os.makedirs(date_directory, exist_ok=True)
+        run_direction(args.date, date_directory, args.direction, airport=args.airport)
+    elif args.command == 'combine':
+        from Pipeline_Metrics import PipelineMetrics
+        metrics = PipelineMetrics('combine', labels={'date': args.date, 'airport': args.airport})
+        combine_day(args.date, date_directory, metrics, formats=args.formats.split(','), airport=args.airport)
+        metrics.finish()
+        print(metrics.report())
+    else:
+        import pandas as pd
+        metrics = direction_metrics(args.date, args.direction, args.airport)
+        if args.command == 'scrape':
+            os.makedirs(date_directory, exist_ok=True)
+            scrape(args.date, args.direction, date_directory, metrics, args.airport).to_pickle(stage_file(date_directory, args.date, args.direction, 'scraped'))
+        elif args.command == 'enrich':
+            df = pd.read_pickle(stage_file(date_directory, args.date, args.direction, 'scraped'))
+            enrich(df, metrics).to_pickle(stage_file(date_directory, args.date, args.direction, 'enriched'))
+        else:
+            df = pd.read_pickle(stage_file(date_directory, args.date, args.direction, 'enriched'))
+            write_direction(compute(df, args.date, args.direction, metrics, args.airport), args.date, date_directory, args.direction, metrics,
+                            airport=args.airport)
+        metrics.finish()
+        print(metrics.report())
@@ -0,0 +1,90 @@
+import json
+import os
+import socket
+import time
+from contextlib import contextmanager
+
+# Per-stage timings and counters for the collection pipeline.
+# Every finished stage is appended to metrics/pipeline.jsonl as one JSON line (one
+# write per line, so concurrent processes do not interleave), and write_prometheus()
+# renders the run's totals in the Prometheus textfile-collector format.
+
+metrics_directory = 'metrics'
+
+
+class PipelineMetrics:
+    def __init__(self, job, labels=None, directory=None):
+        self.job = job
+        self.labels = dict(labels or {})
+        self.directory = directory or metrics_directory
+        self.run_id = f"{job}-{int(time.time())}-{os.getpid()}"
+        self.stage_seconds = {}
+        self.stage_calls = {}
+        self.counters = {}
+        os.makedirs(self.directory, exist_ok=True)
+        self.jsonl_path = os.path.join(self.directory, 'pipeline.jsonl')
+
+    def emit(self, event, **fields):
+        record = {'ts': round(time.time(), 3), 'run': self.run_id, 'job': self.job, 'host': socket.gethostname(),
+                  'event': event, **self.labels, **fields}
+        with open(self.jsonl_path, 'a', encoding='utf-8') as f:
+            f.write(json.dumps(record, default=str) + '\n')
+
+    # Time a block; extra labels (e.g. interval='02_00') go to the JSON line only
+    @contextmanager
+    def stage(self, name, **labels):
+        start = time.perf_counter()
+        ok = True
+        try:
+            yield
+        except BaseException:
+            ok = False
+            raise
+        finally:
+            self.record_stage(name, time.perf_counter() - start, ok=ok, **labels)
+
+    # Record a stage timed by the caller (for blocks that cannot be wrapped in stage())
+    def record_stage(self, name, seconds, ok=True, **labels):
+        self.stage_seconds[name] = self.stage_seconds.get(name, 0.0) + seconds
+        self.stage_calls[name] = self.stage_calls.get(name, 0) + 1
+        self.emit('stage', stage=name, seconds=round(seconds, 4), ok=ok, **labels)
+
+    def incr(self, counter, amount=1):
+        self.counters[counter] = self.counters.get(counter, 0) + amount
+
+    def _label_string(self, extra=None):
+        labels = {'job': self.job, **self.labels, **(extra or {})}
+        return ','.join(f'{key}="{str(value)}"' for key, value in labels.items())
+
+    # Write the last run's totals for the node_exporter textfile collector (one file per job)
+    def write_prometheus(self, path=None):
+        path = path or os.path.join(self.directory, f"{self.job}.prom")
+        lines = [
+            '# HELP pipeline_stage_seconds Wall time spent per pipeline stage in the last run.',
+            '# TYPE pipeline_stage_seconds gauge',
+        ]
+        for name, seconds in self.stage_seconds.items():
+            lines.append(f"pipeline_stage_seconds{{{self._label_string({'stage': name})}}} {seconds:.4f}")
+        lines += ['# HELP pipeline_stage_calls Number of times each stage ran in the last run.', '# TYPE pipeline_stage_calls gauge']
+        for name, calls in self.stage_calls.items():
+            lines.append(f"pipeline_stage_calls{{{self._label_string({'stage': name})}}} {calls}")
+        lines += ['# HELP pipeline_events Pipeline counters for the last run (rows, retries, driver restarts, cache hits).', '# TYPE pipeline_events gauge']
+        for name, value in self.counters.items():
+            lines.append(f"pipeline_events{{{self._label_string({'counter': name})}}} {value}")
+        lines += ['# HELP pipeline_last_run_timestamp_seconds When this job last finished.', '# TYPE pipeline_last_run_timestamp_seconds gauge',
+                  f"pipeline_last_run_timestamp_seconds{{{self._label_string()}}} {time.time():.0f}"]
+        temp_path = f"{path}.{os.getpid()}.tmp"
+        with open(temp_path, 'w', encoding='utf-8') as f:
+            f.write('\n'.join(lines) + '\n')
+        os.replace(temp_path, path)
+        return path
+
+    # Emit the run summary line and the Prometheus textfile
+    def finish(self):
+        self.emit('summary', stages={k: round(v, 3) for k, v in self.stage_seconds.items()}, counters=self.counters)
+        return self.write_prometheus()
+
+    def report(self):
+        stages = ', '.join(f"{name} {seconds:.1f}s" for name, seconds in sorted(self.stage_seconds.items(), key=lambda item: -item[1]))
+        counters = ', '.join(f"{name} {value}" for name, value in self.counters.items())
+        return f"Stages: {stages}\nCounters: {counters}"
@@ -0,0 +1,142 @@
+import argparse
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+import pandas as pd
+from Airports import AIRPORTS, DEFAULT_AIRPORT, airport_directory
+from Emission_Factors import get_resolver
+from Emissions import EMISSION_MODEL_ID, LEGACY_EMISSION_MODEL_ID, compute_emissions
+from Flight_Schema import apply_schema
+from Flight_Store import OUTPUT_FORMATS, day_file, read_meta, write_day, write_meta
+
+# Recompute 'CO2 Emission (kg)' for stored days after emission factors change, without
+# rescraping. Each day records the factor table version and the factor every aircraft
+# model was charged (data/<date>/<date>_meta.json), so only rows whose model's factor
+# changed are recomputed. Days computed with another emission model (Emissions.py
+# EMISSION_MODEL_ID) are recomputed in full. Routes are resolved relative to the airport
+# whose days are reprocessed. Days are processed in parallel across processes.
+# Recomputing does not reproduce every stored number: models resolved to other factors
+# since a day was written change its rows (1,743 of the 32,512 rows of Q1 2023, e.g.
+# Boeing 777-F stored at about 9.05 kg/km, now 12.5). --dry-run reports the changes per
+# aircraft model without writing anything.
+
+KINDS = ['arrivals', 'departures', 'combined']
+
+
+# Per-model changes of one frame: rows, stored and recomputed kg, recorded and current factor
+def model_changes(models, old, recomputed, changed, recorded, current):
+    changes = {}
+    frame = pd.DataFrame({'model': models, 'old': old.astype('Float64'), 'new': recomputed.astype('Float64')})[changed]
+    for model, rows in frame.groupby('model', observed=True):
+        changes[model] = {'rows': len(rows), 'old_kg': float(rows['old'].sum()), 'new_kg': float(rows['new'].sum()),
+                          'old_factor': recorded.get(model), 'new_factor': current.get(model)}
+    return changes
+
+
+def merge_changes(total, changes):
+    for model, change in changes.items():
+        merged = total.setdefault(model, {**change, 'rows': 0, 'old_kg': 0.0, 'new_kg': 0.0})
+        for key in ('rows', 'old_kg', 'new_kg'):
+            merged[key] += change[key]
+    return total
+
+
+def reprocess_day(date, directory=None, force=False, dry_run=False, airport=DEFAULT_AIRPORT):
+    directory = directory or airport_directory(airport)
+    resolver = get_resolver()
+    meta = read_meta(date, directory)
+    recorded = meta.get('factors', {})
+    # Legacy days have no recorded model: they were computed with the original flat one
+    force = force or meta.get('emission_model', LEGACY_EMISSION_MODEL_ID) != EMISSION_MODEL_ID
+    if not force and meta.get('factor_version') == resolver.version:
+        return date, 0, 'up to date', {}
+
+    # Rows are counted once: from the combined file when the day has one
+    counted_kinds = ['combined'] if os.path.exists(day_file(date, 'combined', 'pkl', directory)) else ['arrivals', 'departures']
+    changed_rows = 0
+    changes = {}
+    written_factors = {}
+    for kind in KINDS:
+        pickle_file = day_file(date, kind, 'pkl', directory)
+        if not os.path.exists(pickle_file):
+            continue
+        df = pd.read_pickle(pickle_file)
+        if df.empty or 'Aircraft Info' not in df:
+            continue
+        current = resolver.factor_map(df['Aircraft Info'])
+        written_factors.update(current)
+
+        # Without a recorded factor (legacy days) every model is treated as changed
+        stale_models = [model for model, factor in current.items() if force or recorded.get(model) != factor]
+        stale = df['Aircraft Info'].isin(stale_models)
+        if not stale.any():
+            continue
+        flight_type = {'arrivals': 'arrival', 'departures': 'departure'}.get(kind)
+        recomputed = compute_emissions(df[stale], flight_type=flight_type, resolver=resolver, home_airport=airport)
+        old = pd.to_numeric(df.loc[stale, 'CO2 Emission (kg)'], errors='coerce').astype('Int64')
+        changed = recomputed.ne(old).fillna(recomputed.notna() | old.notna()).astype(bool)
+        if kind in counted_kinds:
+            changed_rows += int(changed.sum())
+            merge_changes(changes, model_changes(df.loc[stale, 'Aircraft Info'].astype(str), old, recomputed, changed, recorded, current))
+        if dry_run or not changed.any():
+            continue
+
+        df = apply_schema(df, date, airport)
+        df.loc[stale, 'CO2 Emission (kg)'] = recomputed
+        # Rewrite the formats the day already has, atomically
+        formats = [ext for ext in OUTPUT_FORMATS if os.path.exists(day_file(date, kind, ext, directory))]
+        write_day(df, date, kind, formats, directory, airport)
+
+    if not dry_run:
+        write_meta(date, {**meta, 'factor_version': resolver.version, 'factors': written_factors,
+                          'emission_model': EMISSION_MODEL_ID}, directory)
+    return date, changed_rows, 'reprocessed', changes
+
+
+# Without a recorded factor (legacy days) the stored one is estimated from the totals,
+# as both were charged over the same routes
+def print_changes(changes):
+    print(f"{'Aircraft model':<40} {'rows':>7} {'factor':>16} {'stored t':>10} {'recomputed t':>13}")
+    for model, change in sorted(changes.items(), key=lambda item: -item[1]['rows']):
+        if change['old_factor'] is not None:
+            old_factor = f"{change['old_factor']:.2f}"
+        elif change['new_factor'] and change['new_kg']:
+            old_factor = f"~{change['new_factor'] * change['old_kg'] / change['new_kg']:.2f}"
+        else:
+            old_factor = 'none'
+        new_factor = 'none' if change['new_factor'] is None else f"{change['new_factor']:.2f}"
+        print(f"{model[:40]:<40} {change['rows']:>7} {old_factor + ' -> ' + new_factor:>16} "
+              f"{change['old_kg'] / 1000:>10,.1f} {change['new_kg'] / 1000:>13,.1f}")
+
+
+def reprocess(date_range_list, directory=None, workers=None, force=False, dry_run=False, airport=DEFAULT_AIRPORT):
+    start_time = time.time()
+    total_changed = 0
+    changes = {}
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        futures = [executor.submit(reprocess_day, date, directory, force, dry_run, airport) for date in date_range_list]
+        for future in futures:
+            date, changed_rows, status, day_changes = future.result()
+            total_changed += changed_rows
+            merge_changes(changes, day_changes)
+            if changed_rows:
+                print(f"{date}: {changed_rows} rows changed ({status})")
+    if dry_run and changes:
+        print_changes(changes)
+    action = "would change" if dry_run else "changed"
+    print(f"Reprocessed {len(date_range_list)} days, {action} {total_changed} rows "
+          f"--- {time.time() - start_time:.1f} seconds ---")
+    return total_changed, changes
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Recompute stored CO2 emissions with the current emission factors")
+    parser.add_argument('start_date')
+    parser.add_argument('end_date')
+    parser.add_argument('--airport', default=DEFAULT_AIRPORT, choices=sorted(AIRPORTS), help="IATA code of the airport")
+    parser.add_argument('--workers', type=int, default=None, help="Worker processes (default: one per CPU)")
+    parser.add_argument('--force', action='store_true', help="Recompute every row, even if its factor did not change")
+    parser.add_argument('--dry-run', action='store_true', help="Report what would change without writing")
+    args = parser.parse_args()
+    dates = pd.date_range(args.start_date, args.end_date).strftime("%Y-%m-%d").tolist()
+    reprocess(dates, workers=args.workers, force=args.force, dry_run=args.dry_run, airport=args.airport)
@@ -0,0 +1,69 @@
+import os
+import pickle
+
+# Interval-level checkpoints for the flightera scrape.
+# Every interval that was loaded and parsed is saved on its own as
+# <date directory>/checkpoints/<date>_<direction>_<interval>.pkl, so a crashed or
+# interrupted run only has to fetch the windows that have no checkpoint yet, and the
+# day's frame is always assembled from the checkpoints in interval order.
+# An interval with no flights still gets a checkpoint (an empty list of rows).
+# Checkpoints only carry a day through an interrupted run: once the day is combined they
+# are removed, so scraping it again later fetches fresh boards.
+
+
+def checkpoint_directory(date_directory):
+    return os.path.join(date_directory, 'checkpoints')
+
+
+def checkpoint_path(date_directory, date, direction, interval):
+    return os.path.join(checkpoint_directory(date_directory), f"{date}_{direction}_{interval}.pkl")
+
+
+def write_checkpoint(date_directory, date, direction, interval, rows):
+    os.makedirs(checkpoint_directory(date_directory), exist_ok=True)
+    path = checkpoint_path(date_directory, date, direction, interval)
+    temp_path = f"{path}.{os.getpid()}.tmp"
+    with open(temp_path, 'wb') as f:
+        pickle.dump(rows, f, protocol=pickle.HIGHEST_PROTOCOL)
+    os.replace(temp_path, path)  # A checkpoint is either complete or absent
+
+
+def read_checkpoint(date_directory, date, direction, interval):
+    path = checkpoint_path(date_directory, date, direction, interval)
+    if not os.path.exists(path):
+        return None
+    try:
+        with open(path, 'rb') as f:
+            return pickle.load(f)
+    except (OSError, EOFError, pickle.UnpicklingError):
+        return None
+
+
+def completed_intervals(date_directory, date, direction, intervals):
+    return [interval for interval in intervals if read_checkpoint(date_directory, date, direction, interval) is not None]
+
+
+# All checkpointed rows of a day and direction, in interval order
+def load_checkpoints(date_directory, date, direction, intervals):
+    rows = []
+    for interval in intervals:
+        interval_rows = read_checkpoint(date_directory, date, direction, interval)
+        if interval_rows is not None:
+            rows.extend(interval_rows)
+    return rows
+
+
+# Remove a day's checkpoints, for one direction or both
+def clear_checkpoints(date_directory, date, direction=None):
+    directory = checkpoint_directory(date_directory)
+    if not os.path.isdir(directory):
+        return 0
+    prefix = f"{date}_{direction}_" if direction else f"{date}_"
+    removed = 0
+    for name in os.listdir(directory):
+        if name.startswith(prefix) and name.endswith('.pkl'):
+            os.remove(os.path.join(directory, name))
+            removed += 1
+    if not os.listdir(directory):
+        os.rmdir(directory)
+    return removed
@@ -0,0 +1,161 @@
+import json
+import os
+import time
+from collections import deque
+import numpy as np
+from File_Lock import file_lock
+
+# Latency-aware timeouts and a circuit breaker for the flightera page loads.
+# Successful load and table-wait times are kept in a small rolling history
+# (metrics/scrape_latency.json, shared by both scrapers), and each timeout is a
+# multiple of a recent high percentile, clamped between a floor and the old fixed
+# timeout. When most recent intervals fail the breaker opens and the scrape queue is
+# paused with exponential backoff, instead of restarting Chrome for every interval
+# while the site is degraded. Once the pause budget is used up the rest of the day is
+# left for a rerun.
+
+history_path = os.path.join('metrics', 'scrape_latency.json')
+
+# The fixed timeouts the scrapers used before; they stay as the ceilings
+FIXED_TIMEOUTS = {'load': 150, 'table': 30}
+TIMEOUT_FLOORS = {'load': 20, 'table': 5}
+
+
+class LatencyTracker:
+    def __init__(self, path=None, window=200, min_samples=8, percentile=95, headroom=2.0):
+        self.path = path or history_path
+        self.window = window
+        self.min_samples = min_samples
+        self.percentile = percentile
+        self.headroom = headroom
+        self.samples = {kind: deque(maxlen=window) for kind in FIXED_TIMEOUTS}
+        self.new_samples = {kind: [] for kind in FIXED_TIMEOUTS}
+        for kind, values in self._read().items():
+            if kind in self.samples:
+                self.samples[kind].extend(values)
+
+    def _read(self):
+        if not os.path.exists(self.path):
+            return {}
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def record(self, kind, seconds):
+        self.samples[kind].append(seconds)
+        self.new_samples[kind].append(seconds)
+
+    # Too few samples to judge: fall back to the fixed timeout
+    def timeout(self, kind):
+        samples = self.samples[kind]
+        if len(samples) < self.min_samples:
+            return FIXED_TIMEOUTS[kind]
+        estimate = np.percentile(samples, self.percentile) * self.headroom
+        return float(np.clip(estimate, TIMEOUT_FLOORS[kind], FIXED_TIMEOUTS[kind]))
+
+    # Append this run's samples to the shared history (the other scraper may have written too)
+    def save(self):
+        os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+        with file_lock(f"{self.path}.lock"):
+            history = self._read()
+            for kind, values in self.new_samples.items():
+                history[kind] = (history.get(kind, []) + [round(v, 3) for v in values])[-self.window:]
+            temp_path = f"{self.path}.{os.getpid()}.tmp"
+            with open(temp_path, 'w', encoding='utf-8') as f:
+                json.dump(history, f)
+            os.replace(temp_path, self.path)
+        self.new_samples = {kind: [] for kind in FIXED_TIMEOUTS}
+
+
+# closed -> open when the recent failure rate crosses the threshold; after the cooldown
+# one probe is let through (half open), which closes the breaker or reopens it for longer
+class CircuitBreaker:
+    def __init__(self, window=6, min_calls=3, failure_threshold=0.5, cooldown=60, max_cooldown=480, max_paused=900):
+        self.results = deque(maxlen=window)
+        self.min_calls = min_calls
+        self.failure_threshold = failure_threshold
+        self.base_cooldown = cooldown
+        self.cooldown = cooldown
+        self.max_cooldown = max_cooldown
+        self.max_paused = max_paused
+        self.state = 'closed'
+        self.opened_at = None
+        self.trips = 0
+        self.paused_seconds = 0.0
+
+    def record(self, ok):
+        if self.state == 'half_open':
+            if ok:
+                self.state = 'closed'
+                self.results.clear()
+                self.cooldown = self.base_cooldown
+            else:
+                self.cooldown = min(self.cooldown * 2, self.max_cooldown)
+                self._open()
+            return
+        self.results.append(ok)
+        failures = self.results.count(False)
+        if len(self.results) >= self.min_calls and failures / len(self.results) >= self.failure_threshold:
+            self._open()
+
+    def _open(self):
+        self.state = 'open'
+        self.opened_at = time.monotonic()
+        self.trips += 1
+
+    # Block while the breaker is open; False once the pause budget for the run is spent
+    def allow(self, sleep=time.sleep):
+        if self.state != 'open':
+            return True
+        remaining = self.opened_at + self.cooldown - time.monotonic()
+        if self.paused_seconds + max(remaining, 0) > self.max_paused:
+            return False
+        if remaining > 0:
+            sleep(remaining)
+            self.paused_seconds += remaining
+        self.state = 'half_open'
+        return True
+
+
+class ScrapePolicy:
+    def __init__(self, tracker=None, breaker=None):
+        self.tracker = tracker or LatencyTracker()
+        self.breaker = breaker or CircuitBreaker()
+        self.timeout_seconds_saved = 0.0
+        self.timeouts = 0
+        self.abandoned_intervals = 0
+
+    def timeout(self, kind):
+        return self.tracker.timeout(kind)
+
+    def observe(self, kind, seconds):
+        self.tracker.record(kind, seconds)
+
+    # A wait that hit the adaptive timeout would have run to the fixed one before
+    def timed_out(self, kind, waited):
+        self.timeouts += 1
+        self.timeout_seconds_saved += max(FIXED_TIMEOUTS[kind] - waited, 0)
+
+    def interval_done(self, ok):
+        self.breaker.record(ok)
+
+    def allow(self):
+        return self.breaker.allow()
+
+    def abandon(self, intervals):
+        self.abandoned_intervals += intervals
+
+    # Wall time saved against the fixed policy: shorter timeouts minus the time spent paused.
+    # Abandoned intervals are not counted: their work is deferred to a rerun, not saved.
+    def seconds_saved(self):
+        return self.timeout_seconds_saved - self.breaker.paused_seconds
+
+    def save(self):
+        self.tracker.save()
+
+    def report(self):
+        return (f"Scrape policy: load timeout {self.timeout('load'):.0f}s, table timeout {self.timeout('table'):.0f}s, "
+                f"{self.timeouts} timeouts, {self.breaker.trips} breaker trips, {self.breaker.paused_seconds:.0f}s paused, "
+                f"~{self.seconds_saved():.0f}s saved vs fixed timeouts; {self.abandoned_intervals} intervals left for a rerun")
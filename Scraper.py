@@ -0,0 +1,319 @@
+import atexit
+import logging
+import os
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import datetime
+import pandas as pd
+from Airports import DEFAULT_AIRPORT, flightera_url
+from Flight_Dedup import collapse_codeshares, deduplicate
+from Flight_Parser import parse_rows, save_page
+from Scrape_Policy import ScrapePolicy
+from Scrape_Checkpoints import completed_intervals, load_checkpoints, write_checkpoint
+from Shared_Cache import SharedCache
+
+# Flight collection from the web: an airport's flightera departure/arrival boards
+# (Selenium) and the aircraft model of each flight number (Radarbox). Selenium, webdriver_manager,
+# requests and the HTML parsers are imported inside the functions that use them, so the
+# rest of the pipeline can import this module without loading a browser stack.
+
+logger = logging.getLogger(__name__)
+
+driver = None
+
+# Aircraft model per flight number, shared by all airports and directions. Radarbox only
+# reports the current aircraft, so entries expire after a day
+AIRCRAFT_CACHE_TTL = 24 * 60 * 60
+
+# Two-hour windows of the flightera board
+TIME_INTERVALS = ["00_00", "02_00", "04_00", "06_00", "08_00", "10_00", "12_00", "14_00", "16_00", "18_00", "20_00", "22_00"]
+
+
+def filter_by_date(df, date):
+    # Convert the date from '2024-06-21' to '23 Jun'
+    target_date = datetime.strptime(date, '%Y-%m-%d').strftime('%d %b')
+    
+    # Extract the date part from the 'Date & Status' column and convert to '23 Jun'
+    df['Extracted Date'] = df['Date & Status'].apply(lambda x: ' '.join(x.split()[:2]))
+    
+    # Filter the DataFrame to keep only rows where the extracted date matches the specified date
+    filtered_df = df[df['Extracted Date'] == target_date]
+    
+    # Drop the temporary 'Extracted Date' column
+    filtered_df = filtered_df.drop(columns=['Extracted Date'])
+    
+    return filtered_df
+
+# Cleanup function to close the driver
+def cleanup():
+    if driver:
+        driver.quit()
+
+atexit.register(cleanup)
+
+# Scrape one day of the board; flight_type is 'arrival' or 'departure'
+def scrape_flights(date, flight_type, date_directory, metrics, airport=DEFAULT_AIRPORT):
+    global driver
+    from selenium import webdriver
+    from selenium.webdriver.common.by import By
+    from selenium.webdriver.chrome.service import Service as ChromeService
+    from selenium.webdriver.chrome.options import Options
+    from selenium.webdriver.support.ui import WebDriverWait
+    from selenium.webdriver.support import expected_conditions as EC
+    from selenium.common.exceptions import WebDriverException, TimeoutException, InvalidSessionIdException, NoSuchWindowException
+    from webdriver_manager.chrome import ChromeDriverManager
+
+    base_url = flightera_url(airport, flight_type, date)
+    # Page sources are kept for the parse benchmark when SCRAPE_PAGES_DIRECTORY is set
+    pages_directory = os.path.join(os.environ['SCRAPE_PAGES_DIRECTORY'], airport) if os.environ.get('SCRAPE_PAGES_DIRECTORY') else None
+    
+    # Set up Chrome options to suppress SSL errors and logging
+    options = Options()
+    options.add_argument('--ignore-certificate-errors')
+    options.add_argument('--ignore-ssl-errors')
+    options.add_argument('--disable-gpu')
+    options.add_argument('--log-level=3')  # Suppress logs
+    options.page_load_strategy = 'eager'  # Load page faster by waiting for document ready state
+    
+    retries = 3
+    def initialize_driver():
+        global driver
+        with metrics.stage('driver_start'):
+            for attempt in range(retries):
+                try:
+                    driver = webdriver.Chrome(service=ChromeService(ChromeDriverManager().install()), options=options)
+                    break
+                except WebDriverException as e:
+                    if attempt < retries - 1:
+                        metrics.incr('retries')
+                        time.sleep(3)  # wait for a few seconds before retrying
+                    else:
+                        raise e
+
+    def restart_driver():
+        metrics.incr('driver_restarts')
+        driver.quit()
+        initialize_driver()
+
+    # Adaptive timeouts and circuit breaker, tuned by the recent page-load history
+    policy = ScrapePolicy()
+
+    # Intervals parsed by an earlier run are not fetched again
+    checkpointed = completed_intervals(date_directory, date, flight_type, TIME_INTERVALS)
+    metrics.incr('intervals_from_checkpoint', len(checkpointed))
+
+    # Errors after which the browser session cannot be used any more
+    def session_lost(error):
+        if isinstance(error, (InvalidSessionIdException, NoSuchWindowException)):
+            return True
+        message = str(error).lower()
+        return any(sign in message for sign in ('not reachable', 'disconnected', 'session deleted', 'no such session'))
+
+    def load_page(url, errors):
+        try:
+            driver.get(url)
+        except WebDriverException as e:
+            errors.append(e)
+
+    # Load and parse one interval. Returns (rows, None when the interval failed; and
+    # whether the browser has to be replaced before the next interval)
+    def fetch_interval(interval):
+        url = f"{base_url}%20{interval}?"
+
+        load_timeout = policy.timeout('load')
+        load_start = time.perf_counter()
+        load_errors = []
+        with metrics.stage('interval_load', interval=interval):
+            page_thread = threading.Thread(target=load_page, args=(url, load_errors))
+            page_thread.start()
+            page_thread.join(timeout=load_timeout)
+
+        if page_thread.is_alive():
+            metrics.incr('interval_timeouts')
+            policy.timed_out('load', load_timeout)
+            logger.warning(f"Timeout after {load_timeout:.0f}s while loading interval {interval}.")
+            return None, True  # The driver is still blocked in the hung load
+        if load_errors:
+            logger.warning(f"Error while loading interval {interval}: {load_errors[0]}")
+            return None, session_lost(load_errors[0])
+        policy.observe('load', time.perf_counter() - load_start)
+
+        table_timeout = policy.timeout('table')
+        table_start = time.perf_counter()
+        try:
+            with metrics.stage('table_wait', interval=interval):
+                WebDriverWait(driver, table_timeout).until(
+                    EC.presence_of_element_located((By.CLASS_NAME, 'min-w-full'))
+                )
+        except TimeoutException:
+            metrics.incr('table_timeouts')
+            policy.timed_out('table', table_timeout)
+            logger.warning(f"Timeout after {table_timeout:.0f}s while waiting for the table of interval {interval}")
+            return None, False
+        except WebDriverException as e:
+            logger.warning(f"Error while waiting for the table of interval {interval}: {e}")
+            return None, session_lost(e)
+        policy.observe('table', time.perf_counter() - table_start)
+
+        # Extract the flight rows (Flight_Parser.py picks the fastest installed backend)
+        try:
+            page_source = driver.page_source
+            if pages_directory:
+                save_page(pages_directory, f"{date}_{flight_type}_{interval}", page_source)
+            parse_start = time.perf_counter()
+            interval_flights = parse_rows(page_source)
+            metrics.record_stage('parse', time.perf_counter() - parse_start, interval=interval, rows=len(interval_flights))
+            metrics.incr('rows_parsed', len(interval_flights))
+        except InvalidSessionIdException:
+            logger.warning(f"Invalid session ID while processing interval {interval}.")
+            return None, True
+        except Exception as e:
+            logger.error(f"Error while processing interval {interval}: {e}")
+            return None, isinstance(e, WebDriverException) and session_lost(e)
+
+        # Close the current tab after processing
+        if len(driver.window_handles) > 1:
+            driver.close()
+            driver.switch_to.window(driver.window_handles[0])
+        return interval_flights, False
+
+    # Failed intervals go to the back of the queue and are retried a limited number of times
+    max_attempts = 2
+    pending = deque((interval, 1) for interval in TIME_INTERVALS if interval not in checkpointed)
+    if pending:
+        initialize_driver()
+    while pending:
+        if not policy.allow():
+            logger.warning(f"Flightera keeps failing; leaving {len(pending)} intervals for a rerun")
+            metrics.incr('intervals_abandoned', len(pending))
+            policy.abandon(len(pending))
+            break
+        interval, attempt = pending.popleft()
+        interval_flights, session_fatal = fetch_interval(interval)
+        trips = policy.breaker.trips
+        policy.interval_done(interval_flights is not None)
+        if interval_flights is None:
+            if attempt < max_attempts:
+                pending.append((interval, attempt + 1))
+            else:
+                metrics.incr('intervals_failed')
+            # The same browser carries on after an ordinary failure; it is only replaced
+            # when its session is gone, or when the breaker trips and the scrape pauses
+            if session_fatal or policy.breaker.trips > trips:
+                restart_driver()
+            continue
+        write_checkpoint(date_directory, date, flight_type, interval, interval_flights)
+
+    policy.save()
+    metrics.incr('breaker_trips', policy.breaker.trips)
+    metrics.incr('timeout_seconds_saved', round(policy.seconds_saved()))
+    logger.info(policy.report())
+
+    if driver:
+        driver.quit()
+        driver = None
+
+    # Assemble the day from the interval checkpoints, old and new
+    all_flights = load_checkpoints(date_directory, date, flight_type, TIME_INTERVALS)
+
+    # Create DataFrame and remove rows with "Unknown" or "Cancelled" status
+    if flight_type == "arrival":
+        df = pd.DataFrame(all_flights, columns=['Date & Status', 'Primary Flight Number', 'Flight Number', 'Airline', 'Origin', 'Status'])
+    else:
+        df = pd.DataFrame(all_flights, columns=['Date & Status', 'Primary Flight Number', 'Flight Number', 'Airline', 'Destination', 'Status'])
+    
+    df = df[~df['Status'].str.lower().isin(['unknown', 'cancelled'])]  # Filter out rows with "Unknown" or "Cancelled" status
+    df = df.drop_duplicates()  # Exact repeats
+    # Flights of the neighbouring days, and the same flight seen in two windows
+    df = deduplicate(df, date, flight_type, metrics, airport)
+    # One row per physical flight where that is clear already, so codeshares are not looked up
+    df = collapse_codeshares(df, metrics, aircraft=cached_aircraft(df['Primary Flight Number'].unique()))
+
+    return df
+
+# Function to get aircraft details from Radarbox using flight number with retry logic
+def get_aircraft_details(flight_number, retries=3):
+    import requests
+    from requests.adapters import HTTPAdapter
+    from urllib3.util.retry import Retry
+    from bs4 import BeautifulSoup
+
+    url = f"https://www.radarbox.com/data/flights/{flight_number}"
+    session = requests.Session()
+    retry = Retry(total=retries, backoff_factor=1, status_forcelist=[429, 500, 502, 503, 504])
+    adapter = HTTPAdapter(max_retries=retry)
+    session.mount('http://', adapter)
+    session.mount('https://', adapter)
+
+    try:
+        response = session.get(url)
+        response.raise_for_status()  # Raise HTTPError for bad responses (4xx and 5xx)
+        time.sleep(0.1)  # Adding a small delay between requests to avoid getting rate-limited
+    except requests.exceptions.RequestException as e:
+        logger.error(f"Failed to get data for {flight_number}: {e}")
+        return flight_number, 'Unknown'
+
+    soup = BeautifulSoup(response.text, 'html.parser')
+
+    try:
+        # Locate the div containing the aircraft model
+        aircraft_info = soup.find('div', id='model')
+        if aircraft_info:
+            model_info = aircraft_info.get('title', 'Unknown')
+            logger.info(f"Successfully fetched model for flight number {flight_number}: {model_info}")
+            return flight_number, model_info
+    except (AttributeError, IndexError) as e:
+        logger.error(f"Error parsing details for {flight_number}: {e}")
+
+    return flight_number, 'Unknown'
+
+# Function to process flight numbers concurrently
+def process_flight_numbers_concurrently(flight_numbers, max_workers=50):
+    results = []
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        future_to_flight_number = {executor.submit(get_aircraft_details, flight_number): flight_number for flight_number in flight_numbers}
+        for future in as_completed(future_to_flight_number):
+            flight_number = future_to_flight_number[future]
+            try:
+                result = future.result()
+                results.append(result)
+            except Exception as e:
+                logger.error(f"Exception for {flight_number}: {e}")
+                results.append((flight_number, 'Unknown'))
+    return results
+
+
+def aircraft_cache():
+    return SharedCache('aircraft_models', ttl=AIRCRAFT_CACHE_TTL)
+
+
+# Models of the flight numbers resolved within the last day
+def cached_aircraft(flight_numbers, cache=None):
+    cache = cache or aircraft_cache()
+    return {number: cache.get(number) for number in flight_numbers if number in cache}
+
+
+# Add 'Aircraft Info' to a scraped frame, looking up each flight number once. Flight
+# numbers another airport or direction resolved within the last day come from the cache
+def enrich_aircraft(df, metrics):
+    cache = aircraft_cache()
+    flight_numbers = df['Primary Flight Number'].unique()
+    models = cached_aircraft(flight_numbers, cache)
+    to_fetch = [number for number in flight_numbers if number not in models]
+    with metrics.stage('enrichment'):
+        results = process_flight_numbers_concurrently(to_fetch) if to_fetch else []
+    metrics.incr('aircraft_lookups', len(to_fetch))
+    metrics.incr('aircraft_lookup_cache_hits', len(df) - len(to_fetch))  # Rows served by another row's lookup or the shared cache
+    metrics.incr('aircraft_lookup_failures', sum(1 for _, model in results if model == 'Unknown'))
+
+    for flight_number, model in results:
+        models[flight_number] = model
+        if model != 'Unknown':
+            cache.set(flight_number, model)
+    cache.flush()
+
+    df = df.copy()
+    df['Aircraft Info'] = df['Primary Flight Number'].map(models)
+    return df
@@ -0,0 +1,66 @@
+import json
+import os
+import time
+from File_Lock import file_lock
+
+# Small key/value caches shared by every airport and process, stored as JSON under
+# cache/. Lookups and inserts happen in memory; flush() merges the new entries into the
+# file under a lock, so concurrent collectors (arrivals, departures, other airports)
+# add to each other's work instead of overwriting it. Entries can expire after a TTL.
+
+cache_directory = 'cache'
+
+
+class SharedCache:
+    def __init__(self, name, ttl=None, directory=None):
+        self.path = os.path.join(directory or cache_directory, f"{name}.json")
+        self.ttl = ttl
+        self.entries = self._read()
+        self.new_entries = {}
+        self.hits = 0
+        self.misses = 0
+
+    def _read(self):
+        if not os.path.exists(self.path):
+            return {}
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def _fresh(self, entry):
+        return self.ttl is None or time.time() - entry['ts'] <= self.ttl
+
+    def get(self, key, default=None):
+        entry = self.entries.get(key)
+        if entry is not None and self._fresh(entry):
+            self.hits += 1
+            return entry['value']
+        self.misses += 1
+        return default
+
+    def __contains__(self, key):
+        entry = self.entries.get(key)
+        return entry is not None and self._fresh(entry)
+
+    def set(self, key, value):
+        entry = {'value': value, 'ts': round(time.time(), 3)}
+        self.entries[key] = entry
+        self.new_entries[key] = entry
+
+    def flush(self):
+        if not self.new_entries:
+            return
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        with file_lock(f"{self.path}.lock"):
+            entries = self._read()
+            entries.update(self.new_entries)
+            if self.ttl is not None:
+                entries = {key: entry for key, entry in entries.items() if self._fresh(entry)}
+            temp_path = f"{self.path}.{os.getpid()}.tmp"
+            with open(temp_path, 'w', encoding='utf-8') as f:
+                json.dump(entries, f)
+            os.replace(temp_path, self.path)
+        self.entries.update(entries)
+        self.new_entries = {}
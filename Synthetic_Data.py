@@ -0,0 +1,118 @@
+import argparse
+import os
+import time
+import numpy as np
+import pandas as pd
+from Emissions import compute_emissions
+from Flight_Schema import apply_schema
+from Flight_Store import data_directory, day_file, read_day, write_meta, write_parquet
+
+# Synthetic day partitions for scale testing.
+# Flights are resampled from rows observed in the real data, so airlines, routes,
+# aircraft models and times of day keep their joint distribution. Emissions are
+# recomputed from the current factor table, and the number of flights per day is
+# drawn from the observed daily volumes multiplied by a traffic scale.
+
+TEMPLATE_COLUMNS = ['Primary Flight Number', 'Flight Number', 'Airline', 'Origin', 'Destination', 'Status', 'Aircraft Info']
+
+
+# A flightera-style board page holding the given rows, for the parser backends and their
+# benchmark when no saved page sources are at hand. The markup follows what the row
+# extractor (Flight_Parser.py) looks for, wrapped in navigation of a realistic size.
+def board_page(rows, flight_type='arrival', navigation_links=300):
+    from html import escape
+    location_header = 'From' if flight_type == 'arrival' else 'To'
+    body = []
+    for date_status, primary_flight_number, flight_number, airline, location, status in rows:
+        clock, _, zone = str(date_status).partition('\n')
+        # The operating number is only shown when it differs from the marketing one
+        callsign = (f'<span class="text-gray-700 text-sm">{escape(str(flight_number))}</span>'
+                    if flight_number and flight_number != primary_flight_number else '')
+        body.append(
+            '<tr class="hover:bg-gray-50">'
+            f'<td class="px-2 py-2"><span class="whitespace-nowrap">{escape(clock)}\n<span class="text-xs">{escape(zone)}</span></span>'
+            f'<span class="inline-flex items-center px-2.5 py-0.5 rounded-full text-xs font-medium bg-green-100">'
+            f'<svg class="h-2 w-2"><circle cx="4" cy="4" r="3"></circle></svg> {escape(str(status))} </span></td>'
+            f'<td class="px-2 py-2"><a href="/en/flight/{escape(str(primary_flight_number))}">{escape(str(primary_flight_number))}</a> '
+            f'{callsign}<br><span class="whitespace-nowrap text-gray-500">{escape(str(airline))}</span></td>'
+            f'<td class="px-2 py-2"><a href="/en/airport/x">{escape(str(location))}</a></td>'
+            '<td class="px-2 py-2"><span class="text-gray-500">&nbsp;</span></td>'
+            '</tr>')
+    links = ''.join(f'<li><a class="text-gray-700" href="/en/airline/{i}">Airline {i}</a></li>' for i in range(navigation_links))
+    return ('<!DOCTYPE html><html lang="en"><head><meta charset="utf-8"><title>Flights</title>'
+            '<script>window.dataLayer = window.dataLayer || [];</script></head><body>'
+            f'<nav><ul>{links}</ul></nav><main><table class="min-w-full divide-y divide-gray-200 table-auto">'
+            f'<thead><tr><th>Time</th><th>Flight</th><th>{location_header}</th><th>Gate</th></tr></thead>'
+            f'<tbody class="bg-white divide-y divide-gray-200">{"".join(body)}</tbody></table></main>'
+            f'<footer><ul>{links}</ul></footer></body></html>')
+
+
+# Sample observed rows and daily volumes from the real partitions
+def observed_distributions(directory=None, sample_days=120, seed=0):
+    directory = directory or data_directory
+    days = sorted(d for d in os.listdir(directory) if os.path.isdir(os.path.join(directory, d)))
+    rng = np.random.default_rng(seed)
+    if len(days) > sample_days:
+        days = sorted(rng.choice(days, sample_days, replace=False))
+
+    frames, daily_counts = [], []
+    for day in days:
+        df = read_day(day, directory=directory)
+        if df is None or df.empty:
+            continue
+        daily_counts.append(len(df))
+        template = df[[c for c in TEMPLATE_COLUMNS if c in df]].astype(object)
+        # Keep only the clock time; the date comes from the synthetic partition
+        template['Clock'] = df['Date & Status'].astype(str).str.split().str[2]
+        frames.append(template)
+    if not frames:
+        raise RuntimeError(f"No day partitions found in {directory}")
+
+    templates = pd.concat(frames, ignore_index=True)
+    templates['CO2 Emission (kg)'] = compute_emissions(templates)
+    return templates, np.array(daily_counts)
+
+
+# Build one synthetic day in the project schema
+def generate_day(date, templates, daily_counts, scale, rng):
+    rows = max(1, int(rng.choice(daily_counts) * scale))
+    sample = templates.iloc[rng.integers(0, len(templates), rows)].sort_values('Clock')
+    timestamp = pd.Timestamp(date)
+    zone = timestamp.tz_localize('America/Anchorage').tzname()
+    day = sample.drop(columns='Clock').reset_index(drop=True)
+    day.insert(0, 'Date & Status', (f"{timestamp:%d %b} " + sample['Clock'] + f"\n{zone}").to_numpy())
+    return apply_schema(day, date)
+
+
+def generate(start_date, end_date, directory, scale=1.0, parquet=True, seed=0, source_directory=None):
+    start_time = time.time()
+    templates, daily_counts = observed_distributions(source_directory, seed=seed)
+    rng = np.random.default_rng(seed)
+    date_range_list = pd.date_range(start_date, end_date).strftime("%Y-%m-%d").tolist()
+
+    total_rows = 0
+    for date in date_range_list:
+        df = generate_day(date, templates, daily_counts, scale, rng)
+        os.makedirs(os.path.join(directory, date), exist_ok=True)
+        df.to_pickle(day_file(date, 'combined', 'pkl', directory))
+        if parquet:
+            write_parquet(df, date, directory=directory)
+        write_meta(date, {'synthetic': True, 'scale': scale, 'seed': seed}, directory=directory)
+        total_rows += len(df)
+    print(f"Generated {len(date_range_list)} days, {total_rows} flights in {directory} --- {time.time() - start_time:.1f} seconds ---")
+    return total_rows
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Generate synthetic flight day partitions from the observed data")
+    parser.add_argument('directory', help="Output data directory (kept separate from data/)")
+    parser.add_argument('start', help="First date, YYYY-MM-DD")
+    parser.add_argument('end', help="Last date, YYYY-MM-DD")
+    parser.add_argument('--scale', type=float, default=1.0, help="Traffic multiplier over the observed daily volumes")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--no-parquet', action='store_true', help="Only write the pickle partitions")
+    args = parser.parse_args()
+
+    if os.path.abspath(args.directory) == os.path.abspath(data_directory):
+        parser.error("Refusing to write synthetic partitions into the real data directory")
+    generate(args.start, args.end, args.directory, scale=args.scale, parquet=not args.no_parquet, seed=args.seed)
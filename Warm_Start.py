@@ -0,0 +1,123 @@
+import argparse
+import os
+import pickle
+import subprocess
+import sys
+import time
+from datetime import date
+import pandas as pd
+from Aggregates import RangeAggregator
+from Flight_Store import AGGREGATE_COLUMNS, data_directory, iter_days
+
+# Prebuilt warm-start artifacts for the Panel app.
+# At deploy time the range aggregates and the first display page for the default date
+# range are computed once and pickled, so a new server or session can render the first
+# view without loading and concatenating a year of day partitions.
+
+warm_directory = 'warm'
+
+# Default dashboard range and page size
+DEFAULT_START = date(2023, 1, 1)
+DEFAULT_END = date(2023, 12, 31)
+DEFAULT_ROWS = 10000
+
+
+def artifact_path(start_date, end_date, rows=DEFAULT_ROWS):
+    return os.path.join(warm_directory, f"warm_{start_date}_{end_date}_{rows}.pkl")
+
+
+def build_artifact(start_date=DEFAULT_START, end_date=DEFAULT_END, rows=DEFAULT_ROWS, directory=None):
+    start_time = time.time()
+    date_range_list = pd.date_range(start_date, end_date).strftime("%Y-%m-%d").tolist()
+
+    aggregator = RangeAggregator()
+    for _, df in iter_days(date_range_list, columns=AGGREGATE_COLUMNS, directory=directory):
+        aggregator.update(df)
+
+    # First display page, in the same order the dashboard loads it
+    pages = []
+    remaining_rows = rows
+    for _, df in iter_days(date_range_list, directory=directory):
+        pages.append(df.iloc[:remaining_rows])
+        remaining_rows -= len(pages[-1])
+        if remaining_rows <= 0:
+            break
+    display_df = pd.concat(pages).reset_index(drop=True) if pages else None
+
+    os.makedirs(warm_directory, exist_ok=True)
+    path = artifact_path(start_date, end_date, rows)
+    temp_path = f"{path}.{os.getpid()}.tmp"
+    with open(temp_path, 'wb') as f:
+        pickle.dump({'aggregator': aggregator, 'display_df': display_df, 'built_at': time.time()}, f, protocol=pickle.HIGHEST_PROTOCOL)
+    os.replace(temp_path, path)
+    print(f"Built {path} from {aggregator.partitions} days --- {time.time() - start_time:.1f} seconds ---")
+    return path
+
+
+# Load an artifact if one was built for this range; None otherwise
+def load_artifact(start_date, end_date, rows=DEFAULT_ROWS):
+    if os.environ.get('PANEL_WARM_START', '1') == '0':
+        return None
+    path = artifact_path(start_date, end_date, rows)
+    if not os.path.exists(path):
+        return None
+    with open(path, 'rb') as f:
+        return pickle.load(f)
+
+
+# An artifact is stale once any day partition is newer than it
+def is_stale(path, directory=None):
+    if not os.path.exists(path):
+        return True
+    built = os.path.getmtime(path)
+    directory = directory or data_directory
+    for day in os.listdir(directory):
+        day_directory = os.path.join(directory, day)
+        if os.path.isdir(day_directory) and os.path.getmtime(day_directory) > built:
+            return True
+    return False
+
+
+# Time from a fresh interpreter importing Panel.py to the first view with data being
+# rendered to Bokeh models (deferred onload work is run explicitly outside a server)
+def time_to_first_render(warm, repeats=3):
+    env = dict(os.environ, PANEL_WARM_START='1' if warm else '0')
+    code = (
+        "import time; t = time.perf_counter()\n"
+        "import Panel\n"
+        "if not Panel.update_panel.objects: Panel.update_data()\n"
+        "Panel.main.get_root()\n"
+        "print(time.perf_counter() - t)"
+    )
+    timings = []
+    for _ in range(repeats):
+        result = subprocess.run([sys.executable, '-c', code], env=env, capture_output=True, text=True, check=True)
+        timings.append(float(result.stdout.strip().splitlines()[-1]))
+    return min(timings)
+
+
+def benchmark(repeats=3):
+    cold = time_to_first_render(warm=False, repeats=repeats)
+    warm = time_to_first_render(warm=True, repeats=repeats)
+    print(f"Time to first render: cold {cold:.2f} s, warm {warm:.2f} s ({cold / warm:.1f}x faster)")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Build or benchmark Panel warm-start artifacts")
+    subparsers = parser.add_subparsers(dest='command', required=True)
+    build_parser = subparsers.add_parser('build', help="Build the artifact for a date range")
+    build_parser.add_argument('--start', default=str(DEFAULT_START))
+    build_parser.add_argument('--end', default=str(DEFAULT_END))
+    build_parser.add_argument('--rows', type=int, default=DEFAULT_ROWS)
+    build_parser.add_argument('--if-stale', action='store_true', help="Skip the build when the artifact is newer than the data")
+    bench_parser = subparsers.add_parser('bench', help="Measure time to first render, cold and warm")
+    bench_parser.add_argument('--repeats', type=int, default=3)
+    args = parser.parse_args()
+
+    if args.command == 'build':
+        if args.if_stale and not is_stale(artifact_path(args.start, args.end, args.rows)):
+            print("Warm-start artifact is up to date")
+        else:
+            build_artifact(args.start, args.end, args.rows)
+    else:
+        benchmark(args.repeats)
@@ -0,0 +1,259 @@
+import os
+import pickle
+import sqlite3
+import time
+
+# Shared work queue for distributed collection.
+# A job is one (date, direction) of the collection. Workers lease a job for a limited
+# time and keep the lease alive with heartbeats while they work; a lease that expires
+# (worker crashed, machine gone) puts the job back in the queue, up to max_attempts.
+# Finished jobs carry their frame as a pickled result, so the coordinator can combine a
+# day without sharing a disk with the workers.
+#
+# Backends: SQLite for one box (workers are processes on the same host) and Redis for
+# several machines. Queues are named (one per airport), and open_queue() picks the
+# backend from a URL:
+#   sqlite:///collect_queue.db    redis://host:6379/0
+
+DEFAULT_LEASE_SECONDS = 600
+DEFAULT_MAX_ATTEMPTS = 3
+
+# Redis scripts run atomically on the server, so a job is never in neither the queued
+# list nor the lease set: a worker dying mid-call either got the job with its lease
+# registered (and expiry will requeue it) or did not get it at all.
+# KEYS: queued list, lease set; ARGV: key prefix, worker, lease expiry
+REDIS_LEASE = """
+local job = redis.call('LPOP', KEYS[1])
+if not job then return false end
+local key = ARGV[1] .. ':job:' .. job
+local attempts = redis.call('HINCRBY', key, 'attempts', 1)
+redis.call('HSET', key, 'state', 'leased', 'worker', ARGV[2])
+redis.call('ZADD', KEYS[2], ARGV[3], job)
+return {job, attempts}
+"""
+# Store a result and mark the job done, if the worker still holds its lease; 0 otherwise.
+# KEYS: lease set, job hash, result key, done set of the day; ARGV: job, worker, direction, result
+REDIS_COMPLETE = """
+local state = redis.call('HMGET', KEYS[2], 'state', 'worker')
+if state[1] ~= 'leased' or state[2] ~= ARGV[2] then return 0 end
+if redis.call('ZREM', KEYS[1], ARGV[1]) == 0 then return 0 end
+redis.call('SET', KEYS[3], ARGV[4])
+redis.call('HSET', KEYS[2], 'state', 'done', 'error', '')
+redis.call('SADD', KEYS[4], ARGV[3])
+return 1
+"""
+# Drop a lease and requeue the job (or fail it after max attempts); 0 when another
+# caller already released it. KEYS: lease set, queued list; ARGV: key prefix, job, error, max attempts
+REDIS_RELEASE = """
+if redis.call('ZREM', KEYS[1], ARGV[2]) == 0 then return 0 end
+local key = ARGV[1] .. ':job:' .. ARGV[2]
+local attempts = tonumber(redis.call('HGET', key, 'attempts') or '0')
+if attempts < tonumber(ARGV[4]) then
+  redis.call('HSET', key, 'state', 'queued', 'error', ARGV[3])
+  redis.call('RPUSH', KEYS[2], ARGV[2])
+else
+  redis.call('HSET', key, 'state', 'failed', 'error', ARGV[3])
+end
+return 1
+"""
+
+
+def job_id(date, direction):
+    return f"{date}:{direction}"
+
+
+class SqliteQueue:
+    def __init__(self, path, name='collect', lease_seconds=DEFAULT_LEASE_SECONDS, max_attempts=DEFAULT_MAX_ATTEMPTS):
+        self.path = path
+        # One pair of tables per queue name, so several queues can share a database file
+        self.jobs = f"{name}_jobs"
+        self.days = f"{name}_days"
+        self.lease_seconds = lease_seconds
+        self.max_attempts = max_attempts
+        self.connection = sqlite3.connect(path, timeout=30, isolation_level=None)
+        self.connection.execute("PRAGMA journal_mode=WAL")
+        self.connection.execute(
+            f"CREATE TABLE IF NOT EXISTS {self.jobs} (id TEXT PRIMARY KEY, date TEXT, direction TEXT, state TEXT, "
+            "worker TEXT, lease_expires REAL, attempts INTEGER DEFAULT 0, error TEXT, result BLOB)"
+        )
+        self.connection.execute(f"CREATE TABLE IF NOT EXISTS {self.days} (date TEXT PRIMARY KEY, directions INTEGER, combined INTEGER DEFAULT 0)")
+
+    def _transaction(self, fn):
+        # BEGIN IMMEDIATE takes the write lock up front, so two workers never lease the same job
+        self.connection.execute("BEGIN IMMEDIATE")
+        try:
+            result = fn(self.connection)
+        except BaseException:
+            self.connection.execute("ROLLBACK")
+            raise
+        self.connection.execute("COMMIT")
+        return result
+
+    # Jobs already in the queue are left alone, so enqueueing a range twice is harmless
+    def enqueue(self, dates, directions):
+        def add(db):
+            added = 0
+            for date in dates:
+                db.execute(f"INSERT OR IGNORE INTO {self.days} (date, directions) VALUES (?, ?)", (date, len(directions)))
+                for direction in directions:
+                    added += db.execute(f"INSERT OR IGNORE INTO {self.jobs} (id, date, direction, state) VALUES (?, ?, ?, 'queued')",
+                                        (job_id(date, direction), date, direction)).rowcount
+            return added
+        return self._transaction(add)
+
+    def lease(self, worker):
+        def take(db):
+            row = db.execute(f"SELECT id, date, direction, attempts FROM {self.jobs} WHERE state = 'queued' ORDER BY date, direction LIMIT 1").fetchone()
+            if row is None:
+                return None
+            db.execute(f"UPDATE {self.jobs} SET state = 'leased', worker = ?, lease_expires = ?, attempts = attempts + 1 WHERE id = ?",
+                       (worker, time.time() + self.lease_seconds, row[0]))
+            return {'id': row[0], 'date': row[1], 'direction': row[2], 'attempts': row[3] + 1}
+        return self._transaction(take)
+
+    # False when the lease was lost (expired and handed to another worker)
+    def heartbeat(self, job, worker):
+        return self.connection.execute(f"UPDATE {self.jobs} SET lease_expires = ? WHERE id = ? AND worker = ? AND state = 'leased'",
+                                       (time.time() + self.lease_seconds, job['id'], worker)).rowcount == 1
+
+    def complete(self, job, worker, result):
+        return self.connection.execute(f"UPDATE {self.jobs} SET state = 'done', result = ?, error = NULL WHERE id = ? AND worker = ? AND state = 'leased'",
+                                       (pickle.dumps(result, protocol=pickle.HIGHEST_PROTOCOL), job['id'], worker)).rowcount == 1
+
+    def fail(self, job, worker, error):
+        return self.connection.execute(
+            f"UPDATE {self.jobs} SET state = CASE WHEN attempts < ? THEN 'queued' ELSE 'failed' END, error = ? "
+            "WHERE id = ? AND worker = ? AND state = 'leased'", (self.max_attempts, str(error), job['id'], worker)).rowcount == 1
+
+    # Put jobs whose lease ran out back in the queue (or fail them after max_attempts)
+    def requeue_expired(self):
+        return self.connection.execute(
+            f"UPDATE {self.jobs} SET state = CASE WHEN attempts < ? THEN 'queued' ELSE 'failed' END, error = 'lease expired' "
+            "WHERE state = 'leased' AND lease_expires < ?", (self.max_attempts, time.time())).rowcount
+
+    # Days whose directions are all done and that have not been combined yet
+    def ready_days(self):
+        return [row[0] for row in self.connection.execute(
+            f"SELECT d.date FROM {self.days} AS d JOIN {self.jobs} AS j ON j.date = d.date AND j.state = 'done' "
+            "WHERE d.combined = 0 GROUP BY d.date HAVING COUNT(*) = d.directions ORDER BY d.date")]
+
+    def results(self, date):
+        return {direction: pickle.loads(result) for direction, result in self.connection.execute(
+            f"SELECT direction, result FROM {self.jobs} WHERE date = ? AND state = 'done'", (date,))}
+
+    # Results are dropped once the day is combined; the job rows stay as a record
+    def mark_combined(self, date):
+        self._transaction(lambda db: (db.execute(f"UPDATE {self.days} SET combined = 1 WHERE date = ?", (date,)),
+                                      db.execute(f"UPDATE {self.jobs} SET result = NULL WHERE date = ?", (date,))))
+
+    def counts(self):
+        return dict(self.connection.execute(f"SELECT state, COUNT(*) FROM {self.jobs} GROUP BY state").fetchall())
+
+    # Nothing left to hand out or wait for
+    def drained(self):
+        counts = self.counts()
+        return not counts.get('queued') and not counts.get('leased')
+
+
+class RedisQueue:
+    def __init__(self, url, name='collect', lease_seconds=DEFAULT_LEASE_SECONDS, max_attempts=DEFAULT_MAX_ATTEMPTS):
+        import redis
+        self.redis = redis.Redis.from_url(url)
+        self.prefix = name
+        self.lease_seconds = lease_seconds
+        self.max_attempts = max_attempts
+        self.lease_script = self.redis.register_script(REDIS_LEASE)
+        self.complete_script = self.redis.register_script(REDIS_COMPLETE)
+        self.release_script = self.redis.register_script(REDIS_RELEASE)
+
+    def _key(self, *parts):
+        return ':'.join((self.prefix,) + parts)
+
+    def enqueue(self, dates, directions):
+        added = 0
+        for date in dates:
+            self.redis.hsetnx(self._key('days'), date, len(directions))
+            for direction in directions:
+                job = job_id(date, direction)
+                if self.redis.hsetnx(self._key('job', job), 'state', 'queued'):
+                    self.redis.hset(self._key('job', job), mapping={'date': date, 'direction': direction, 'attempts': 0})
+                    self.redis.rpush(self._key('queued'), job)
+                    added += 1
+        return added
+
+    def lease(self, worker):
+        leased = self.lease_script(keys=[self._key('queued'), self._key('leases')],
+                                   args=[self.prefix, worker, time.time() + self.lease_seconds])
+        if not leased:
+            return None
+        job, attempts = leased[0].decode(), int(leased[1])
+        date, direction = job.rsplit(':', 1)
+        return {'id': job, 'date': date, 'direction': direction, 'attempts': attempts}
+
+    def _owned(self, job, worker):
+        state, owner = self.redis.hmget(self._key('job', job['id']), 'state', 'worker')
+        return state == b'leased' and owner == worker.encode()
+
+    def heartbeat(self, job, worker):
+        if not self._owned(job, worker):
+            return False
+        self.redis.zadd(self._key('leases'), {job['id']: time.time() + self.lease_seconds}, xx=True)
+        return True
+
+    # Removing the lease in the same script makes completion and requeueing mutually exclusive
+    def complete(self, job, worker, result):
+        keys = [self._key('leases'), self._key('job', job['id']), self._key('result', job['id']), self._key('done', job['date'])]
+        args = [job['id'], worker, job['direction'], pickle.dumps(result, protocol=pickle.HIGHEST_PROTOCOL)]
+        return self.complete_script(keys=keys, args=args) == 1
+
+    # Only the caller whose ZREM succeeds (inside the script) requeues the job
+    def _release(self, job, error):
+        return self.release_script(keys=[self._key('leases'), self._key('queued')],
+                                   args=[self.prefix, job, error, self.max_attempts]) == 1
+
+    def fail(self, job, worker, error):
+        return self._owned(job, worker) and self._release(job['id'], str(error))
+
+    def requeue_expired(self):
+        return sum(self._release(job.decode(), 'lease expired')
+                   for job in self.redis.zrangebyscore(self._key('leases'), '-inf', time.time()))
+
+    def ready_days(self):
+        days = self.redis.hgetall(self._key('days'))
+        ready = [date.decode() for date, directions in days.items()
+                 if self.redis.scard(self._key('done', date.decode())) == int(directions)]
+        return sorted(ready)
+
+    def results(self, date):
+        results = {}
+        for direction in self.redis.smembers(self._key('done', date)):
+            direction = direction.decode()
+            payload = self.redis.get(self._key('result', job_id(date, direction)))
+            if payload is not None:
+                results[direction] = pickle.loads(payload)
+        return results
+
+    def mark_combined(self, date):
+        self.redis.hdel(self._key('days'), date)
+        for direction in self.redis.smembers(self._key('done', date)):
+            self.redis.delete(self._key('result', job_id(date, direction.decode())))
+
+    def counts(self):
+        counts = {}
+        for key in self.redis.scan_iter(self._key('job', '*')):
+            state = self.redis.hget(key, 'state').decode()
+            counts[state] = counts.get(state, 0) + 1
+        return counts
+
+    def drained(self):
+        return not self.redis.llen(self._key('queued')) and not self.redis.zcard(self._key('leases'))
+
+
+def open_queue(url, **options):
+    if url.startswith('sqlite:///'):
+        path = url[len('sqlite:///'):]
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        return SqliteQueue(path, **options)
+    if url.startswith(('redis://', 'rediss://')):
+        return RedisQueue(url, **options)
+    raise ValueError(f"Unsupported queue URL: {url}")
@@ -1,2 +1,7 @@
 #!/bin/bash
-panel serve /opt/render/project/src/Panel.py --address=0.0.0.0 --port=10000 --allow-websocket-origin=co2-emissions-tracker-ted-stevens.onrender.com
+cd /opt/render/project/src
+# Build the warm-start artifact for the default range at deploy time (no-op when the data has not changed)
+python Warm_Start.py build --if-stale
+# Precompute the daily aggregates behind /api/* (no-op when the data version has not changed)
+python Daily_Aggregates.py build --airport ANC
+panel serve /opt/render/project/src/Panel.py --address=0.0.0.0 --port=10000 --plugins Callback_Profiler --plugins Aggregates_Api --plugins Flight_Export --allow-websocket-origin=co2-emissions-tracker-ted-stevens.onrender.com
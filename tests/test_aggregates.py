@@ -0,0 +1,111 @@
+import numpy as np
+import pandas as pd
+import pytest
+from Aggregates import RangeAggregator, TDigest, TopKCounter
+
+QUANTILES = [0.01, 0.1, 0.25, 0.5, 0.75, 0.9, 0.99]
+# Rank error allowed for a compression-100 digest
+RANK_ERROR = 0.005
+
+
+# A month of days with a long-tailed emission column, a few unknown emissions and
+# skewed categorical origins, destinations and airlines
+@pytest.fixture(scope='module')
+def days():
+    rng = np.random.default_rng(0)
+    airports = [f"Airport {i} (A{i:02d} / KA{i:02d})" for i in range(40)]
+    weights = 1 / np.arange(1, len(airports) + 1)
+    weights /= weights.sum()
+    frames = []
+    for _ in range(30):
+        rows = int(rng.integers(200, 400))
+        co2 = rng.lognormal(9, 1, rows).round()
+        co2[rng.random(rows) < 0.05] = np.nan
+        frames.append(pd.DataFrame({
+            'CO2 Emission (kg)': pd.array(co2, dtype='Float64').astype('Int64'),
+            'Origin': pd.Categorical(rng.choice(airports, rows, p=weights), categories=airports),
+            'Destination': pd.Categorical(rng.choice(airports, rows, p=weights[::-1]), categories=airports),
+            'Airline': pd.Categorical(rng.choice(['Alaska Airlines', 'FedEx', 'UPS', 'Atlas Air', 'Delta Air Lines'], rows,
+                                                 p=[0.4, 0.25, 0.2, 0.1, 0.05])),
+        }))
+    return frames
+
+
+def one_pass(frames):
+    aggregator = RangeAggregator()
+    for df in frames:
+        aggregator.update(df)
+    return aggregator
+
+
+def rank_error(values, estimate, q):
+    return abs(np.searchsorted(values, estimate) / len(values) - q)
+
+
+def test_sums_and_counts_are_exact(days):
+    aggregator = one_pass(days)
+    flights = pd.concat(days, ignore_index=True)
+    co2 = flights['CO2 Emission (kg)']
+    assert aggregator.partitions == len(days)
+    assert aggregator.rows == len(flights)
+    assert aggregator.co2_count == co2.count()
+    assert aggregator.co2_sum_kg == pytest.approx(float(co2.sum()), rel=1e-12)
+    summary = aggregator.summary(20)
+    assert summary['total_co2_emission'] == pytest.approx(co2.sum() / 1000)
+    assert summary['total_saf_reduction'] == pytest.approx(co2.sum() / 1000 * 0.2)
+
+
+def test_top_k_matches_value_counts(days):
+    aggregator = one_pass(days)
+    flights = pd.concat(days, ignore_index=True)
+    for column, counter in (('Origin', aggregator.origins), ('Destination', aggregator.destinations), ('Airline', aggregator.airlines)):
+        counts = flights[column].value_counts()
+        assert counter.counts == {key: count for key, count in counts.items() if count > 0}, column
+        assert counter.error == 0
+    assert aggregator.summary(20)['top_airlines'] == list(flights['Airline'].value_counts().head(5).items())
+
+
+def test_quantiles_within_rank_error(days):
+    digest = TDigest()
+    for df in days:
+        digest.update(df['CO2 Emission (kg)'].to_numpy(dtype=float, na_value=np.nan))
+    values = np.sort(pd.concat(days)['CO2 Emission (kg)'].dropna().to_numpy(dtype=float))
+    assert digest.count == len(values)
+    for q in QUANTILES:
+        assert rank_error(values, digest.quantile(q), q) <= RANK_ERROR, q
+
+
+def test_exact_while_centroids_are_singletons():
+    digest = TDigest()
+    digest.update([5.0, 1.0, 3.0])
+    assert digest.quantile(0.5) == 3.0
+    assert np.isnan(TDigest().quantile(0.5))
+
+
+def test_split_partitions_merge_to_one_pass(days):
+    whole = one_pass(days)
+    # Unequal chunks, as the process pool hands them out
+    merged = RangeAggregator()
+    for start, end in ((0, 7), (7, 8), (8, 30)):
+        merged.merge(one_pass(days[start:end]))
+    assert (merged.partitions, merged.rows, merged.co2_count) == (whole.partitions, whole.rows, whole.co2_count)
+    assert merged.co2_sum_kg == pytest.approx(whole.co2_sum_kg, rel=1e-12)
+    for counter in ('origins', 'destinations', 'airlines'):
+        assert getattr(merged, counter).counts == getattr(whole, counter).counts
+    summary, whole_summary = merged.summary(20), whole.summary(20)
+    for key in ('top_origins', 'top_destinations', 'top_airlines'):
+        assert summary[key] == whole_summary[key]
+    values = np.sort(pd.concat(days)['CO2 Emission (kg)'].dropna().to_numpy(dtype=float))
+    for q in QUANTILES:
+        assert rank_error(values, merged.co2_digest.quantile(q), q) <= RANK_ERROR, q
+
+
+def test_top_k_over_capacity_keeps_heavy_hitters():
+    counter = TopKCounter(capacity=3)
+    counter.update(['a'] * 50 + ['b'] * 30 + ['c'] * 20 + ['d'] * 2 + ['e'])
+    other = TopKCounter(capacity=3)
+    other.update(['a'] * 5 + ['f'] * 3)
+    counter.merge(other)
+    assert [key for key, _ in counter.most_common(3)] == ['a', 'b', 'c']
+    assert counter.counts['a'] == 55
+    assert counter.error > 0  # Counts past the capacity are no longer exact
@@ -0,0 +1,67 @@
+import json
+import os
+import pandas as pd
+import pytest
+from tornado.testing import AsyncHTTPTestCase
+from tornado.web import Application
+import Aggregates_Api
+import Daily_Aggregates
+from Daily_Aggregates import MAX_TOP_N, DailyAggregates, compute_data_version
+from Flight_Store import day_file, write_day
+
+DATES = pd.to_datetime(['2023-01-01', '2023-01-02'])
+TABLES = {
+    'daily': pd.DataFrame({'date': DATES, 'flights': [3, 2], 'co2_flights': [3, 2], 'co2_kg': [300.0, 200.0]}),
+    'airlines': pd.DataFrame({'date': DATES, 'airline': ['Alaska Airlines', 'FedEx'], 'flights': [3, 2], 'co2_kg': [300.0, 200.0]}),
+    'routes': pd.DataFrame({'date': DATES, 'route': ['SEA-ANC', 'ANC-MEM'], 'flights': [3, 2], 'co2_kg': [300.0, 200.0]}),
+}
+
+
+class ApiTest(AsyncHTTPTestCase):
+    @pytest.fixture(autouse=True)
+    def stand_in_aggregates(self, monkeypatch):
+        monkeypatch.setattr(Aggregates_Api, 'data_version', lambda airport: 'v1')
+        monkeypatch.setattr(Aggregates_Api, 'get_aggregates', lambda airport: DailyAggregates(airport, 'v1', TABLES))
+
+    def get_app(self):
+        return Application(Aggregates_Api.ROUTES)
+
+    def get_json(self, path):
+        response = self.fetch(path)
+        return response.code, json.loads(response.body)
+
+    def test_totals(self):
+        code, body = self.get_json('/api/totals?start=2023-01-02')
+        assert code == 200
+        assert body['days'] == 1
+
+    def test_empty_date_is_rejected(self):
+        for query in ('start=', 'end=', 'start=yesterday'):
+            code, body = self.get_json(f'/api/totals?{query}')
+            assert code == 400, query
+            assert 'must be a date' in body['error']
+
+    def test_top_n_bounds(self):
+        code, body = self.get_json('/api/top?n=1')
+        assert code == 200
+        assert [row['airline'] for row in body['top']] == ['Alaska Airlines']
+        for n in (0, -2, MAX_TOP_N + 1):
+            code, body = self.get_json(f'/api/top?n={n}')
+            assert code == 400, n
+
+
+def test_data_version_covers_pickle_only_days(tmp_path, monkeypatch):
+    monkeypatch.setattr(Daily_Aggregates, 'airport_directory', lambda airport: str(tmp_path))
+    write_day(pd.DataFrame({'Primary Flight Number': ['AS1'], 'Origin': ['Seattle (SEA / KSEA)']}), '2023-01-01',
+              formats=('pkl',), directory=str(tmp_path))
+    versions = [compute_data_version('ANC')]
+    assert os.path.exists(day_file('2023-01-01', 'combined', 'parquet', str(tmp_path)))
+    # A day the views have to skip still changes the version, and so the ETags
+    os.makedirs(tmp_path / '2023-01-02')
+    with open(day_file('2023-01-02', 'combined', 'pkl', str(tmp_path)), 'wb') as f:
+        f.write(b'not a pickle')
+    versions.append(compute_data_version('ANC'))
+    with open(day_file('2023-01-02', 'combined', 'pkl', str(tmp_path)), 'ab') as f:
+        f.write(b', still not')
+    versions.append(compute_data_version('ANC'))
+    assert len(set(versions)) == 3
@@ -0,0 +1,68 @@
+import pandas as pd
+import pytest
+
+pytest.importorskip('pytest_benchmark')
+
+from Aggregates import calculate_saf_reduction
+from Benchmark import aggregate_range, load_range, render_page
+from Emission_Factors import get_resolver
+from Emissions import compute_emissions, get_distance_model
+from Flight_Parser import available_backends, parse_rows
+from Synthetic_Data import board_page, generate
+
+# The Benchmark.py data paths at a size that fits the test run, over synthetic days
+# resampled from data/. Run with `pytest tests/test_benchmarks.py --benchmark-only`;
+# the whole module is skipped when pytest-benchmark is not installed.
+
+START_DATE, END_DATE = '2014-01-01', '2014-01-28'
+
+
+@pytest.fixture(scope='module')
+def synthetic_range(tmp_path_factory):
+    directory = str(tmp_path_factory.mktemp('synthetic'))
+    generate(START_DATE, END_DATE, directory, seed=0)
+    return pd.date_range(START_DATE, END_DATE).strftime("%Y-%m-%d").tolist(), directory
+
+
+@pytest.fixture(scope='module')
+def flights(synthetic_range):
+    return load_range(*synthetic_range)
+
+
+def test_load_range(benchmark, synthetic_range):
+    df = benchmark(load_range, *synthetic_range)
+    assert len(df) > 0
+
+
+def test_saf_reduction(benchmark, flights):
+    benchmark(calculate_saf_reduction, flights, 20)
+
+
+def test_streaming_aggregates(benchmark, synthetic_range, flights):
+    summary = benchmark(aggregate_range, *synthetic_range)
+    assert summary['total_co2_emission'] == pytest.approx(flights['CO2 Emission (kg)'].sum() / 1000)  # Tonnes
+
+
+def test_render_first_page(benchmark, flights):
+    pytest.importorskip('panel')
+    render_page(flights)  # The one-off panel import stays out of the timing
+    benchmark(render_page, flights)
+
+
+@pytest.mark.parametrize('model', ['flat', 'distance'])
+def test_emissions(benchmark, flights, model):
+    resolver = get_resolver()
+    get_distance_model(resolver)  # Tables are built once per process, outside the timing
+    df = flights[['Origin', 'Destination', 'Aircraft Info']]
+    benchmark.group = 'emissions'
+    emissions = benchmark(compute_emissions, df, resolver=resolver, model=model)
+    assert len(emissions) == len(df)
+
+
+@pytest.mark.parametrize('backend', available_backends())
+def test_parse(benchmark, flights, backend):
+    columns = ['Date & Status', 'Primary Flight Number', 'Flight Number', 'Airline', 'Origin', 'Status']
+    page = board_page(flights[columns].head(200).astype(object).fillna('').values.tolist())
+    benchmark.group = 'parse'
+    rows = benchmark(parse_rows, page, backend)
+    assert len(rows) == 200
@@ -0,0 +1,26 @@
+import os
+from concurrent.futures import ProcessPoolExecutor
+import pandas as pd
+import Dask_Analytics
+from Aggregates import RangeAggregator
+from Flight_Store import AGGREGATE_COLUMNS, read_day
+
+DATA_DIRECTORY = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'data')
+
+
+def test_streaming_reports_every_chunk_once():
+    date_range_list = pd.date_range('2023-01-01', '2023-03-31').strftime('%Y-%m-%d').tolist()
+    expected = RangeAggregator()
+    for date in date_range_list:
+        df = read_day(date, columns=AGGREGATE_COLUMNS, directory=DATA_DIRECTORY)
+        if df is not None:
+            expected.update(df)
+
+    progress = []
+    with ProcessPoolExecutor(max_workers=1) as pool:
+        aggregator = Dask_Analytics.aggregate_range_streaming(date_range_list, lambda running: progress.append(running.partitions),
+                                                             directory=DATA_DIRECTORY, pool=pool)
+    assert len(progress) == len(Dask_Analytics.chunks(date_range_list))
+    assert progress == sorted(progress) and progress[-1] == expected.partitions
+    assert (aggregator.partitions, aggregator.rows) == (expected.partitions, expected.rows)
+    assert aggregator.summary(20)['total_co2_emission'] == expected.summary(20)['total_co2_emission']
@@ -0,0 +1,93 @@
+import json
+import os
+import pickle
+import threading
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import pandas as pd
+import pytest
+import Data_Sync
+from Flight_Store import day_file
+
+DAY_PICKLE = pickle.dumps(pd.DataFrame({'Primary Flight Number': ['AS1']}), protocol=pickle.HIGHEST_PROTOCOL)
+
+# date -> (status, body) served for that day's combined pickle
+RESPONSES = {
+    '2023-01-01': (200, DAY_PICKLE),
+    '2023-01-02': (404, b'Not Found'),
+    '2023-01-03': (503, b'Unavailable'),
+    '2023-01-04': (200, b'<html>rate limited</html>'),
+}
+
+
+class StandInHandler(BaseHTTPRequestHandler):
+    hits = Counter()
+
+    def do_GET(self):
+        date = self.path.rsplit('/', 1)[-1][:10]
+        self.hits[date] += 1
+        status, body = RESPONSES.get(date, (404, b''))
+        self.send_response(status)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def server():
+    StandInHandler.hits.clear()
+    httpd = ThreadingHTTPServer(('127.0.0.1', 0), StandInHandler)
+    thread = threading.Thread(target=httpd.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{httpd.server_address[1]}", StandInHandler.hits
+    httpd.shutdown()
+    httpd.server_close()
+
+
+@pytest.fixture(autouse=True)
+def fast_retries(monkeypatch):
+    retry = Data_Sync.Retry
+    monkeypatch.setattr(Data_Sync, 'Retry', lambda **kwargs: retry(**{**kwargs, 'backoff_factor': 0}))
+    Data_Sync._manifests.clear()
+
+
+def test_sync_outcomes(server, tmp_path):
+    base_url, hits = server
+    results = Data_Sync.sync_missing(list(RESPONSES), base_url=base_url, directory=str(tmp_path), workers=4)
+
+    assert results == {'downloaded': 1, 'missing': 1, 'error': 2}
+    with open(day_file('2023-01-01', 'combined', 'pkl', str(tmp_path)), 'rb') as f:
+        assert f.read() == DAY_PICKLE
+    # The error page is not written as a day
+    assert not os.path.exists(day_file('2023-01-04', 'combined', 'pkl', str(tmp_path)))
+    # 5xx responses are retried before giving up
+    assert hits['2023-01-03'] == 4
+
+
+def test_manifest_records_outcomes(server, tmp_path):
+    base_url, _ = server
+    Data_Sync.sync_missing(list(RESPONSES), base_url=base_url, directory=str(tmp_path), workers=4)
+
+    with open(tmp_path / 'manifest.json', 'r', encoding='utf-8') as f:
+        manifest = json.load(f)
+    assert manifest['available'] == ['2023-01-01']
+    # Only a 404 is a gap; errors are tried again next time
+    assert list(manifest['missing']) == ['2023-01-02']
+
+
+def test_gap_ttl(server, tmp_path):
+    base_url, hits = server
+    dates = ['2023-01-01', '2023-01-02']
+    Data_Sync.sync_missing(dates, base_url=base_url, directory=str(tmp_path))
+    assert hits == Counter({'2023-01-01': 1, '2023-01-02': 1})
+
+    # Within the TTL neither the downloaded day nor the known gap is fetched again
+    assert Data_Sync.sync_missing(dates, base_url=base_url, directory=str(tmp_path)) == {'downloaded': 0, 'missing': 0, 'error': 0}
+    assert hits['2023-01-02'] == 1
+
+    # Once the gap has expired it is checked again
+    Data_Sync.sync_missing(dates, base_url=base_url, directory=str(tmp_path), ttl=0)
+    assert hits == Counter({'2023-01-01': 1, '2023-01-02': 2})
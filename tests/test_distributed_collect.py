@@ -0,0 +1,46 @@
+import signal
+import subprocess
+import sys
+import time
+import pytest
+import Distributed_Collect
+from Distributed_Collect import run_local, stop_workers
+
+SLEEPER = "import time; time.sleep(60)"
+STUBBORN = "import signal, time; signal.signal(signal.SIGTERM, signal.SIG_IGN); print('ready', flush=True); time.sleep(60)"
+
+
+def python(code, **kwargs):
+    return subprocess.Popen([sys.executable, '-c', code], **kwargs)
+
+
+def test_workers_are_terminated_when_the_coordinator_fails(tmp_path, monkeypatch):
+    started = []
+    popen = subprocess.Popen
+
+    def sleeper(args, **kwargs):
+        started.append(popen([sys.executable, '-c', SLEEPER]))
+        return started[-1]
+
+    def failing_coordinate(*args, **kwargs):
+        raise RuntimeError("queue unreachable")
+
+    monkeypatch.setattr(subprocess, 'Popen', sleeper)
+    monkeypatch.setattr(Distributed_Collect, 'coordinate', failing_coordinate)
+    start_time = time.monotonic()
+    with pytest.raises(RuntimeError):
+        run_local('2023-01-01', '2023-01-02', workers=2, queue_url=f"sqlite:///{tmp_path / 'queue.db'}")
+    assert time.monotonic() - start_time < 10
+    assert [process.returncode for process in started] == [-signal.SIGTERM] * 2
+
+
+def test_stop_workers_waits_then_kills():
+    finished = python("pass")
+    stubborn = python(STUBBORN, stdout=subprocess.PIPE)
+    assert stubborn.stdout.readline() == b'ready\n'
+    start_time = time.monotonic()
+    stop_workers([finished, stubborn], timeout=0.5, terminate_timeout=0.5)
+    assert time.monotonic() - start_time < 5
+    assert finished.returncode == 0
+    assert stubborn.returncode == -signal.SIGKILL
+    stubborn.stdout.close()
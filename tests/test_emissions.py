@@ -0,0 +1,43 @@
+import numpy as np
+import pytest
+import Emissions
+from Emissions import DistanceModel, get_distance_model, model_emissions
+
+SPEC = {
+    'bands_km': [0, 1000, 2000],
+    'classes': [
+        {'name': 'small', 'max_factor': 5, 'lto_kg': 100, 'multipliers': [0.5, 0.7, 0.9]},
+        {'name': 'large', 'max_factor': None, 'lto_kg': 1000, 'multipliers': [1.0, 1.0, 1.2]},
+    ],
+}
+
+
+def test_class_bands():
+    model = DistanceModel(SPEC)
+    assert model.classes_for([0.5, 5, 5.01, 50]).tolist() == [0, 0, 1, 1]
+
+
+@pytest.mark.parametrize('distance, factor, expected', [
+    (0, 2, 100 + 0),
+    (500, 2, 100 + 500 * 2 * 0.6),  # Halfway through the first band
+    (1234, 2, 100 + 1234 * 2 * (0.7 + 0.2 * 0.234)),  # Between grid steps
+    (1500, 10, 1000 + 1500 * 10 * 1.1),
+    (2000, 10, 1000 + 2000 * 10 * 1.2),
+    (9000, 10, 1000 + 9000 * 10 * 1.2),  # Flat beyond the last band
+])
+def test_interpolation(distance, factor, expected):
+    assert DistanceModel(SPEC).emissions([distance], [factor])[0] == pytest.approx(expected)
+
+
+def test_unknown_distance_and_no_aircraft():
+    emissions = DistanceModel(SPEC).emissions([np.nan, 800], [2, 0])
+    assert np.isnan(emissions[0])
+    assert emissions[1] == 0  # No factor, no LTO term either
+
+
+def test_flat_model_is_the_default():
+    # The stored history is flat; the distance model ships together with reprocessing it
+    assert Emissions.EMISSION_MODEL == 'flat'
+    distances, factors = np.array([100.0, 2500.0]), np.array([4.0, 9.0])
+    assert model_emissions(distances, factors).tolist() == [400.0, 22500.0]
+    assert get_distance_model().emissions(distances, factors).shape == (2,)
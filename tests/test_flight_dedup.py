@@ -0,0 +1,121 @@
+import os
+import pandas as pd
+import pytest
+from Flight_Dedup import collapse_codeshares, deduplicate
+from Pipeline_Metrics import PipelineMetrics
+from Scraper import filter_by_date
+
+DATA_DIRECTORY = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'data')
+
+COLUMNS = ['Date & Status', 'Primary Flight Number', 'Flight Number', 'Airline', 'Origin', 'Status']
+
+
+@pytest.fixture
+def metrics(tmp_path):
+    return PipelineMetrics('test', directory=str(tmp_path))
+
+
+def board(rows):
+    return pd.DataFrame(rows, columns=COLUMNS)
+
+
+def test_neighbouring_days_are_dropped_before_enrichment(metrics):
+    df = board([
+        ['05 Jun 23:40\nAKDT', 'AS94', 'ASA94', 'Alaska Airlines', 'Seattle (SEA / KSEA)', 'Landed'],
+        ['06 Jun 00:26\nAKDT', 'AS193', 'ASA193', 'Alaska Airlines', 'Los Angeles (LAX / KLAX)', 'Landed'],
+        ['07 Jun 00:05\nAKDT', 'K4967', 'CKS967', 'Kalitta Air', 'Seoul (ICN / RKSI)', 'Scheduled'],
+    ])
+    deduplicated = deduplicate(df, '2023-06-06', 'arrival', metrics)
+    assert deduplicated['Primary Flight Number'].tolist() == ['AS193']
+    # Exactly the rows compute would have kept
+    assert deduplicated.equals(filter_by_date(df, '2023-06-06'))
+    assert metrics.counters['other_day_rows'] == 2
+
+
+def test_last_sighting_of_a_repeated_flight_is_kept(metrics):
+    df = board([
+        ['06 Jun 01:50\nAKDT', 'FX5928', 'FDX5928', 'Federal Express (FedEx)', 'Seoul (ICN / RKSI)', 'Expected'],
+        ['06 Jun 01:50\nAKDT', 'FX5928', 'FDX5928', 'Federal Express (FedEx)', 'Seoul (ICN / RKSI)', 'Landed'],
+        ['Unknown', 'N8508', 'NCR508', 'National Airlines', 'Ho Chi Minh City (SGN / VVTS)', 'Landed'],
+    ])
+    deduplicated = deduplicate(df, '2023-06-06', 'arrival', metrics)
+    assert deduplicated['Status'].tolist() == ['Landed', 'Landed']
+    assert metrics.counters['duplicates_within_day'] == 1
+
+
+# The rows of one slot of a stored day, as the scraper left them after enrichment
+def stored_slot(date, kind, numbers):
+    df = pd.read_pickle(os.path.join(DATA_DIRECTORY, date, f"{date}_{kind}.pkl"))
+    return df[df['Primary Flight Number'].isin(numbers)].drop(columns=['CO2 Emission (kg)'])
+
+
+def test_other_carrier_in_the_slot_is_not_a_codeshare(metrics):
+    # Asiana's 747-48ESF and FedEx's 777F, both from Seoul at 12:50
+    slot = stored_slot('2023-06-06', 'arrivals', ['OZ587', 'FX5928'])
+    slot = slot[slot['Date & Status'].str.contains('12:50')]
+    collapsed = collapse_codeshares(slot, metrics)
+    assert sorted(collapsed['Primary Flight Number']) == ['FX5928', 'OZ587']
+    assert collapsed['Codeshares'].isna().all()
+
+
+def test_different_aircraft_of_one_airline_are_not_collapsed(metrics):
+    # Northern Air Cargo's Dash 8 and 737-700 from Nome at 11:00
+    slot = stored_slot('2023-04-13', 'arrivals', ['NC720', 'NC721'])
+    assert len(collapse_codeshares(slot, metrics)) == 2
+
+
+def test_codeshares_of_one_flight_are_collapsed(metrics):
+    # The same Cathay Pacific flight listed with and without its callsign
+    collapsed = collapse_codeshares(stored_slot('2023-01-08', 'arrivals', ['CX3290']), metrics)
+    assert collapsed['Flight Number'].tolist() == ['CPA3290']
+    assert collapsed['Codeshares'].tolist() == ['CX3290']
+    # Air China Cargo's number is the callsign of the flight listed under Air China
+    collapsed = collapse_codeshares(stored_slot('2023-03-02', 'departures', ['CAO1017', 'CA1017']), metrics)
+    assert collapsed['Primary Flight Number'].tolist() == ['CA1017']
+    assert collapsed['Codeshares'].tolist() == ['CAO1017']
+    assert metrics.counters['codeshares_collapsed'] == 2
+
+
+# Model Radarbox reports per flight number in the lookup test
+LOOKUP_MODELS = {'AS193': 'Boeing 737-9', 'AS95': 'Boeing 737-800', 'DL7100': 'Boeing 737-800',
+                 'OZ587': 'Boeing 747-48ESF', 'FX5928': 'Boeing 777-F', 'GV605': 'Cessna 208B', 'GV611': 'Unknown'}
+
+
+def test_one_lookup_per_clear_physical_flight(metrics, monkeypatch, tmp_path):
+    import Pipeline
+    import Scraper
+    import Shared_Cache
+    monkeypatch.setattr(Shared_Cache, 'cache_directory', str(tmp_path))
+    looked_up = []
+    monkeypatch.setattr(Scraper, 'process_flight_numbers_concurrently',
+                        lambda numbers: looked_up.extend(numbers) or [(number, LOOKUP_MODELS[number]) for number in numbers])
+    df = board([
+        # Alaska's own marketing number: clear before the lookup
+        ['06 Jun 00:26\nAKDT', 'AS193', 'ASA193', 'Alaska Airlines', 'Los Angeles (LAX / KLAX)', 'Landed'],
+        ['06 Jun 00:26\nAKDT', 'AS7193', '', 'Alaska Airlines', 'Los Angeles (LAX / KLAX)', 'Landed'],
+        # Sold by Delta: linked once both lookups show the same aircraft
+        ['06 Jun 06:10\nAKDT', 'AS95', 'ASA95', 'Alaska Airlines', 'Seattle (SEA / KSEA)', 'Landed'],
+        ['06 Jun 06:10\nAKDT', 'DL7100', '', 'Delta Air Lines', 'Seattle (SEA / KSEA)', 'Landed'],
+        # Another carrier in the same slot, with another aircraft
+        ['06 Jun 12:50\nAKDT', 'FX5928', 'FDX5928', 'Federal Express (FedEx)', 'Seoul (ICN / RKSI)', 'Landed'],
+        ['06 Jun 12:50\nAKDT', 'OZ587', '', 'Asiana Airlines', 'Seoul (ICN / RKSI)', 'Landed'],
+        # No operated row, and one aircraft Unknown: not proven one flight
+        ['06 Jun 15:00\nAKDT', 'GV605', '', 'Grant Aviation', 'Bethel (BET / PABE)', 'Landed'],
+        ['06 Jun 15:00\nAKDT', 'GV611', '', 'Grant Aviation', 'Bethel (BET / PABE)', 'Landed'],
+    ])
+    df = collapse_codeshares(df, metrics, aircraft=Scraper.cached_aircraft(df['Primary Flight Number'].unique()))
+    df = Pipeline.enrich(df, metrics)
+
+    assert sorted(looked_up) == sorted(LOOKUP_MODELS)  # AS7193 never needed a lookup
+    assert dict(zip(df['Primary Flight Number'], df['Codeshares'].fillna(''))) == {
+        'AS193': 'AS7193', 'AS95': 'DL7100', 'FX5928': '', 'OZ587': '', 'GV605': '', 'GV611': ''}
+
+
+def test_cached_aircraft_keeps_different_flights_apart(metrics):
+    df = board([
+        ['13 Apr 11:00\nAKDT', 'NC721', 'NAC721', 'Northern Air Cargo', 'Nome (OME / PAOM)', 'Landed'],
+        ['13 Apr 11:00\nAKDT', 'NC720', '', 'Northern Air Cargo', 'Nome (OME / PAOM)', 'Landed'],
+    ])
+    cached = {'NC721': 'De Havilland Canada DHC-8-Q402 Dash 8', 'NC720': 'Boeing 737-700'}
+    assert len(collapse_codeshares(df, metrics, aircraft=cached)) == 2
+    assert len(collapse_codeshares(df, metrics, aircraft={'NC721': cached['NC721']})) == 1
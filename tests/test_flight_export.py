@@ -0,0 +1,78 @@
+import io
+import os
+import shutil
+import pandas as pd
+import pyarrow.parquet as pq
+import pytest
+from tornado.testing import AsyncHTTPTestCase
+from tornado.web import Application
+import Flight_Export
+from Flight_Export import EXPORT_COLUMNS, SAF_COLUMNS, export_schema, export_to_file
+
+DATA_DIRECTORY = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'data')
+
+STORED_DAYS = ['2023-06-01', '2023-06-02']
+# The first day is not stored
+RANGE = ['2023-05-31', *STORED_DAYS]
+
+
+@pytest.fixture
+def directory(tmp_path):
+    for day in STORED_DAYS:
+        shutil.copytree(os.path.join(DATA_DIRECTORY, day), tmp_path / day)
+    return str(tmp_path)
+
+
+def stored_rows():
+    return sum(len(pd.read_pickle(os.path.join(DATA_DIRECTORY, day, f"{day}_combined.pkl"))) for day in STORED_DAYS)
+
+
+def test_csv_skips_missing_days(directory, tmp_path):
+    path = export_to_file(RANGE, str(tmp_path / 'out' / 'flights.csv'), directory=directory)
+    df = pd.read_csv(path)
+    assert df.columns.tolist() == EXPORT_COLUMNS
+    assert len(df) == stored_rows()
+
+
+def test_parquet_skips_missing_days(directory, tmp_path):
+    path = export_to_file(RANGE, str(tmp_path / 'out' / 'flights.parquet'), directory=directory, saf_percentage=20)
+    table = pq.read_table(path)
+    assert table.schema.remove_metadata() == export_schema(20)
+    assert table.num_rows == stored_rows()
+    assert table.column_names[-2:] == SAF_COLUMNS
+
+
+@pytest.mark.parametrize('saf_percentage', [None, 20])
+def test_empty_parquet_has_the_schema(tmp_path, saf_percentage):
+    path = export_to_file(['2023-06-03'], str(tmp_path / 'empty.parquet'), directory=str(tmp_path), saf_percentage=saf_percentage)
+    table = pq.read_table(path)
+    assert table.num_rows == 0
+    assert table.schema.remove_metadata() == export_schema(saf_percentage)
+
+
+def test_empty_csv_has_the_header(tmp_path):
+    path = export_to_file([], str(tmp_path / 'empty.csv'), directory=str(tmp_path), saf_percentage=20)
+    assert pd.read_csv(path).columns.tolist() == EXPORT_COLUMNS + SAF_COLUMNS
+
+
+class ExportApiTest(AsyncHTTPTestCase):
+    @pytest.fixture(autouse=True)
+    def stand_in_store(self, directory, monkeypatch):
+        self.synced = []
+        monkeypatch.setattr(Flight_Export, 'airport_directory', lambda airport: directory)
+        monkeypatch.setattr(Flight_Export, 'sync_missing', lambda date_range_list, directory: self.synced.append(date_range_list))
+
+    def get_app(self):
+        return Application(Flight_Export.ROUTES)
+
+    def test_missing_days_are_fetched_first(self):
+        response = self.fetch('/api/export?start=2023-06-01&end=2023-06-02&format=parquet')
+        assert response.code == 200
+        assert self.synced == [STORED_DAYS]
+        assert pq.read_table(io.BytesIO(response.body)).num_rows == stored_rows()
+
+    def test_other_airports_are_not_synced(self):
+        response = self.fetch('/api/export?start=2023-06-01&end=2023-06-02&airport=FAI')
+        assert response.code == 200
+        assert self.synced == []
+        assert len(pd.read_csv(io.BytesIO(response.body))) == stored_rows()
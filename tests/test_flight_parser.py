@@ -0,0 +1,92 @@
+import os
+import pandas as pd
+import pytest
+import Flight_Parser
+from Flight_Parser import BACKENDS, PARSERS, available_backends, page_files, parse_rows, read_page
+from Synthetic_Data import board_page
+
+TESTS_DIRECTORY = os.path.dirname(os.path.abspath(__file__))
+DATA_DIRECTORY = os.path.join(os.path.dirname(TESTS_DIRECTORY), 'data')
+
+# Real board pages: the ones kept in tests/pages, and those under SCRAPE_PAGES_DIRECTORY
+# when it is set (Scraper.py saves every page it parses there)
+PAGE_DIRECTORIES = [os.path.join(TESTS_DIRECTORY, 'pages'), os.environ.get('SCRAPE_PAGES_DIRECTORY')]
+SAVED_PAGES = [path for directory in PAGE_DIRECTORIES if directory and os.path.isdir(directory) for path in page_files(directory)]
+
+
+# Every backend that can run here; selectolax is optional
+@pytest.fixture(params=BACKENDS)
+def backend(request):
+    if request.param == 'selectolax':
+        pytest.importorskip('selectolax.parser', exc_type=ImportError)  # 1.0 dropped the Modest engine
+    return request.param
+
+
+def stored_rows(day, kind, location):
+    df = pd.read_pickle(os.path.join(DATA_DIRECTORY, day, f"{day}_{kind}.pkl"))
+    columns = ['Date & Status', 'Primary Flight Number', 'Flight Number', 'Airline', location, 'Status']
+    return df[columns].astype(object).fillna('').values.tolist()
+
+
+SYNTHETIC_PAGES = {
+    'stored arrivals': lambda: board_page(stored_rows('2023-06-01', 'arrivals', 'Origin'), 'arrival'),
+    'stored departures': lambda: board_page(stored_rows('2023-06-01', 'departures', 'Destination'), 'departure'),
+    # Without its own operating number a row takes the next row's, as the original loop did
+    'borrowed callsign': lambda: board_page([
+        ['01 Jun 08:05\nAKDT', 'AS94', '', 'Alaska Airlines', 'Seattle (SEA / KSEA)', 'Landed'],
+        ['01 Jun 08:10\nAKDT', 'DL1234', 'DAL1234', 'Delta Air Lines', 'Minneapolis (MSP / KMSP)', 'Landed'],
+        ['01 Jun 08:30\nAKDT', 'K4967', '', 'Kalitta Air', 'Seoul (ICN / RKSI)', 'Scheduled'],
+    ]),
+    'escaped text': lambda: board_page([
+        ['01 Jun 23:59\nAKDT', 'NH1', 'ANA1', 'All Nippon Airways & Co <Cargo>', 'Tōkyō (NRT / RJAA)', ''],
+    ], navigation_links=0),
+    'no rows': lambda: board_page([]),
+    'no table': lambda: '<html><body><p>No flights</p></body></html>',
+}
+
+
+@pytest.mark.parametrize('name', SYNTHETIC_PAGES)
+def test_synthetic_pages_match_bs4(backend, name):
+    page = SYNTHETIC_PAGES[name]()
+    assert parse_rows(page, backend) == parse_rows(page, 'bs4')
+
+
+def test_borrowed_callsign():
+    rows = parse_rows(SYNTHETIC_PAGES['borrowed callsign'](), 'bs4')
+    assert [row[2] for row in rows] == ['DAL1234', 'DAL1234', 'K4967']
+
+
+@pytest.mark.parametrize('path', SAVED_PAGES or [pytest.param(None, marks=pytest.mark.skip(reason="No saved board pages in tests/pages or SCRAPE_PAGES_DIRECTORY"))])
+def test_saved_pages_match_bs4(backend, path):
+    page = read_page(path)
+    reference = parse_rows(page, 'bs4')
+    assert reference
+    assert parse_rows(page, backend) == reference
+
+
+@pytest.fixture
+def fresh_default(monkeypatch):
+    monkeypatch.setattr(Flight_Parser, '_default_backend', None)
+    return monkeypatch
+
+
+def test_configured_backend_is_used(fresh_default):
+    fresh_default.setenv('FLIGHT_PARSER', 'bs4')
+    assert Flight_Parser.default_backend() == 'bs4'
+
+
+def test_missing_configured_backend_falls_back(fresh_default):
+    fresh_default.setenv('FLIGHT_PARSER', 'selectolax')
+    fresh_default.setattr(Flight_Parser, 'backend_available', lambda backend: backend != 'selectolax')
+    assert Flight_Parser.default_backend() == 'lxml'
+
+
+def test_unknown_backend_is_rejected(fresh_default):
+    fresh_default.setenv('FLIGHT_PARSER', 'html5lib')
+    with pytest.raises(ValueError):
+        Flight_Parser.default_backend()
+
+
+def test_every_parser_has_a_backend_name():
+    assert set(PARSERS) == set(BACKENDS)
+    assert 'bs4' in available_backends()
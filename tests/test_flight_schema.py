@@ -0,0 +1,57 @@
+import pandas as pd
+import pytest
+from Flight_Schema import CATEGORY_COLUMNS, EMISSION_COLUMN, TIME_COLUMN, apply_schema
+from Flight_Store import day_file, write_day
+
+
+def board(date_status, **columns):
+    return pd.DataFrame({'Date & Status': date_status, **columns})
+
+
+@pytest.mark.parametrize('date_status, expected', [
+    # The repeated hour when clocks fall back, told apart by the zone suffix
+    ('05 Nov 01:30\nAKDT', '2023-11-05 01:30-08:00'),
+    ('05 Nov 01:30\nAKST', '2023-11-05 01:30-09:00'),
+    # The skipped hour when they spring forward moves to its end
+    ('12 Mar 02:30\nAKST', '2023-03-12 03:00-08:00'),
+    ('12 Mar 03:30\nAKDT', '2023-03-12 03:30-08:00'),
+    ('31 Dec 23:59\nAKST', '2023-12-31 23:59-09:00'),
+])
+def test_scheduled_time_across_dst(date_status, expected):
+    scheduled = apply_schema(board([date_status]), '2023-11-05')[TIME_COLUMN][0]
+    assert scheduled == pd.Timestamp(expected)
+    assert str(scheduled.tz) == 'America/Anchorage'
+
+
+def test_airport_timezone():
+    scheduled = apply_schema(board(['05 Nov 01:30\nAKST']), '2023-11-05', 'JNU')[TIME_COLUMN][0]
+    assert str(scheduled.tz) == 'America/Juneau'
+    assert scheduled == pd.Timestamp('2023-11-05 01:30-09:00')
+
+
+def test_unparseable_values():
+    df = apply_schema(board(['Unknown', '05 Nov 01:30\nAKST'], **{EMISSION_COLUMN: ['n/a', '1234.6']}), '2023-11-05')
+    assert df[TIME_COLUMN].isna().tolist() == [True, False]
+    assert df[EMISSION_COLUMN].dtype == 'Int64'
+    assert df[EMISSION_COLUMN].tolist() == [pd.NA, 1235]
+
+
+def test_csv_round_trip(tmp_path):
+    df = apply_schema(board(
+        ['05 Nov 00:45\nAKDT', '05 Nov 01:30\nAKDT', '05 Nov 01:30\nAKST', '05 Nov 23:10\nAKST'],
+        **{'Primary Flight Number': ['AS94', 'K4967', 'FX77', '5X61'],
+           'Airline': ['Alaska Airlines', 'Kalitta Air', 'FedEx', 'UPS'],
+           'Origin': ['Seattle (SEA / KSEA)', 'Seoul (ICN / RKSI)', None, 'Louisville (SDF / KSDF)'],
+           'Destination': [None, None, 'Memphis (MEM / KMEM)', None],
+           'Status': ['Landed', 'Landed', 'Departed', 'Scheduled'],
+           'Aircraft Info': ['Boeing 737-900', 'Boeing 747-400F', 'Boeing 777F', None],
+           EMISSION_COLUMN: [10500, 52000, None, 48000]}), '2023-11-05')
+    write_day(df, '2023-11-05', formats=('csv',), directory=str(tmp_path))
+    round_tripped = apply_schema(pd.read_csv(day_file('2023-11-05', 'combined', 'csv', str(tmp_path))), '2023-11-05')
+    pd.testing.assert_series_equal(round_tripped[TIME_COLUMN], df[TIME_COLUMN], check_dtype=False)
+    assert str(round_tripped[TIME_COLUMN].dt.tz) == 'America/Anchorage'
+    assert round_tripped[EMISSION_COLUMN].dtype == 'Int64'
+    assert round_tripped[EMISSION_COLUMN].tolist() == df[EMISSION_COLUMN].tolist()
+    for column in CATEGORY_COLUMNS:
+        assert isinstance(round_tripped[column].dtype, pd.CategoricalDtype), column
+        assert round_tripped[column].astype(object).tolist() == df[column].astype(object).tolist(), column
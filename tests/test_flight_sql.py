@@ -0,0 +1,40 @@
+import os
+import time
+import pandas as pd
+import pytest
+import Flight_Sql
+from Flight_Store import day_file, write_day
+
+DATA_DIRECTORY = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'data')
+
+
+def test_connection_limits(tmp_path):
+    connection = Flight_Sql.connect('ANC', str(tmp_path))
+    threads, memory_limit = connection.sql("SELECT current_setting('threads'), current_setting('memory_limit')").fetchone()
+    assert threads == Flight_Sql.DEFAULT_THREADS
+    assert memory_limit.endswith('MiB') or memory_limit.endswith('GiB')
+
+
+def test_long_query_is_interrupted(tmp_path):
+    start_time = time.perf_counter()
+    with pytest.raises(TimeoutError):
+        Flight_Sql.query("SELECT count(*) FROM range(1000000000000)", directory=str(tmp_path), timeout=0.5)
+    assert time.perf_counter() - start_time < 5
+    # The shared connection still answers afterwards
+    assert Flight_Sql.query("SELECT count(*) AS n FROM flights", directory=str(tmp_path))['n'][0] == 0
+
+
+def test_pickle_only_days_are_converted(tmp_path):
+    df = pd.read_pickle(os.path.join(DATA_DIRECTORY, '2023-06-01', '2023-06-01_combined.pkl'))
+    write_day(df, '2023-06-01', formats=('pkl',), directory=str(tmp_path))
+    write_day(df, '2023-06-02', formats=('parquet',), directory=str(tmp_path))
+    result = Flight_Sql.query("SELECT date, count(*) AS n FROM flights GROUP BY date ORDER BY date", directory=str(tmp_path))
+    assert result['n'].tolist() == [len(df), len(df)]
+    assert os.path.exists(day_file('2023-06-01', 'combined', 'parquet', str(tmp_path)))
+
+
+def test_unreadable_pickle_day_is_left_out(tmp_path):
+    os.makedirs(tmp_path / '2023-06-01')
+    with open(day_file('2023-06-01', 'combined', 'pkl', str(tmp_path)), 'wb') as f:
+        f.write(b'not a pickle')
+    assert Flight_Sql.view_files(str(tmp_path)) == ([], [])
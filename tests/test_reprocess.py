@@ -0,0 +1,76 @@
+import pandas as pd
+import pytest
+import Reprocess
+from Emission_Factors import get_resolver
+from Emissions import EMISSION_MODEL_ID, compute_emissions
+from Flight_Store import read_day, read_meta, write_day, write_meta
+
+DATE = '2023-02-01'
+STALE_MODEL, CURRENT_MODEL = 'Boeing 777-F', 'Boeing 737-8'
+
+
+@pytest.fixture
+def day(tmp_path):
+    df = pd.DataFrame({
+        'Date & Status': ['01 Feb 10:00\nAKST', '01 Feb 11:00\nAKST', '01 Feb 12:00\nAKST'],
+        'Primary Flight Number': ['FX5928', 'AS95', 'AS97'],
+        'Flight Number': ['FDX5928', 'ASA95', 'ASA97'],
+        'Airline': ['Federal Express (FedEx)', 'Alaska Airlines', 'Alaska Airlines'],
+        'Origin': ['Seoul (ICN / RKSI)', 'Seattle (SEA / KSEA)', 'Seattle (SEA / KSEA)'],
+        'Destination': [None, None, None],
+        'Status': ['Landed'] * 3,
+        'Aircraft Info': [STALE_MODEL, CURRENT_MODEL, CURRENT_MODEL],
+    })
+    # Stored numbers the reprocess must either fix or leave alone
+    df['CO2 Emission (kg)'] = [1, 2, 3]
+    directory = str(tmp_path)
+    write_day(df, DATE, 'combined', ('pkl',), directory)
+    factors = get_resolver().factor_map(df['Aircraft Info'])
+    write_meta(DATE, {'factor_version': get_resolver().version, 'emission_model': EMISSION_MODEL_ID,
+                      'factors': {**factors, STALE_MODEL: factors[STALE_MODEL] - 3.45}}, directory)
+    return directory, df
+
+
+def stored_emissions(directory):
+    return read_day(DATE, directory=directory)['CO2 Emission (kg)'].tolist()
+
+
+def test_only_stale_models_are_recomputed(day):
+    directory, df = day
+    # The recorded factor version is current, but one model's factor changed
+    write_meta(DATE, {**read_meta(DATE, directory), 'factor_version': 'old'}, directory)
+    date, changed_rows, status, changes = Reprocess.reprocess_day(DATE, directory)
+    expected = int(compute_emissions(df.iloc[:1], flight_type='arrival').iloc[0])
+    assert (changed_rows, status) == (1, 'reprocessed')
+    assert list(changes) == [STALE_MODEL]
+    assert changes[STALE_MODEL]['new_factor'] - changes[STALE_MODEL]['old_factor'] == pytest.approx(3.45)
+    assert stored_emissions(directory) == [expected, 2, 3]
+    assert read_meta(DATE, directory)['factors'][STALE_MODEL] == get_resolver().factor_map(df['Aircraft Info'])[STALE_MODEL]
+
+
+def test_up_to_date_day_is_skipped(day):
+    directory, _ = day
+    assert Reprocess.reprocess_day(DATE, directory)[1:3] == (0, 'up to date')
+    assert stored_emissions(directory) == [1, 2, 3]
+
+
+def test_dry_run_writes_nothing(day):
+    directory, _ = day
+    meta = read_meta(DATE, directory)
+    _, changed_rows, _, changes = Reprocess.reprocess_day(DATE, directory, force=True, dry_run=True)
+    assert changed_rows == 3
+    assert sum(change['rows'] for change in changes.values()) == 3
+    assert stored_emissions(directory) == [1, 2, 3]
+    assert read_meta(DATE, directory) == meta
+
+
+def test_force_and_other_models_recompute_every_row(day):
+    directory, df = day
+    expected = compute_emissions(df, flight_type='arrival').tolist()
+    assert Reprocess.reprocess_day(DATE, directory, force=True)[1] == 3
+    assert stored_emissions(directory) == expected
+    # A day recorded with another emission model is recomputed in full as well
+    write_day(df, DATE, 'combined', ('pkl',), directory)
+    write_meta(DATE, {**read_meta(DATE, directory), 'emission_model': 'distance-v1'}, directory)
+    assert Reprocess.reprocess_day(DATE, directory)[1] == 3
+    assert read_meta(DATE, directory)['emission_model'] == EMISSION_MODEL_ID
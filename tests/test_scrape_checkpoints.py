@@ -0,0 +1,71 @@
+import os
+import pandas as pd
+import pytest
+from Pipeline import combine_day
+from Pipeline_Metrics import PipelineMetrics
+from Scrape_Checkpoints import (checkpoint_directory, checkpoint_path, clear_checkpoints, completed_intervals,
+                                load_checkpoints, read_checkpoint, write_checkpoint)
+from Scraper import TIME_INTERVALS
+
+DATE = '2023-06-01'
+ARRIVAL = ['01 Jun 08:05\nAKDT', 'AS94', 'ASA94', 'Alaska Airlines', 'Seattle (SEA / KSEA)', 'Landed']
+DEPARTURE = ['01 Jun 09:40\nAKDT', 'FX77', 'FDX77', 'FedEx', 'Memphis (MEM / KMEM)', 'Departed']
+
+
+@pytest.fixture
+def date_directory(tmp_path):
+    return str(tmp_path / 'data' / DATE)
+
+
+def test_resume_fetches_only_missing_intervals(date_directory):
+    # A run that stopped after three windows, one of them without flights
+    write_checkpoint(date_directory, DATE, 'arrival', '08_00', [ARRIVAL])
+    write_checkpoint(date_directory, DATE, 'arrival', '00_00', [])
+    write_checkpoint(date_directory, DATE, 'departure', '08_00', [DEPARTURE])
+    assert completed_intervals(date_directory, DATE, 'arrival', TIME_INTERVALS) == ['00_00', '08_00']
+    # The rerun fetches the rest; the day is assembled in interval order, not write order
+    later = ARRIVAL[:1] + ['DL1234'] + ARRIVAL[2:]
+    write_checkpoint(date_directory, DATE, 'arrival', '02_00', [later])
+    assert load_checkpoints(date_directory, DATE, 'arrival', TIME_INTERVALS) == [later, ARRIVAL]
+    assert load_checkpoints(date_directory, DATE, 'departure', TIME_INTERVALS) == [DEPARTURE]
+
+
+def test_damaged_checkpoint_is_fetched_again(date_directory):
+    write_checkpoint(date_directory, DATE, 'arrival', '08_00', [ARRIVAL])
+    with open(checkpoint_path(date_directory, DATE, 'arrival', '10_00'), 'wb') as f:
+        f.write(b'\x80\x05trunc')
+    # A temporary file left by a crash mid-write is not a checkpoint
+    open(f"{checkpoint_path(date_directory, DATE, 'arrival', '12_00')}.123.tmp", 'wb').close()
+    assert read_checkpoint(date_directory, DATE, 'arrival', '10_00') is None
+    assert completed_intervals(date_directory, DATE, 'arrival', TIME_INTERVALS) == ['08_00']
+
+
+def test_clear_one_direction_then_both(date_directory):
+    for interval in ('00_00', '02_00'):
+        write_checkpoint(date_directory, DATE, 'arrival', interval, [ARRIVAL])
+        write_checkpoint(date_directory, DATE, 'departure', interval, [DEPARTURE])
+    write_checkpoint(date_directory, '2023-05-31', 'arrival', '22_00', [ARRIVAL])
+    assert clear_checkpoints(date_directory, DATE, 'arrival') == 2
+    assert completed_intervals(date_directory, DATE, 'arrival', TIME_INTERVALS) == []
+    assert completed_intervals(date_directory, DATE, 'departure', TIME_INTERVALS) == ['00_00', '02_00']
+    assert clear_checkpoints(date_directory, DATE) == 2
+    # Another day's checkpoint keeps the directory
+    assert os.listdir(checkpoint_directory(date_directory)) == ['2023-05-31_arrival_22_00.pkl']
+    assert clear_checkpoints(date_directory, '2023-05-31') == 1
+    assert not os.path.exists(checkpoint_directory(date_directory))
+    assert clear_checkpoints(date_directory, DATE) == 0
+
+
+def test_combined_day_clears_its_checkpoints(date_directory, tmp_path):
+    write_checkpoint(date_directory, DATE, 'arrival', '08_00', [ARRIVAL])
+    write_checkpoint(date_directory, DATE, 'departure', '08_00', [DEPARTURE])
+    frames = {
+        'arrival': pd.DataFrame([ARRIVAL], columns=['Date & Status', 'Primary Flight Number', 'Flight Number', 'Airline', 'Origin', 'Status']),
+        'departure': pd.DataFrame([DEPARTURE], columns=['Date & Status', 'Primary Flight Number', 'Flight Number', 'Airline', 'Destination', 'Status']),
+    }
+    for df in frames.values():
+        df['Aircraft Info'] = 'Boeing 737-900'
+        df['CO2 Emission (kg)'] = 10000
+    combined = combine_day(DATE, date_directory, PipelineMetrics('test', directory=str(tmp_path)), frames, formats=('pkl',))
+    assert len(combined) == 2
+    assert not os.path.exists(checkpoint_directory(date_directory))
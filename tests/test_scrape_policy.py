@@ -0,0 +1,136 @@
+import json
+from types import SimpleNamespace
+import pytest
+import Scrape_Policy
+from Scrape_Policy import FIXED_TIMEOUTS, TIMEOUT_FLOORS, CircuitBreaker, LatencyTracker, ScrapePolicy
+
+
+# Monotonic clock that only moves when the breaker sleeps (or the test advances it)
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+        self.slept = []
+
+    def monotonic(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.slept.append(seconds)
+        self.now += seconds
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(Scrape_Policy, 'time', SimpleNamespace(monotonic=clock.monotonic, sleep=clock.sleep))
+    return clock
+
+
+def test_breaker_needs_enough_calls(clock):
+    breaker = CircuitBreaker(window=6, min_calls=3)
+    breaker.record(False)
+    breaker.record(False)
+    assert breaker.state == 'closed'
+    breaker.record(False)
+    assert (breaker.state, breaker.trips) == ('open', 1)
+
+
+def test_breaker_opens_at_the_failure_rate(clock):
+    breaker = CircuitBreaker(window=6, min_calls=3, failure_threshold=0.5)
+    for ok in (True, True, True, False, False):
+        breaker.record(ok)
+    assert breaker.state == 'closed'
+    breaker.record(False)  # 3 of 6
+    assert breaker.state == 'open'
+
+
+def test_half_open_probe_closes(clock):
+    breaker = CircuitBreaker(cooldown=60)
+    for _ in range(3):
+        breaker.record(False)
+    clock.now += 15
+    assert breaker.allow(sleep=clock.sleep)
+    assert clock.slept == [45]
+    assert breaker.state == 'half_open'
+    breaker.record(True)
+    assert breaker.state == 'closed'
+    assert len(breaker.results) == 0
+    assert breaker.allow(sleep=clock.sleep)
+    assert clock.slept == [45]  # Closed: no more pauses
+
+
+def test_failed_probe_backs_off(clock):
+    breaker = CircuitBreaker(cooldown=60, max_cooldown=200, max_paused=10000)
+    for _ in range(3):
+        breaker.record(False)
+    for expected in (120, 200, 200):
+        assert breaker.allow(sleep=clock.sleep)
+        breaker.record(False)
+        assert (breaker.state, breaker.cooldown) == ('open', expected)
+    assert breaker.trips == 4
+    assert breaker.allow(sleep=clock.sleep)
+    breaker.record(True)
+    assert breaker.cooldown == 60  # Reset once a probe succeeds
+    assert breaker.paused_seconds == pytest.approx(60 + 120 + 200 + 200)
+
+
+def test_pause_budget(clock):
+    breaker = CircuitBreaker(cooldown=60, max_paused=100)
+    for _ in range(3):
+        breaker.record(False)
+    assert breaker.allow(sleep=clock.sleep)
+    breaker.record(False)  # Reopens for 120s, past the remaining 40s of budget
+    assert not breaker.allow(sleep=clock.sleep)
+    assert breaker.state == 'open'
+    assert breaker.paused_seconds == 60
+
+
+def test_tracker_falls_back_to_fixed_timeouts(tmp_path):
+    tracker = LatencyTracker(path=str(tmp_path / 'latency.json'), min_samples=8)
+    for _ in range(7):
+        tracker.record('load', 1.0)
+    assert tracker.timeout('load') == FIXED_TIMEOUTS['load']
+    tracker.record('load', 1.0)
+    assert tracker.timeout('load') == TIMEOUT_FLOORS['load']  # 2s clamped up to the floor
+
+
+def test_tracker_percentile_and_ceiling(tmp_path):
+    tracker = LatencyTracker(path=str(tmp_path / 'latency.json'), min_samples=4, percentile=50, headroom=2.0)
+    for seconds in (10, 12, 14, 16):
+        tracker.record('table', seconds / 2)
+        tracker.record('load', seconds)
+    assert tracker.timeout('table') == pytest.approx(13.0)
+    assert tracker.timeout('load') == pytest.approx(26.0)
+    for _ in range(5):
+        tracker.record('load', 500)
+    assert tracker.timeout('load') == FIXED_TIMEOUTS['load']
+
+
+def test_tracker_history_is_shared_and_windowed(tmp_path):
+    path = str(tmp_path / 'metrics' / 'latency.json')
+    first, second = LatencyTracker(path=path, window=5), LatencyTracker(path=path, window=5)
+    for seconds in (1, 2, 3):
+        first.record('load', seconds)
+        second.record('load', seconds + 10)
+    first.save()
+    second.save()
+    with open(path, 'r', encoding='utf-8') as f:
+        assert json.load(f)['load'] == [2, 3, 11, 12, 13]
+    assert list(LatencyTracker(path=path, window=5).samples['load']) == [2, 3, 11, 12, 13]
+    second.save()  # Nothing new since the last save
+    assert list(LatencyTracker(path=path, window=5).samples['load']) == [2, 3, 11, 12, 13]
+
+
+def test_unreadable_history_is_ignored(tmp_path):
+    path = tmp_path / 'latency.json'
+    path.write_text('{not json')
+    assert len(LatencyTracker(path=str(path)).samples['load']) == 0
+
+
+def test_policy_accounting(tmp_path, clock):
+    policy = ScrapePolicy(LatencyTracker(path=str(tmp_path / 'latency.json')), CircuitBreaker(cooldown=30))
+    policy.timed_out('load', 40)
+    for _ in range(3):
+        policy.interval_done(False)
+    policy.breaker.allow(sleep=clock.sleep)
+    assert policy.seconds_saved() == pytest.approx(FIXED_TIMEOUTS['load'] - 40 - 30)
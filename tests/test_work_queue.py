@@ -0,0 +1,86 @@
+import os
+import subprocess
+import sys
+import time
+import pytest
+from Work_Queue import RedisQueue, open_queue
+
+REPO = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Leases one job in a separate process and dies at the point given
+CRASHING_WORKER = """
+import os, sys, time
+import Work_Queue
+queue = Work_Queue.open_queue(sys.argv[1], name='collect', lease_seconds=float(sys.argv[3]))
+if sys.argv[2] == 'during_lease':
+    # The lease reads the clock after picking the job and before recording the lease
+    time.time = lambda: os._exit(3)
+queue.lease('crashing-worker')
+os._exit(3)
+"""
+
+
+def crash_worker(url, point, lease_seconds=600):
+    process = subprocess.run([sys.executable, '-c', CRASHING_WORKER, url, point, str(lease_seconds)], cwd=REPO)
+    assert process.returncode == 3
+
+
+@pytest.fixture
+def queue_url(tmp_path):
+    url = f"sqlite:///{tmp_path / 'queue.db'}"
+    open_queue(url, name='collect').enqueue(['2023-01-01'], ['arrival', 'departure'])
+    return url
+
+
+def test_crash_between_pop_and_lease_keeps_the_job(queue_url):
+    crash_worker(queue_url, 'during_lease')
+
+    queue = open_queue(queue_url, name='collect')
+    assert queue.counts() == {'queued': 2}
+    assert not queue.drained()
+    job = queue.lease('worker')
+    assert (job['id'], job['attempts']) == ('2023-01-01:arrival', 1)
+
+
+def test_crash_after_lease_is_requeued(queue_url):
+    crash_worker(queue_url, 'after_lease', lease_seconds=0.2)
+
+    queue = open_queue(queue_url, name='collect', lease_seconds=600)
+    # The dead worker's job still counts until its lease expires
+    assert queue.counts() == {'leased': 1, 'queued': 1}
+    assert not queue.drained()
+    time.sleep(0.3)
+    assert queue.requeue_expired() == 1
+
+    for direction, attempts in (('arrival', 2), ('departure', 1)):
+        job = queue.lease('worker')
+        assert (job['direction'], job['attempts']) == (direction, attempts)
+        assert queue.complete(job, 'worker', direction)
+    assert queue.ready_days() == ['2023-01-01']
+    assert queue.results('2023-01-01') == {'arrival': 'arrival', 'departure': 'departure'}
+    assert queue.drained()
+
+
+def test_redis_lease_survives_a_dead_worker(monkeypatch):
+    fakeredis = pytest.importorskip('fakeredis')
+    pytest.importorskip('lupa')  # fakeredis runs the Lua scripts with it
+    import redis
+    server = fakeredis.FakeServer()
+    monkeypatch.setattr(redis.Redis, 'from_url', classmethod(lambda cls, url: fakeredis.FakeRedis(server=server)))
+
+    queue = RedisQueue('redis://stand-in', name='collect', lease_seconds=0.2)
+    queue.enqueue(['2023-01-01'], ['arrival'])
+    job = queue.lease('crashing-worker')
+    assert job['attempts'] == 1
+    # Leased and never completed: neither queued nor lost
+    assert not queue.drained()
+    time.sleep(0.3)
+    assert queue.requeue_expired() == 1
+    assert not queue.complete(job, 'crashing-worker', 'late')
+
+    job = queue.lease('worker')
+    assert job['attempts'] == 2
+    assert queue.complete(job, 'worker', 'frame')
+    assert queue.ready_days() == ['2023-01-01']
+    assert queue.results('2023-01-01') == {'arrival': 'frame'}
+    assert queue.drained()